@@ -0,0 +1,33 @@
+"""Add trigram index for user search
+
+Revision ID: 003_users_search_trgm_index
+Revises: 002_users_created_at_id_index
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = '003_users_search_trgm_index'
+down_revision: Union[str, None] = '002_users_created_at_id_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    
+    # Expression must match USER_SEARCH_DOCUMENT in app/services/user_service.py
+    with op.get_context().autocommit_block():
+        op.execute(
+            "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_users_search_trgm ON users "
+            "USING gin ((coalesce(email, '') || ' ' || coalesce(username, '') || ' ' "
+            "|| coalesce(first_name, '') || ' ' || coalesce(last_name, '')) gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        op.execute("DROP INDEX CONCURRENTLY IF EXISTS ix_users_search_trgm")
@@ -0,0 +1,49 @@
+"""Add broadcast notifications and receipts
+
+Revision ID: 004_broadcast_notifications
+Revises: 003_users_search_trgm_index
+Create Date: 2026-10-16
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = '004_broadcast_notifications'
+down_revision: Union[str, None] = '003_users_search_trgm_index'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    notification_priority = postgresql.ENUM(name='notification_priority', create_type=False)
+    
+    # One row per broadcast instead of one notification per user
+    op.create_table(
+        'broadcast_notifications',
+        sa.Column('id', postgresql.UUID(as_uuid=True), primary_key=True),
+        sa.Column('title', sa.String(200), nullable=False),
+        sa.Column('message', sa.Text, nullable=False),
+        sa.Column('priority', notification_priority, nullable=False),
+        sa.Column('action_url', sa.String(500), nullable=True),
+        sa.Column('metadata', postgresql.JSONB, default={}, nullable=False),
+        sa.Column('created_by', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='SET NULL'), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False, index=True),
+    )
+    
+    # Read / dismissed state, only for users who acted on a broadcast
+    op.create_table(
+        'broadcast_receipts',
+        sa.Column('user_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True),
+        sa.Column('broadcast_id', postgresql.UUID(as_uuid=True), sa.ForeignKey('broadcast_notifications.id', ondelete='CASCADE'), primary_key=True, index=True),
+        sa.Column('read_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('dismissed_at', sa.DateTime(timezone=True), nullable=True),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('broadcast_receipts')
+    op.drop_table('broadcast_notifications')
@@ -1,14 +1,19 @@
 """Authentication API endpoints."""
 
+from typing import Optional
+
 from fastapi import APIRouter, Depends, Request, status
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
 from app.core.dependencies import (
+    current_user_etag,
+    get_current_principal,
     get_current_user,
     get_client_ip,
     get_user_agent,
 )
+from app.core.principal import Principal
 from app.core.security import generate_verification_token
 from app.models.user import User
 from app.services.auth_service import AuthService
@@ -128,7 +133,7 @@ async def refresh_token(
 )
 async def logout(
     data: LogoutRequest,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -178,9 +183,13 @@ async def verify_email(
     summary="Get current user",
 )
 async def get_me(
+    etag: Optional[str] = Depends(current_user_etag),
     current_user: User = Depends(get_current_user),
 ):
     """
     Get current authenticated user profile.
+    
+    Supports If-None-Match: an unchanged profile is answered with
+    304 Not Modified without loading the user.
     """
     return current_user
@@ -26,6 +26,7 @@ class DesktopConfigResponse(BaseModel):
     """Configuration specifically for desktop application."""
     api_url: str
     websocket_url: Optional[str] = None
+    events_url: Optional[str] = None  # Server-sent events fallback for websocket_url
     update_url: Optional[str] = None
     min_version: str = "1.0.0"
     latest_version: str = "1.0.0"
@@ -60,10 +61,12 @@ async def get_desktop_config(request: Request):
     scheme = request.headers.get("x-forwarded-proto", request.url.scheme)
     host = request.headers.get("x-forwarded-host", request.headers.get("host", "localhost:8000"))
     base_url = f"{scheme}://{host}"
+    ws_scheme = "wss" if scheme == "https" else "ws"
     
     return DesktopConfigResponse(
         api_url=f"{base_url}/api/v1",
-        websocket_url=f"ws://{host}/ws",
+        websocket_url=f"{ws_scheme}://{host}/api/v1/notifications/ws",
+        events_url=f"{base_url}/api/v1/notifications/stream",
     )
 
 
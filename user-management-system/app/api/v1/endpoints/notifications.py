@@ -1,20 +1,35 @@
 """Notification API endpoints."""
 
+import asyncio
+from contextlib import suppress
 from datetime import datetime, timezone
-from typing import Optional, List
-from uuid import UUID
+from functools import partial
+from typing import AsyncIterator, Optional, List
+from uuid import UUID, uuid4
 
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, Depends, Query, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel, Field
-from sqlalchemy import select, func, and_, delete, update
+from sqlalchemy import select, func, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import get_db
-from app.core.dependencies import get_current_user, require_permission
-from app.core.exceptions import NotFoundError, AuthorizationError
+from app.core.config import settings
+from app.core.counting import CountStrategy, count_total
+from app.core.database import after_commit, bulk_insert, gather_reads, get_db, match_any
+from app.core.dependencies import (
+    StreamCredentials,
+    get_current_principal,
+    get_stream_credentials,
+    require_permission,
+)
+from app.core.exceptions import AppException, NotFoundError, ServiceUnavailableError
+from app.core.principal import Principal
+from app.core.realtime import EXPIRED_EVENT, Connection, notification_fields, notification_hub
+from app.core.serialization import FastJSONRoute
 from app.models.user import User
-from app.models.notification import Notification
-from app.models.enums import NotificationType, NotificationPriority, UserStatus
+from app.models.notification import BroadcastNotification, Notification
+from app.models.enums import NotificationType, NotificationPriority
+from app.services.notification_service import NotificationService
 from app.schemas.notification import (
     NotificationCreate,
     NotificationResponse,
@@ -22,7 +37,10 @@ from app.schemas.notification import (
 from app.schemas.base import MessageResponse, PaginatedResponse
 
 
-router = APIRouter(prefix="/notifications", tags=["Notifications"])
+# Columns selected by notification listings: exactly the fields of NotificationResponse
+LIST_COLUMNS = tuple(getattr(Notification, field) for field in NotificationResponse.model_fields)
+
+router = APIRouter(prefix="/notifications", tags=["Notifications"], route_class=FastJSONRoute)
 
 
 # ==================== Schema definitions ====================
@@ -53,6 +71,18 @@ class SendNotificationResponse(BaseModel):
     
     sent_count: int
     notification_ids: List[UUID]
+    unknown_ids: List[UUID] = Field(default_factory=list, description="Requested user IDs that match no user")
+
+
+class BroadcastNotificationResponse(BaseModel):
+    """Response for broadcast notification."""
+    
+    id: UUID
+    title: str
+    message: str
+    priority: NotificationPriority
+    action_url: Optional[str]
+    created_at: datetime
 
 
 class UserNotificationStatsResponse(BaseModel):
@@ -90,38 +120,31 @@ async def list_my_notifications(
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
     is_read: Optional[bool] = Query(None, description="Filter by read status"),
     type: Optional[NotificationType] = Query(None, description="Filter by type"),
-    current_user: User = Depends(get_current_user),
+    count: Optional[CountStrategy] = Query(None, description="How the total is computed"),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db),
 ):
     """
     List current user's notifications with filters.
-    """
-    # Build query for current user only
-    query = select(Notification).where(Notification.user_id == current_user.id)
-    count_query = select(func.count(Notification.id)).where(Notification.user_id == current_user.id)
-    
-    if is_read is not None:
-        query = query.where(Notification.read == is_read)
-        count_query = count_query.where(Notification.read == is_read)
-    if type:
-        query = query.where(Notification.type == type)
-        count_query = count_query.where(Notification.type == type)
     
-    # Get total count
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
-    
-    # Get paginated results
-    offset = (page - 1) * page_size
-    query = query.order_by(Notification.created_at.desc()).offset(offset).limit(page_size)
-    result = await db.execute(query)
-    notifications = result.scalars().all()
+    Personal notifications and broadcasts are listed together.
+    """
+    notification_service = NotificationService(db)
+    notifications, total = await notification_service.list_notifications(
+        current_user.id,
+        page=page,
+        page_size=page_size,
+        is_read=is_read,
+        type=type,
+        count_strategy=count or settings.PAGINATION_COUNT_STRATEGY,
+    )
     
     return PaginatedResponse.create(
-        items=[NotificationResponse.model_validate(n) for n in notifications],
-        total=total,
+        items=[notification._asdict() for notification in notifications],
+        total=total.value,
         page=page,
         page_size=page_size,
+        total_is_estimate=total.is_estimate,
     )
 
 
@@ -131,41 +154,14 @@ async def list_my_notifications(
     summary="Get my notification statistics",
 )
 async def get_my_notification_stats(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Get current user's notification statistics.
     """
-    # Total notifications for current user
-    total_result = await db.execute(
-        select(func.count(Notification.id)).where(Notification.user_id == current_user.id)
-    )
-    total = total_result.scalar() or 0
-    
-    # Unread count for current user
-    unread_result = await db.execute(
-        select(func.count(Notification.id)).where(
-            and_(
-                Notification.user_id == current_user.id,
-                Notification.read == False
-            )
-        )
-    )
-    unread = unread_result.scalar() or 0
-    
-    # By type for current user
-    by_type = {}
-    for ntype in NotificationType:
-        type_result = await db.execute(
-            select(func.count(Notification.id)).where(
-                and_(
-                    Notification.user_id == current_user.id,
-                    Notification.type == ntype
-                )
-            )
-        )
-        by_type[ntype.value] = type_result.scalar() or 0
+    notification_service = NotificationService(db)
+    total, unread, by_type = await notification_service.get_stats(current_user.id)
     
     return UserNotificationStatsResponse(
         total=total,
@@ -180,25 +176,136 @@ async def get_my_notification_stats(
     summary="Get unread notification count",
 )
 async def get_unread_count(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Get count of unread notifications for current user.
     """
-    result = await db.execute(
-        select(func.count(Notification.id)).where(
-            and_(
-                Notification.user_id == current_user.id,
-                Notification.read == False
-            )
-        )
-    )
-    count = result.scalar() or 0
+    notification_service = NotificationService(db)
+    count = await notification_service.get_unread_count(current_user.id)
     
     return UnreadCountResponse(count=count)
 
 
+@router.get(
+    "/stream",
+    summary="Stream new notifications (server-sent events)",
+)
+async def stream_notifications(
+    credentials: StreamCredentials = Depends(get_stream_credentials),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Receive new notifications as server-sent events.
+    
+    Fallback for clients that cannot use the WebSocket at
+    `/notifications/ws`; each event's `data` is one of its messages.
+    The stream ends after `{"type": "expired"}` once the access token
+    expires or its session is revoked.
+    """
+    # Give the pooled database connection back for the lifetime of the stream
+    await db.close()
+    
+    if notification_hub.is_full:
+        raise ServiceUnavailableError("Too many real-time connections")
+    
+    return StreamingResponse(
+        _event_stream(credentials),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.websocket("/ws")
+async def notifications_websocket(
+    websocket: WebSocket,
+    token: Optional[str] = Query(None, description="Access token, for clients that cannot set headers"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Receive new notifications over a WebSocket.
+    
+    The server sends `{"type": "notification", "notification": {...}}`
+    for each new notification, `{"type": "ping"}` when idle, and
+    `{"type": "resync"}` when events were dropped and the client should
+    refetch its notifications. Once the access token expires or its
+    session is revoked, it sends `{"type": "expired"}` and closes the
+    socket (1008). Messages from the client are ignored.
+    """
+    try:
+        credentials = await get_stream_credentials(websocket, token, db)
+    except AppException:
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    
+    # Give the pooled database connection back for the lifetime of the socket
+    await db.close()
+    
+    connection = notification_hub.connect(
+        credentials.principal.id, credentials.session_id, credentials.expires_at
+    )
+    if connection is None:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        return
+    
+    try:
+        await websocket.accept()
+        sender = asyncio.create_task(_send_events(websocket, connection))
+        try:
+            while (await websocket.receive())["type"] != "websocket.disconnect":
+                pass
+        finally:
+            sender.cancel()
+    finally:
+        notification_hub.disconnect(connection)
+
+
+async def _event_stream(credentials: StreamCredentials) -> AsyncIterator[str]:
+    """
+    Server-sent events for a client, until it goes away or its token expires.
+    
+    The client is registered only once the body is being sent, so a
+    client that leaves before then never holds a connection slot.
+    """
+    connection = notification_hub.connect(
+        credentials.principal.id, credentials.session_id, credentials.expires_at
+    )
+    if connection is None:
+        return
+    
+    try:
+        while True:
+            event = await connection.next_event(settings.REALTIME_HEARTBEAT_SECONDS)
+            yield f"data: {event}\n\n"
+            if event == EXPIRED_EVENT:
+                return
+    finally:
+        notification_hub.disconnect(connection)
+
+
+async def _send_events(websocket: WebSocket, connection: Connection) -> None:
+    """Send the events of a connection, closing the socket if the client stops reading."""
+    close_code = status.WS_1013_TRY_AGAIN_LATER
+    try:
+        while True:
+            event = await connection.next_event(settings.REALTIME_HEARTBEAT_SECONDS)
+            async with asyncio.timeout(settings.REALTIME_SEND_TIMEOUT_SECONDS):
+                await websocket.send_text(event)
+            if event == EXPIRED_EVENT:
+                close_code = status.WS_1008_POLICY_VIOLATION
+                break
+    except TimeoutError:
+        pass
+    except (WebSocketDisconnect, RuntimeError):
+        # Closed while sending; the receive loop sees the disconnect
+        return
+    
+    with suppress(Exception):
+        async with asyncio.timeout(settings.REALTIME_SEND_TIMEOUT_SECONDS):
+            await websocket.close(code=close_code)
+
+
 @router.get(
     "/{notification_id}",
     response_model=NotificationResponse,
@@ -206,24 +313,15 @@ async def get_unread_count(
 )
 async def get_notification(
     notification_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Get a specific notification. User can only access their own notifications.
     """
-    query = select(Notification).where(Notification.id == notification_id)
-    result = await db.execute(query)
-    notification = result.scalar_one_or_none()
-    
-    if not notification:
-        raise NotFoundError("Notification", str(notification_id))
-    
-    # Check ownership
-    if notification.user_id != current_user.id:
-        raise AuthorizationError("You can only access your own notifications")
-    
-    return NotificationResponse.model_validate(notification)
+    notification_service = NotificationService(db)
+    notification = await notification_service.get_notification(notification_id, current_user.id)
+    return notification._asdict()
 
 
 @router.patch(
@@ -233,29 +331,14 @@ async def get_notification(
 )
 async def mark_notification_as_read(
     notification_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Mark a notification as read.
     """
-    query = select(Notification).where(Notification.id == notification_id)
-    result = await db.execute(query)
-    notification = result.scalar_one_or_none()
-    
-    if not notification:
-        raise NotFoundError("Notification", str(notification_id))
-    
-    # Check ownership
-    if notification.user_id != current_user.id:
-        raise AuthorizationError("You can only mark your own notifications as read")
-    
-    notification.read = True
-    notification.read_at = datetime.now(timezone.utc)
-    await db.commit()
-    await db.refresh(notification)
-    
-    return NotificationResponse.model_validate(notification)
+    notification_service = NotificationService(db)
+    return await notification_service.mark_as_read(notification_id, current_user.id)
 
 
 @router.post(
@@ -264,26 +347,16 @@ async def mark_notification_as_read(
     summary="Mark all notifications as read",
 )
 async def mark_all_as_read(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Mark all current user's notifications as read.
     """
-    stmt = (
-        update(Notification)
-        .where(
-            and_(
-                Notification.user_id == current_user.id,
-                Notification.read == False
-            )
-        )
-        .values(read=True, read_at=datetime.now(timezone.utc))
-    )
-    result = await db.execute(stmt)
-    await db.commit()
+    notification_service = NotificationService(db)
+    count = await notification_service.mark_all_as_read(current_user.id)
     
-    return MessageResponse(message=f"Marked {result.rowcount} notifications as read")
+    return MessageResponse(message=f"Marked {count} notifications as read")
 
 
 @router.delete(
@@ -292,22 +365,16 @@ async def mark_all_as_read(
     summary="Delete all read notifications",
 )
 async def delete_all_read_notifications(
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Delete all read notifications for current user.
     """
-    stmt = delete(Notification).where(
-        and_(
-            Notification.user_id == current_user.id,
-            Notification.read == True
-        )
-    )
-    result = await db.execute(stmt)
-    await db.commit()
+    notification_service = NotificationService(db)
+    count = await notification_service.delete_read(current_user.id)
     
-    return MessageResponse(message=f"Deleted {result.rowcount} notifications")
+    return MessageResponse(message=f"Deleted {count} notifications")
 
 
 @router.delete(
@@ -317,25 +384,16 @@ async def delete_all_read_notifications(
 )
 async def delete_my_notification(
     notification_id: UUID,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Delete a notification. User can only delete their own notifications.
-    """
-    query = select(Notification).where(Notification.id == notification_id)
-    result = await db.execute(query)
-    notification = result.scalar_one_or_none()
-    
-    if not notification:
-        raise NotFoundError("Notification", str(notification_id))
     
-    # Check ownership
-    if notification.user_id != current_user.id:
-        raise AuthorizationError("You can only delete your own notifications")
-    
-    await db.delete(notification)
-    await db.commit()
+    Deleting a broadcast hides it for the current user only.
+    """
+    notification_service = NotificationService(db)
+    await notification_service.delete_notification(notification_id, current_user.id)
     
     return MessageResponse(message="Notification deleted successfully")
 
@@ -350,96 +408,100 @@ async def delete_my_notification(
 )
 async def send_notification(
     data: SendNotificationRequest,
-    current_user: User = Depends(require_permission("notifications", "create")),
+    current_user: Principal = Depends(require_permission("notifications", "create")),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Send notification to specific users.
     
+    Recipients are validated with a single query and the notifications
+    written in bulk; IDs that match no user are listed in `unknown_ids`.
+    
     Requires `notifications:create` permission.
     """
-    notification_ids = []
-    
-    for user_id in data.user_ids:
-        # Check if user exists
-        user_query = select(User).where(User.id == user_id)
-        result = await db.execute(user_query)
-        user = result.scalar_one_or_none()
-        
-        if user:
-            notification = Notification(
-                user_id=user_id,
-                title=data.title,
-                message=data.message,
-                type=data.type,
-                priority=data.priority,
-                action_url=data.action_url,
-                metadata_={
-                    "sent_by": str(current_user.id),
-                    "sent_by_email": current_user.email,
-                },
-            )
-            db.add(notification)
-            notification_ids.append(notification.id)
+    recipient_ids = list(dict.fromkeys(data.user_ids))
     
+    result = await db.execute(
+        select(User.id).where(match_any(db, User.id, recipient_ids))
+    )
+    existing = set(result.scalars().all())
+    
+    now = datetime.now(timezone.utc)
+    metadata = {
+        "sent_by": str(current_user.id),
+        "sent_by_email": current_user.email,
+    }
+    rows = [
+        {
+            "id": uuid4(),
+            "user_id": user_id,
+            "title": data.title,
+            "message": data.message,
+            "type": data.type,
+            "priority": data.priority,
+            "read": False,
+            "read_at": None,
+            "action_url": data.action_url,
+            "metadata": metadata,
+            "created_at": now,
+        }
+        for user_id in recipient_ids
+        if user_id in existing
+    ]
+    
+    await bulk_insert(
+        db,
+        Notification.__table__,
+        rows,
+        copy_threshold=settings.NOTIFICATION_COPY_THRESHOLD,
+    )
+    if rows:
+        after_commit(db, partial(
+            notification_hub.publish,
+            notification_fields(data.title, data.message, data.type, data.priority, data.action_url, now),
+            recipients={row["user_id"]: row["id"] for row in rows},
+        ))
     await db.commit()
     
     return SendNotificationResponse(
-        sent_count=len(notification_ids),
-        notification_ids=notification_ids,
+        sent_count=len(rows),
+        notification_ids=[row["id"] for row in rows],
+        unknown_ids=[user_id for user_id in recipient_ids if user_id not in existing],
     )
 
 
 @router.post(
     "/admin/broadcast",
-    response_model=SendNotificationResponse,
+    response_model=BroadcastNotificationResponse,
     status_code=status.HTTP_201_CREATED,
     summary="Broadcast notification to all users (Admin)",
 )
 async def broadcast_notification(
     data: BroadcastNotificationRequest,
-    current_user: User = Depends(require_permission("notifications", "create")),
+    current_user: Principal = Depends(require_permission("notifications", "create")),
     db: AsyncSession = Depends(get_db),
 ):
     """
-    Broadcast notification to all active users.
+    Broadcast notification to all users.
+    
+    The broadcast is stored once and appears among the notifications of
+    every user who signed up before it, except the excluded ones.
     
     Requires `notifications:create` permission.
     """
-    # Get all active users except excluded
-    query = select(User).where(
-        and_(
-            User.status == UserStatus.ACTIVE,
-            User.id.notin_(data.exclude_user_ids) if data.exclude_user_ids else True,
-        )
-    )
-    result = await db.execute(query)
-    users = result.scalars().all()
-    
-    notification_ids = []
-    
-    for user in users:
-        notification = Notification(
-            user_id=user.id,
-            title=data.title,
-            message=data.message,
-            type=NotificationType.BROADCAST,
-            priority=data.priority,
-            action_url=data.action_url,
-            metadata_={
-                "sent_by": str(current_user.id),
-                "sent_by_email": current_user.email,
-                "is_broadcast": True,
-            },
-        )
-        db.add(notification)
-        notification_ids.append(notification.id)
-    
-    await db.commit()
-    
-    return SendNotificationResponse(
-        sent_count=len(notification_ids),
-        notification_ids=notification_ids,
+    notification_service = NotificationService(db)
+    return await notification_service.broadcast(
+        title=data.title,
+        message=data.message,
+        priority=data.priority,
+        action_url=data.action_url,
+        metadata={
+            "sent_by": str(current_user.id),
+            "sent_by_email": current_user.email,
+            "is_broadcast": True,
+        },
+        created_by=current_user.id,
+        exclude_user_ids=data.exclude_user_ids,
     )
 
 
@@ -454,7 +516,8 @@ async def list_all_notifications(
     user_id: Optional[UUID] = Query(None, description="Filter by user ID"),
     type: Optional[NotificationType] = Query(None, description="Filter by type"),
     priority: Optional[NotificationPriority] = Query(None, description="Filter by priority"),
-    current_user: User = Depends(require_permission("notifications", "read")),
+    count: Optional[CountStrategy] = Query(None, description="How the total is computed"),
+    current_user: Principal = Depends(require_permission("notifications", "read")),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -463,8 +526,8 @@ async def list_all_notifications(
     Requires `notifications:read` permission.
     """
     # Build query
-    query = select(Notification)
-    count_query = select(func.count(Notification.id))
+    query = select(*LIST_COLUMNS)
+    count_query = select(Notification.id)
     
     if user_id:
         query = query.where(Notification.user_id == user_id)
@@ -476,21 +539,22 @@ async def list_all_notifications(
         query = query.where(Notification.priority == priority)
         count_query = count_query.where(Notification.priority == priority)
     
-    # Get total count
-    total_result = await db.execute(count_query)
-    total = total_result.scalar() or 0
-    
-    # Get paginated results
+    # Get paginated results and total count concurrently
     offset = (page - 1) * page_size
     query = query.order_by(Notification.created_at.desc()).offset(offset).limit(page_size)
-    result = await db.execute(query)
-    notifications = result.scalars().all()
+    strategy = count or settings.PAGINATION_COUNT_STRATEGY
+    result, total = await gather_reads(
+        db,
+        lambda session: session.execute(query),
+        lambda session: count_total(session, count_query, strategy),
+    )
     
     return PaginatedResponse.create(
-        items=[NotificationResponse.model_validate(n) for n in notifications],
-        total=total,
+        items=[notification._asdict() for notification in result],
+        total=total.value,
         page=page,
         page_size=page_size,
+        total_is_estimate=total.is_estimate,
     )
 
 
@@ -500,7 +564,7 @@ async def list_all_notifications(
     summary="Get notification statistics (Admin)",
 )
 async def get_admin_notification_stats(
-    current_user: User = Depends(require_permission("notifications", "read")),
+    current_user: Principal = Depends(require_permission("notifications", "read")),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -549,17 +613,19 @@ async def get_admin_notification_stats(
 )
 async def admin_delete_notification(
     notification_id: UUID,
-    current_user: User = Depends(require_permission("notifications", "delete")),
+    current_user: Principal = Depends(require_permission("notifications", "delete")),
     db: AsyncSession = Depends(get_db),
 ):
     """
-    Delete any notification (Admin).
+    Delete any notification (Admin). Deleting a broadcast removes it
+    for every user.
     
     Requires `notifications:delete` permission.
     """
-    query = select(Notification).where(Notification.id == notification_id)
-    result = await db.execute(query)
-    notification = result.scalar_one_or_none()
+    # Personal notification, or a broadcast (retracted for every user)
+    notification = await db.get(Notification, notification_id)
+    if not notification:
+        notification = await db.get(BroadcastNotification, notification_id)
     
     if not notification:
         raise NotFoundError("Notification", str(notification_id))
@@ -577,7 +643,7 @@ async def admin_delete_notification(
 )
 async def admin_delete_notifications(
     notification_ids: List[UUID] = Query(..., description="List of notification IDs to delete"),
-    current_user: User = Depends(require_permission("notifications", "delete")),
+    current_user: Principal = Depends(require_permission("notifications", "delete")),
     db: AsyncSession = Depends(get_db),
 ):
     """
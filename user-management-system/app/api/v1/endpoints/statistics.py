@@ -4,8 +4,8 @@ from fastapi import APIRouter, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import get_db
-from app.core.dependencies import get_current_user, require_permission
-from app.models.user import User
+from app.core.dependencies import require_permission
+from app.core.principal import Principal
 from app.services.statistics_service import StatisticsService
 from app.schemas.statistics import DashboardStatistics
 
@@ -19,7 +19,7 @@ router = APIRouter(prefix="/statistics", tags=["Statistics"])
     summary="Get dashboard statistics",
 )
 async def get_dashboard_statistics(
-    current_user: User = Depends(require_permission("users", "read")),
+    current_user: Principal = Depends(require_permission("users", "read")),
     db: AsyncSession = Depends(get_db),
 ):
     """
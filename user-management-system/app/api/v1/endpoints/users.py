@@ -1,33 +1,96 @@
 """User API endpoints."""
 
-from typing import Optional
+import csv
+import io
+import json
+import tempfile
+from enum import Enum
+from typing import AsyncIterator, Literal, Optional, Sequence
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, Query, status
+from fastapi import APIRouter, BackgroundTasks, Depends, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import Row
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.database import get_db
 from app.core.dependencies import (
+    current_user_etag,
+    get_current_principal,
     get_current_user,
     require_permission,
     require_role,
 )
-from app.core.exceptions import NotFoundError
+from app.core.counting import CountStrategy
+from app.core.etag import conditional_get
+from app.core.exceptions import BadRequestError, NotFoundError, PayloadTooLargeError
+from app.core.jobs import job_store
+from app.core.pagination import Cursor
+from app.core.principal import Principal
+from app.core.serialization import FastJSONRoute
 from app.models.user import User
 from app.models.enums import UserStatus
-from app.services.user_service import UserService
+from app.services.import_service import IMPORT_FORMATS, UserImportService
+from app.services.user_service import EXPORT_COLUMNS, UserService
 from app.schemas.user import (
     UserCreate,
     UserUpdate,
     UserUpdateAdmin,
     UserResponse,
     UserWithRoles,
+    UserImportJobResponse,
     PasswordChange,
+    BulkUserIds,
+    BulkStatusUpdate,
+    BulkRoleUpdate,
+    BulkOperationResponse,
 )
 from app.schemas.base import MessageResponse, PaginatedResponse
 
 
-router = APIRouter(prefix="/users", tags=["Users"])
+router = APIRouter(prefix="/users", tags=["Users"], route_class=FastJSONRoute)
+
+EXPORT_FIELDS = [column.key for column in EXPORT_COLUMNS]
+
+
+async def _user_version(
+    user_id: UUID,
+    db: AsyncSession = Depends(get_db),
+) -> Optional[Row]:
+    return await UserService(db).get_version(user_id)
+
+
+# Conditional GET for /users/{user_id}
+user_etag = conditional_get(_user_version)
+
+
+def _export_value(value):
+    if isinstance(value, Enum):
+        return value.value
+    if value is None or isinstance(value, (str, int, bool)):
+        return value
+    return value.isoformat() if hasattr(value, "isoformat") else str(value)
+
+
+async def _export_csv(batches: AsyncIterator[Sequence[Row]]) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    async for rows in batches:
+        writer.writerows([_export_value(value) for value in row] for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+async def _export_ndjson(batches: AsyncIterator[Sequence[Row]]) -> AsyncIterator[str]:
+    async for rows in batches:
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_FIELDS, map(_export_value, row)))) + "\n"
+            for row in rows
+        )
 
 
 @router.get(
@@ -38,29 +101,58 @@ router = APIRouter(prefix="/users", tags=["Users"])
 async def list_users(
     page: int = Query(1, ge=1, description="Page number"),
     page_size: int = Query(20, ge=1, le=100, description="Items per page"),
+    cursor: Optional[str] = Query(None, description="Cursor from next_cursor/prev_cursor (replaces page)"),
     search: Optional[str] = Query(None, description="Search in email, username, name"),
     status: Optional[UserStatus] = Query(None, description="Filter by status"),
-    current_user: User = Depends(require_permission("users", "read")),
+    count: Optional[CountStrategy] = Query(None, description="How the total is computed"),
+    current_user: Principal = Depends(require_permission("users", "read")),
     db: AsyncSession = Depends(get_db),
 ):
     """
     List all users with pagination and filters.
     
+    Pass `cursor` from a previous response instead of `page` for
+    keyset pagination, which costs the same for every page. Searches
+    ordered by relevance return no cursors.
+    
     Requires `users:read` permission.
     """
     user_service = UserService(db)
-    users, total = await user_service.list_users(
-        page=page,
-        page_size=page_size,
-        search=search,
-        status=status,
-    )
+    
+    if cursor:
+        users, total, next_cursor, prev_cursor = await user_service.list_users_by_cursor(
+            cursor=Cursor.decode(cursor),
+            page_size=page_size,
+            search=search,
+            status=status,
+            count_strategy=count or settings.PAGINATION_COUNT_STRATEGY,
+        )
+        page = None
+    else:
+        users, total = await user_service.list_users(
+            page=page,
+            page_size=page_size,
+            search=search,
+            status=status,
+            count_strategy=count or settings.PAGINATION_COUNT_STRATEGY,
+        )
+        # Cursors let clients switch from page numbers to keyset pagination,
+        # unless the page is in relevance order rather than keyset order
+        next_cursor = prev_cursor = None
+        if users and not user_service.is_relevance_ordered(search):
+            if page * page_size < total.value:
+                next_cursor = Cursor(users[-1].created_at, users[-1].id, "next")
+            if page > 1:
+                prev_cursor = Cursor(users[0].created_at, users[0].id, "prev")
     
     return PaginatedResponse.create(
-        items=[UserResponse.model_validate(u) for u in users],
-        total=total,
+        items=[user._asdict() for user in users],
+        total=total.value,
         page=page,
         page_size=page_size,
+        next_cursor=next_cursor.encode() if next_cursor else None,
+        prev_cursor=prev_cursor.encode() if prev_cursor else None,
+        total_is_estimate=total.is_estimate,
     )
 
 
@@ -72,7 +164,7 @@ async def list_users(
 )
 async def create_user(
     data: UserCreate,
-    current_user: User = Depends(require_permission("users", "create")),
+    current_user: Principal = Depends(require_permission("users", "create")),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -85,16 +177,222 @@ async def create_user(
     return user
 
 
+@router.post(
+    "/import",
+    response_model=UserImportJobResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Import users",
+)
+async def import_users(
+    request: Request,
+    background_tasks: BackgroundTasks,
+    current_user: Principal = Depends(require_permission("users", "create")),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Create users in bulk from a CSV or NDJSON request body.
+    
+    Send the file as the raw body with Content-Type `text/csv` (with a
+    header row) or `application/x-ndjson`. Columns match the fields of
+    `POST /users`. The import runs in the background; poll
+    `GET /users/import/{job_id}` for progress and per-row errors.
+    
+    Requires `users:create` permission.
+    """
+    content_type = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    import_format = IMPORT_FORMATS.get(content_type)
+    if import_format is None:
+        raise BadRequestError("Content-Type must be text/csv or application/x-ndjson")
+    
+    # Spool the upload so large files spill to disk instead of memory
+    source = tempfile.SpooledTemporaryFile(max_size=settings.IMPORT_SPOOL_MEMORY_BYTES)
+    size = 0
+    async for chunk in request.stream():
+        size += len(chunk)
+        if size > settings.IMPORT_MAX_BYTES:
+            source.close()
+            raise PayloadTooLargeError(f"Import file exceeds {settings.IMPORT_MAX_BYTES} bytes")
+        source.write(chunk)
+    source.seek(0)
+    
+    job = await job_store.create(
+        "user_import",
+        current_user.id,
+        format=import_format,
+        processed=0,
+        created=0,
+        failed=0,
+        errors=[],
+        errors_truncated=False,
+    )
+    background_tasks.add_task(UserImportService(db.bind).run, job, source)
+    return job
+
+
+@router.get(
+    "/import/{job_id}",
+    response_model=UserImportJobResponse,
+    summary="Get user import progress",
+)
+async def get_import_job(
+    job_id: UUID,
+    current_user: Principal = Depends(require_permission("users", "create")),
+):
+    """
+    Get the progress and error report of an import started by the current user.
+    
+    Requires `users:create` permission.
+    """
+    job = await job_store.get(str(job_id))
+    if not job or job["kind"] != "user_import" or job["owner_id"] != str(current_user.id):
+        raise NotFoundError("Import job", str(job_id))
+    return job
+
+
+@router.get(
+    "/export",
+    summary="Export users",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"text/csv": {}, "application/x-ndjson": {}}}},
+)
+async def export_users(
+    format: Literal["csv", "ndjson"] = Query("csv", description="Output format"),
+    search: Optional[str] = Query(None, description="Search in email, username, name"),
+    status: Optional[UserStatus] = Query(None, description="Filter by status"),
+    include_deleted: bool = Query(False, description="Include soft-deleted users"),
+    current_user: Principal = Depends(require_permission("users", "read")),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Export all users matching the filters as CSV or NDJSON.
+    
+    Rows are streamed from a server-side cursor in creation order, so
+    exports of any size use constant memory.
+    
+    Requires `users:read` permission.
+    """
+    batches = UserService(db).export_users(
+        search=search,
+        status=status,
+        include_deleted=include_deleted,
+    )
+    
+    if format == "csv":
+        body, media_type = _export_csv(batches), "text/csv"
+    else:
+        body, media_type = _export_ndjson(batches), "application/x-ndjson"
+    
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="users.{format}"'},
+    )
+
+
+@router.post(
+    "/bulk/status",
+    response_model=BulkOperationResponse,
+    summary="Change status of many users",
+)
+async def bulk_update_status(
+    data: BulkStatusUpdate,
+    current_user: Principal = Depends(require_permission("users", "update")),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Set the status of up to 5000 users in one statement.
+    
+    Deleted users are reported as `not_found`.
+    
+    Requires `users:update` permission.
+    """
+    user_service = UserService(db)
+    outcomes = await user_service.bulk_update_status(data.user_ids, data.status)
+    return BulkOperationResponse.create(outcomes)
+
+
+@router.post(
+    "/bulk/delete",
+    response_model=BulkOperationResponse,
+    summary="Soft delete many users",
+)
+async def bulk_delete(
+    data: BulkUserIds,
+    current_user: Principal = Depends(require_permission("users", "delete")),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Soft delete up to 5000 users in one statement.
+    
+    Requires `users:delete` permission.
+    """
+    user_service = UserService(db)
+    outcomes = await user_service.bulk_delete(data.user_ids)
+    return BulkOperationResponse.create(outcomes)
+
+
+@router.post(
+    "/bulk/restore",
+    response_model=BulkOperationResponse,
+    summary="Restore many deleted users",
+)
+async def bulk_restore(
+    data: BulkUserIds,
+    current_user: Principal = Depends(require_permission("users", "update")),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Restore up to 5000 soft-deleted users in one statement.
+    
+    Requires `users:update` permission.
+    """
+    user_service = UserService(db)
+    outcomes = await user_service.bulk_restore(data.user_ids)
+    return BulkOperationResponse.create(outcomes)
+
+
+@router.post(
+    "/bulk/roles",
+    response_model=BulkOperationResponse,
+    summary="Assign or remove a role for many users",
+)
+async def bulk_update_roles(
+    data: BulkRoleUpdate,
+    current_user: Principal = Depends(require_permission("users", "manage")),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Assign a role to, or remove it from, up to 5000 users in one statement.
+    
+    Requires `users:manage` permission.
+    """
+    user_service = UserService(db)
+    if data.action == "assign":
+        outcomes = await user_service.bulk_assign_role(
+            data.user_ids,
+            data.role_id,
+            assigned_by=current_user.id,
+            expires_at=data.expires_at,
+        )
+    else:
+        outcomes = await user_service.bulk_remove_role(data.user_ids, data.role_id)
+    return BulkOperationResponse.create(outcomes)
+
+
 @router.get(
     "/me",
     response_model=UserWithRoles,
     summary="Get current user",
 )
 async def get_current_user_profile(
+    etag: Optional[str] = Depends(current_user_etag),
     current_user: User = Depends(get_current_user),
 ):
     """
     Get current authenticated user with roles.
+    
+    Supports If-None-Match: an unchanged profile is answered with
+    304 Not Modified without loading the user.
     """
     return current_user
 
@@ -106,7 +404,7 @@ async def get_current_user_profile(
 )
 async def update_current_user(
     data: UserUpdate,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -128,7 +426,7 @@ async def update_current_user(
 )
 async def change_password(
     data: PasswordChange,
-    current_user: User = Depends(get_current_user),
+    current_user: Principal = Depends(get_current_principal),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -146,13 +444,15 @@ async def change_password(
 )
 async def get_user(
     user_id: UUID,
-    current_user: User = Depends(require_permission("users", "read")),
+    current_user: Principal = Depends(require_permission("users", "read")),
+    etag: Optional[str] = Depends(user_etag),
     db: AsyncSession = Depends(get_db),
 ):
     """
     Get user by ID.
     
-    Requires `users:read` permission.
+    Requires `users:read` permission. Supports If-None-Match: an
+    unchanged user is answered with 304 Not Modified without loading it.
     """
     user_service = UserService(db)
     user = await user_service.get_by_id(user_id)
@@ -169,7 +469,7 @@ async def get_user(
 async def update_user(
     user_id: UUID,
     data: UserUpdateAdmin,
-    current_user: User = Depends(require_permission("users", "update")),
+    current_user: Principal = Depends(require_permission("users", "update")),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -194,7 +494,7 @@ async def update_user(
 async def delete_user(
     user_id: UUID,
     hard_delete: bool = Query(False, description="Permanently delete"),
-    current_user: User = Depends(require_permission("users", "delete")),
+    current_user: Principal = Depends(require_permission("users", "delete")),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -218,7 +518,7 @@ async def delete_user(
 )
 async def restore_user(
     user_id: UUID,
-    current_user: User = Depends(require_permission("users", "update")),
+    current_user: Principal = Depends(require_permission("users", "update")),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -239,7 +539,7 @@ async def restore_user(
 async def assign_role(
     user_id: UUID,
     role_id: UUID,
-    current_user: User = Depends(require_permission("users", "manage")),
+    current_user: Principal = Depends(require_permission("users", "manage")),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -264,7 +564,7 @@ async def assign_role(
 async def remove_role(
     user_id: UUID,
     role_id: UUID,
-    current_user: User = Depends(require_permission("users", "manage")),
+    current_user: Principal = Depends(require_permission("users", "manage")),
     db: AsyncSession = Depends(get_db),
 ):
     """
@@ -0,0 +1,75 @@
+"""Write-behind buffer for session activity and last-login timestamps."""
+
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Dict
+
+from app.core.config import settings
+from app.core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+SESSION_ACTIVITY_KEY = "activity:sessions"
+USER_LOGIN_KEY = "activity:logins"
+
+
+class ActivityBuffer:
+    """
+    Buffers hot timestamp writes in Redis hashes.
+    
+    Session last_activity and user last_login_at are recorded as
+    id -> Unix timestamp and written back in batches by the
+    flush_activity Celery task, so logins and refreshes do not rewrite
+    the sessions/users rows. Callers write directly to the database
+    when the buffer is disabled or Redis is unavailable.
+    """
+    
+    @property
+    def enabled(self) -> bool:
+        return settings.ACTIVITY_BUFFER_ENABLED and redis_client.is_connected
+    
+    async def _record(self, key: str, entity_id: uuid.UUID, at: datetime) -> None:
+        try:
+            await redis_client.hset(key, str(entity_id), str(at.timestamp()))
+        except Exception as e:
+            logger.warning(f"Failed to buffer activity for {entity_id}: {e}")
+    
+    async def record_session_activity(self, session_id: uuid.UUID, at: datetime) -> None:
+        """Buffer a session's last activity time."""
+        await self._record(SESSION_ACTIVITY_KEY, session_id, at)
+    
+    async def record_login(self, user_id: uuid.UUID, at: datetime) -> None:
+        """Buffer a user's last login time."""
+        await self._record(USER_LOGIN_KEY, user_id, at)
+    
+    async def drain(self, key: str) -> Dict[uuid.UUID, datetime]:
+        """
+        Take all buffered timestamps from a hash.
+        
+        The hash is first renamed so writes arriving during the flush
+        go to a fresh hash. A batch left behind by a failed flush is
+        drained before taking a new one.
+        """
+        client = redis_client.client
+        flushing_key = f"{key}:flushing"
+        
+        if not await client.exists(flushing_key):
+            if not await client.exists(key):
+                return {}
+            await client.rename(key, flushing_key)
+        
+        raw = await client.hgetall(flushing_key)
+        return {
+            uuid.UUID(entity_id): datetime.fromtimestamp(float(ts), tz=timezone.utc)
+            for entity_id, ts in raw.items()
+        }
+    
+    async def ack(self, key: str) -> None:
+        """Discard a drained batch once it has been written."""
+        await redis_client.client.delete(f"{key}:flushing")
+
+
+# Global activity buffer instance
+activity_buffer = ActivityBuffer()
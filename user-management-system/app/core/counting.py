@@ -0,0 +1,122 @@
+"""Total-count strategies for paginated listings."""
+
+import hashlib
+import logging
+from dataclasses import dataclass
+from enum import Enum
+
+from sqlalchemy import Select, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from app.core.config import settings
+from app.core.database import is_postgresql
+from app.core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+COUNT_CACHE_PREFIX = "count:"
+
+
+class CountStrategy(str, Enum):
+    """How the total of a paginated listing is computed."""
+    
+    EXACT = "exact"  # count(*) on every request
+    ESTIMATE = "estimate"  # planner row estimate, exact below a threshold
+    CACHED = "cached"  # exact count cached in Redis per filter set
+
+
+@dataclass(frozen=True)
+class Total:
+    """Total row count of a listing."""
+    
+    value: int
+    is_estimate: bool = False
+
+
+async def _exact(db: AsyncSession, query: Select) -> int:
+    result = await db.execute(select(func.count()).select_from(query.subquery()))
+    return result.scalar() or 0
+
+
+class Explain(Executable, ClauseElement):
+    """EXPLAIN (FORMAT JSON) of a query, with its parameters still bound."""
+    
+    inherit_cache = False
+    
+    def __init__(self, query: Select):
+        self.query = query
+
+
+@compiles(Explain, "postgresql")
+def _compile_explain(element: Explain, compiler, **kw) -> str:
+    # Compiled as a nested statement, so the query's columns are not used
+    # to type the plan that EXPLAIN returns
+    compiler.stack.append({"correlate_froms": set(), "asfrom_froms": set(), "selectable": element})
+    try:
+        return f"EXPLAIN (FORMAT JSON) {compiler.process(element.query, **kw)}"
+    finally:
+        compiler.stack.pop()
+
+
+async def _estimate(db: AsyncSession, query: Select) -> Total:
+    result = await db.execute(Explain(query))
+    plan = result.scalar()
+    estimate = int(plan[0]["Plan"]["Plan Rows"])
+    
+    # Planner estimates are unreliable for small results, which are cheap to count
+    if estimate < settings.COUNT_ESTIMATE_THRESHOLD:
+        return Total(await _exact(db, query))
+    return Total(estimate, is_estimate=True)
+
+
+async def _cached(db: AsyncSession, query: Select) -> Total:
+    compiled = query.compile(dialect=db.bind.dialect)
+    params = sorted(compiled.params.items())
+    digest = hashlib.sha256(f"{compiled}|{params!r}".encode()).hexdigest()
+    key = f"{COUNT_CACHE_PREFIX}{digest}"
+    
+    try:
+        cached = await redis_client.get(key)
+        if cached is not None:
+            return Total(int(cached), is_estimate=True)
+    except Exception as e:
+        logger.warning(f"Count cache read failed: {e}")
+    
+    value = await _exact(db, query)
+    try:
+        await redis_client.set(key, str(value), expire=settings.COUNT_CACHE_TTL_SECONDS)
+    except Exception as e:
+        logger.warning(f"Count cache write failed: {e}")
+    return Total(value)
+
+
+async def count_total(
+    db: AsyncSession,
+    query: Select,
+    strategy: CountStrategy = CountStrategy.EXACT,
+) -> Total:
+    """
+    Count the rows a listing query would return.
+    
+    Estimates and cached counts are flagged with is_estimate; cached
+    counts may be up to COUNT_CACHE_TTL_SECONDS stale. Strategies that
+    need PostgreSQL or Redis fall back to an exact count without them.
+    
+    Args:
+        db: Database session
+        query: Filtered SELECT of the listed rows (without ordering or limit)
+        strategy: Count strategy
+    
+    Returns:
+        Total row count
+    """
+    if strategy == CountStrategy.ESTIMATE and is_postgresql(db):
+        return await _estimate(db, query)
+    
+    if strategy == CountStrategy.CACHED and redis_client.is_connected:
+        return await _cached(db, query)
+    
+    return Total(await _exact(db, query))
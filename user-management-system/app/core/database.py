@@ -1,21 +1,27 @@
 """Database connection and session management."""
 
+import asyncio
 import logging
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Awaitable, Callable, Dict, List, Optional, Sequence
 
 from sqlalchemy.ext.asyncio import (
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
-from sqlalchemy import text, event
-from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy import ColumnElement, Table, any_, bindparam, event, insert, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Dialect
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 
 from app.core.config import settings
 from app.models.base import Base
 
 logger = logging.getLogger(__name__)
 
+# Bind parameters per multi-row INSERT (PostgreSQL allows at most 32767)
+MAX_INSERT_PARAMS = 30000
+
 
 # Create async engine with production-ready settings
 engine = create_async_engine(
@@ -58,16 +64,207 @@ async def get_db() -> AsyncGenerator[AsyncSession, None]:
             await session.commit()
         except SQLAlchemyError as e:
             logger.error(f"Database error, rolling back: {type(e).__name__}")
+            session.info.pop(AFTER_COMMIT_KEY, None)
             await session.rollback()
             raise
         except Exception as e:
             logger.error(f"Unexpected error, rolling back: {type(e).__name__}")
+            session.info.pop(AFTER_COMMIT_KEY, None)
             await session.rollback()
             raise
+        else:
+            await run_after_commit_hooks(session)
         finally:
             await session.close()
 
 
+# Key in Session.info holding callbacks to run once the request commits
+AFTER_COMMIT_KEY = "after_commit_hooks"
+
+
+def after_commit(
+    session: AsyncSession,
+    callback: Callable[[], Awaitable[None]],
+) -> None:
+    """
+    Schedule an async callback to run after the request transaction commits.
+    
+    Used to keep caches in sync with the database without publishing
+    state that may still be rolled back. Callbacks are dropped on rollback.
+    """
+    session.info.setdefault(AFTER_COMMIT_KEY, []).append(callback)
+
+
+async def run_after_commit_hooks(session: AsyncSession) -> None:
+    """Run (and clear) callbacks scheduled with after_commit."""
+    hooks = session.info.pop(AFTER_COMMIT_KEY, [])
+    for hook in hooks:
+        try:
+            await hook()
+        except Exception as e:
+            logger.warning(f"After-commit hook failed: {type(e).__name__}: {e}")
+
+
+def is_postgresql(session: AsyncSession) -> bool:
+    """Check if a session is bound to PostgreSQL (vs. the SQLite test setup)."""
+    return session.bind.dialect.name == "postgresql"
+
+
+def match_any(session: AsyncSession, column: ColumnElement, values: Sequence[Any]) -> ColumnElement:
+    """
+    Build a `column = ANY(:values)` condition.
+    
+    On PostgreSQL the values travel as a single array parameter, so the
+    statement text (and its cached plan) is the same for any number of
+    values and large batches stay clear of the bind parameter limit.
+    Elsewhere this is a plain IN.
+    """
+    if is_postgresql(session):
+        return column == any_(bindparam(None, list(values), type_=postgresql.ARRAY(column.type)))
+    return column.in_(values)
+
+
+async def bulk_insert(
+    session: AsyncSession,
+    table: Table,
+    rows: Sequence[Dict[str, Any]],
+    copy_threshold: Optional[int] = None,
+) -> None:
+    """
+    Insert rows (dicts keyed by column name, all with the same keys).
+    
+    Rows are written with multi-row INSERT statements, as many rows per
+    statement as MAX_INSERT_PARAMS allows. On PostgreSQL, from
+    copy_threshold rows up they are streamed with COPY instead, after
+    going through the columns' bind processing. Column defaults do not
+    apply on either path; pass every value.
+    """
+    if not rows:
+        return
+    
+    columns = list(rows[0])
+    
+    if copy_threshold is not None and len(rows) >= copy_threshold and is_postgresql(session):
+        dialect = session.bind.dialect
+        processors = [
+            table.c[column].type.dialect_impl(dialect).bind_processor(dialect)
+            for column in columns
+        ]
+        records = [
+            tuple(
+                process(row[column]) if process else row[column]
+                for column, process in zip(columns, processors)
+            )
+            for row in rows
+        ]
+        conn = await session.connection()
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            table.name,
+            records=records,
+            columns=columns,
+        )
+        return
+    
+    per_statement = max(1, MAX_INSERT_PARAMS // len(columns))
+    for start in range(0, len(rows), per_statement):
+        await session.execute(insert(table).values(list(rows[start:start + per_statement])))
+
+
+def dialect_insert(dialect: Dialect, table: Any):
+    """Get the dialect's INSERT construct for a table or mapped class, which supports ON CONFLICT clauses."""
+    if dialect.name == "postgresql":
+        return postgresql.insert(table)
+    return sqlite.insert(table)
+
+
+def unique_violation_column(error: IntegrityError, table: Table) -> Optional[str]:
+    """
+    Find which unique column of a table an IntegrityError was raised for.
+    
+    Matches the index or constraint name (PostgreSQL) or the
+    "table.column" reference (SQLite) in the driver's error message.
+    Only single-column unique keys are recognised.
+    
+    Returns:
+        Column name, or None if the error is not a known unique violation
+    """
+    message = str(error.orig)
+    
+    for index in table.indexes:
+        if index.unique and len(index.columns) == 1 and f'"{index.name}"' in message:
+            return next(iter(index.columns)).name
+    
+    for column in table.columns:
+        if column.unique and (
+            f'"{table.name}_{column.name}_key"' in message
+            or f"{table.name}.{column.name}" in message
+        ):
+            return column.name
+    
+    return None
+
+
+# Worker-wide cap on extra connections taken by gather_reads
+_parallel_read_slots = asyncio.Semaphore(settings.DB_PARALLEL_READ_CONNECTIONS)
+
+
+async def gather_reads(
+    session: AsyncSession,
+    *reads: Callable[[AsyncSession], Awaitable[Any]],
+) -> List[Any]:
+    """
+    Run independent read queries concurrently and gather their results.
+    
+    The first read runs on the given session; the others run on their
+    own pooled connections, each in a separate snapshot that does not
+    see the session's uncommitted changes. A request never takes more
+    than DB_PARALLEL_READS_PER_REQUEST - 1 extra connections, and the
+    worker as a whole no more than DB_PARALLEL_READ_CONNECTIONS; reads
+    that cannot get a connection slot without waiting run sequentially
+    on the given session instead. Non-PostgreSQL databases always run
+    sequentially.
+    
+    Args:
+        session: Request session
+        reads: Callables taking a session and returning an awaitable
+        
+    Returns:
+        Results in the order of reads
+    """
+    if len(reads) < 2 or not is_postgresql(session):
+        return [await read(session) for read in reads]
+    
+    extra = min(len(reads) - 1, settings.DB_PARALLEL_READS_PER_REQUEST - 1)
+    slots = 0
+    while slots < extra and not _parallel_read_slots.locked():
+        await _parallel_read_slots.acquire()
+        slots += 1
+    
+    async def run_on_own_connection(read):
+        async with AsyncSession(bind=session.bind, expire_on_commit=False) as own:
+            return await read(own)
+    
+    try:
+        results = await asyncio.gather(
+            reads[0](session),
+            *(run_on_own_connection(read) for read in reads[1:1 + slots]),
+            return_exceptions=True,
+        )
+    finally:
+        for _ in range(slots):
+            _parallel_read_slots.release()
+    
+    for result in results:
+        if isinstance(result, BaseException):
+            raise result
+    
+    results = list(results)
+    for read in reads[1 + slots:]:
+        results.append(await read(session))
+    return results
+
+
 async def init_db() -> None:
     """Create all database tables."""
     async with engine.begin() as conn:
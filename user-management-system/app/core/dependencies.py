@@ -1,16 +1,26 @@
 """FastAPI dependencies for authentication and authorization."""
 
-from typing import Optional
+from dataclasses import dataclass
+from functools import lru_cache
+from ipaddress import IPv4Network, IPv6Network, ip_address, ip_network
+from typing import Optional, Tuple
 import uuid
 
-from fastapi import Depends, Request
+from fastapi import Depends, Query, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy import select
+from fastapi.requests import HTTPConnection
+from sqlalchemy import Row, select
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload
 
+from app.core.config import settings
 from app.core.database import get_db
-from app.core.security import decode_token, hash_token
+from app.core.etag import conditional_get
+from app.core.permissions import permission_engine
+from app.core.principal import Principal, principal_cache
+from app.core.revocation import revocation_list
+from app.core.security import decode_token
+from app.core.session_cache import session_cache
 from app.core.exceptions import (
     AuthenticationError,
     AuthorizationError,
@@ -22,6 +32,7 @@ from app.core.exceptions import (
 from app.models.user import User
 from app.models.session import Session
 from app.models.enums import UserStatus
+from app.services.user_service import UserService
 
 
 # HTTP Bearer token security scheme
@@ -79,20 +90,115 @@ async def get_current_user_optional(
     return user
 
 
-async def get_current_user(
+async def verify_session_active(
+    db: AsyncSession,
+    session_id: uuid.UUID,
+    user_id: uuid.UUID,
+) -> None:
+    """
+    Verify that a session is neither revoked nor expired.
+    
+    Served from the session cache when warm; falls back to the
+    sessions table and populates the cache on a miss.
+    
+    Raises:
+        SessionRevokedError: If session is revoked, expired or unknown
+    """
+    cached = await session_cache.get(session_id)
+    if cached is not None:
+        if not cached.is_active or cached.user_id != user_id:
+            raise SessionRevokedError()
+        return
+    
+    result = await db.execute(
+        select(Session).where(Session.id == session_id)
+    )
+    session = result.scalar_one_or_none()
+    
+    if not session:
+        raise SessionRevokedError()
+    
+    await session_cache.store(session)
+    
+    if not session.is_active or session.user_id != user_id:
+        raise SessionRevokedError()
+
+
+async def get_current_principal(
     request: Request,
     credentials: Optional[HTTPAuthorizationCredentials] = Depends(security),
     db: AsyncSession = Depends(get_db),
-) -> User:
+) -> Principal:
     """
-    Get current user from JWT token (required).
+    Get authorization snapshot of the current user from JWT token (required).
     
     Raises AuthenticationError if not authenticated.
     """
     if not credentials:
         raise AuthenticationError("Missing authentication token")
     
-    token = credentials.credentials
+    return await authenticate_token(credentials.credentials, db)
+
+
+@dataclass(frozen=True)
+class StreamCredentials:
+    """Principal of a WebSocket or event stream, with the claims that end it."""
+    
+    principal: Principal
+    session_id: Optional[uuid.UUID]
+    expires_at: Optional[float]  # Unix timestamp of the access token's exp
+
+
+async def get_stream_credentials(
+    connection: HTTPConnection,
+    token: Optional[str] = Query(None, description="Access token, for clients that cannot set headers"),
+    db: AsyncSession = Depends(get_db),
+) -> StreamCredentials:
+    """
+    Authenticate the user opening a WebSocket or event stream.
+    
+    Browsers cannot set headers on WebSocket and EventSource requests,
+    so the access token may also be passed as the `token` query parameter.
+    The token's session and expiry are returned so the stream can be
+    ended when the token expires or the session is revoked.
+    
+    Raises AuthenticationError if not authenticated.
+    """
+    scheme, _, credentials = connection.headers.get("authorization", "").partition(" ")
+    if scheme.lower() == "bearer" and credentials:
+        token = credentials
+    
+    if not token:
+        raise AuthenticationError("Missing authentication token")
+    
+    principal = await authenticate_token(token, db)
+    
+    # Served from the verified token cache
+    payload = decode_token(token) or {}
+    try:
+        session_id = uuid.UUID(payload["session_id"])
+    except (KeyError, TypeError, ValueError):
+        session_id = None
+    exp = payload.get("exp")
+    
+    return StreamCredentials(
+        principal=principal,
+        session_id=session_id,
+        expires_at=float(exp) if isinstance(exp, (int, float)) else None,
+    )
+
+
+async def authenticate_token(token: str, db: AsyncSession) -> Principal:
+    """
+    Get authorization snapshot of the user of an access token.
+    
+    Served from the session and principal caches when warm, so most
+    requests are authenticated without querying the database. With
+    STATELESS_ACCESS_TOKENS, the session is checked against the
+    in-memory revocation denylist instead of the sessions table.
+    
+    Raises AuthenticationError if the token is not valid.
+    """
     payload = decode_token(token)
     
     if not payload:
@@ -117,23 +223,50 @@ async def get_current_user(
     if session_id:
         try:
             session_uuid = uuid.UUID(session_id)
-            result = await db.execute(
-                select(Session)
-                .where(Session.id == session_uuid)
-                .where(Session.revoked == False)
-            )
-            session = result.scalar_one_or_none()
-            
-            if not session or not session.is_active:
-                raise SessionRevokedError()
         except ValueError:
-            pass
+            session_uuid = None
+        
+        if session_uuid:
+            if settings.STATELESS_ACCESS_TOKENS and revocation_list.is_ready:
+                # Trust the token; only check the revocation denylist
+                if revocation_list.is_revoked(session_uuid):
+                    raise SessionRevokedError()
+            else:
+                await verify_session_active(db, session_uuid, user_uuid)
     
-    # Get user from database
+    principal = await principal_cache.get(db, user_uuid)
+    
+    if not principal or principal.is_deleted:
+        raise AuthenticationError("User not found")
+    
+    if principal.status == UserStatus.LOCKED:
+        raise AuthenticationError("User account is locked")
+    
+    if principal.status == UserStatus.SUSPENDED:
+        raise AuthenticationError("User account is suspended")
+    
+    if principal.status != UserStatus.ACTIVE:
+        raise UserInactiveError()
+    
+    return principal
+
+
+async def get_current_user(
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db),
+) -> User:
+    """
+    Get current user ORM object (required).
+    
+    Use get_current_principal instead when only the user's identity,
+    roles or permissions are needed.
+    
+    Raises AuthenticationError if not authenticated.
+    """
     result = await db.execute(
         select(User)
         .options(selectinload(User.roles))
-        .where(User.id == user_uuid)
+        .where(User.id == principal.id)
         .where(User.deleted_at.is_(None))
     )
     user = result.scalar_one_or_none()
@@ -141,15 +274,6 @@ async def get_current_user(
     if not user:
         raise AuthenticationError("User not found")
     
-    if user.status == UserStatus.LOCKED:
-        raise AuthenticationError("User account is locked")
-    
-    if user.status == UserStatus.SUSPENDED:
-        raise AuthenticationError("User account is suspended")
-    
-    if user.status != UserStatus.ACTIVE:
-        raise UserInactiveError()
-    
     return user
 
 
@@ -162,8 +286,26 @@ async def get_current_active_user(
     return current_user
 
 
+async def get_current_user_version(
+    principal: Principal = Depends(get_current_principal),
+    db: AsyncSession = Depends(get_db),
+) -> Optional[Row]:
+    """Get the version of the current user, without loading it."""
+    return await UserService(db).get_version(principal.id)
+
+
+# Conditional GET for the current user's profile
+current_user_etag = conditional_get(get_current_user_version)
+
+
 class PermissionChecker:
-    """Dependency for checking user permissions."""
+    """
+    Dependency for checking user permissions.
+    
+    Resolved against the compiled permission engine: the user's
+    unexpired roles (including inherited parent roles) are reduced to a
+    bitmask and tested against the permission's bits with a single AND.
+    """
     
     def __init__(self, resource: str, action: str):
         self.resource = resource
@@ -171,14 +313,13 @@ class PermissionChecker:
     
     async def __call__(
         self,
-        current_user: User = Depends(get_current_user),
-    ) -> User:
+        current_user: Principal = Depends(get_current_principal),
+        db: AsyncSession = Depends(get_db),
+    ) -> Principal:
         """Check if user has required permission."""
-        # Check if user has the permission through any of their roles
-        for role in current_user.roles:
-            for permission in role.permissions:
-                if permission.resource == self.resource and permission.action.value == self.action:
-                    return current_user
+        compiled = await permission_engine.get(db)
+        if compiled.allows(current_user.active_role_ids(), self.resource, self.action):
+            return current_user
         
         raise AuthorizationError(
             f"Permission denied: {self.action} on {self.resource}"
@@ -198,12 +339,10 @@ class RoleChecker:
     
     async def __call__(
         self,
-        current_user: User = Depends(get_current_user),
-    ) -> User:
+        current_user: Principal = Depends(get_current_principal),
+    ) -> Principal:
         """Check if user has any of the required roles."""
-        user_role_names = {role.name for role in current_user.roles}
-        
-        if not any(role in user_role_names for role in self.required_roles):
+        if not current_user.has_any_role(*self.required_roles):
             raise AuthorizationError(
                 f"Required role: {' or '.join(self.required_roles)}"
             )
@@ -216,22 +355,53 @@ def require_role(*roles: str) -> RoleChecker:
     return RoleChecker(*roles)
 
 
+@lru_cache(maxsize=4)
+def _trusted_networks(proxies: str) -> Tuple[IPv4Network | IPv6Network, ...]:
+    return tuple(
+        ip_network(proxy.strip(), strict=False)
+        for proxy in proxies.split(",") if proxy.strip()
+    )
+
+
+def _is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ip_address(host)
+    except ValueError:
+        return False
+    return any(address in network for network in _trusted_networks(settings.TRUSTED_PROXIES))
+
+
 def get_client_ip(request: Request) -> str:
-    """Get client IP address from request."""
-    # Check for forwarded headers (behind proxy)
+    """
+    Get client IP address from request.
+    
+    Forwarded headers are honored only when the direct peer is one of
+    TRUSTED_PROXIES, since any client can send them. The client is then
+    the right-most X-Forwarded-For hop that is not a trusted proxy;
+    entries left of it were supplied by the client and are ignored.
+    """
+    if not request.client:
+        return "unknown"
+    
+    # Direct connection
+    peer = request.client.host
+    if not _is_trusted_proxy(peer):
+        return peer
+    
     forwarded_for = request.headers.get("X-Forwarded-For")
     if forwarded_for:
-        return forwarded_for.split(",")[0].strip()
+        hops = [hop.strip() for hop in forwarded_for.split(",") if hop.strip()]
+        for hop in reversed(hops):
+            if not _is_trusted_proxy(hop):
+                return hop
+        if hops:
+            return hops[0]
     
     real_ip = request.headers.get("X-Real-IP")
     if real_ip:
-        return real_ip
-    
-    # Direct connection
-    if request.client:
-        return request.client.host
+        return real_ip.strip()
     
-    return "unknown"
+    return peer
 
 
 def get_user_agent(request: Request) -> Optional[str]:
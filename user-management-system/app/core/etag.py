@@ -0,0 +1,75 @@
+"""Entity tags and conditional GET handling."""
+
+import hashlib
+from typing import Any, Awaitable, Callable, Optional, Sequence
+
+from fastapi import Depends, HTTPException, Request, Response, status
+
+
+# Revalidate on every use; never store in shared caches
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts: Any) -> str:
+    """Build a strong entity tag from the parts of a resource version."""
+    digest = hashlib.blake2b(
+        "\x1f".join(str(part) for part in parts).encode(),
+        digest_size=16,
+    ).hexdigest()
+    return f'"{digest}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """
+    Check an If-None-Match header against an entity tag.
+    
+    Uses the weak comparison RFC 9110 prescribes for If-None-Match, so
+    W/"..." forms of the tag match too.
+    """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def conditional_get(
+    version: Callable[..., Awaitable[Optional[Sequence[Any]]]],
+) -> Callable[..., Awaitable[Optional[str]]]:
+    """
+    Create a conditional GET dependency.
+    
+    `version` is itself a dependency returning the parts that identify
+    the current version of the resource (timestamps, counters...), or
+    None when the resource does not exist. The dependency sets ETag and
+    Cache-Control on the response and, when If-None-Match matches,
+    answers 304 Not Modified before the endpoint runs. Declare it ahead
+    of dependencies that load the resource so a match skips that work,
+    and after authorization dependencies.
+    
+    Returns the ETag, or None when the resource does not exist so the
+    endpoint can report that as usual.
+    """
+    async def dependency(
+        request: Request,
+        response: Response,
+        parts: Optional[Sequence[Any]] = Depends(version),
+    ) -> Optional[str]:
+        if parts is None:
+            return None
+        
+        etag = make_etag(*parts)
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            raise HTTPException(
+                status_code=status.HTTP_304_NOT_MODIFIED,
+                headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+            )
+        
+        response.headers["ETag"] = etag
+        response.headers["Cache-Control"] = CACHE_CONTROL
+        return etag
+    
+    return dependency
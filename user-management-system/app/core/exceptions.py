@@ -70,6 +70,16 @@ class ConflictError(AppException):
         )
 
 
+class PayloadTooLargeError(AppException):
+    """Request body too large."""
+    
+    def __init__(self, detail: str = "Request body too large"):
+        super().__init__(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=detail,
+        )
+
+
 class ValidationError(AppException):
     """Validation error."""
     
@@ -83,10 +93,30 @@ class ValidationError(AppException):
 class RateLimitError(AppException):
     """Rate limit exceeded."""
     
-    def __init__(self, detail: str = "Rate limit exceeded"):
+    def __init__(
+        self,
+        detail: str = "Rate limit exceeded",
+        retry_after: Optional[int] = None,
+    ):
         super().__init__(
             status_code=status.HTTP_429_TOO_MANY_REQUESTS,
             detail=detail,
+            headers={"Retry-After": str(retry_after)} if retry_after else None,
+        )
+
+
+class ServiceUnavailableError(AppException):
+    """Service temporarily unavailable (overloaded)."""
+    
+    def __init__(
+        self,
+        detail: str = "Service temporarily unavailable",
+        retry_after: int = 1,
+    ):
+        super().__init__(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=detail,
+            headers={"Retry-After": str(retry_after)},
         )
 
 
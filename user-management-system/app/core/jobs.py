@@ -0,0 +1,85 @@
+"""Progress tracking for long-running background jobs."""
+
+import json
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+JOB_PREFIX = "job:"
+
+
+class JobStore:
+    """
+    Job progress records shared by all workers through Redis.
+    
+    A job is a JSON document written by the worker running it and read
+    by progress endpoints. Without Redis, records are kept in this
+    worker's memory only (at most `local_size`, for the same TTL as in
+    Redis) and are lost on restart.
+    """
+    
+    def __init__(self, ttl: int, local_size: int):
+        self.ttl = ttl
+        self._local: TTLCache[Dict[str, Any]] = TTLCache(maxsize=local_size, ttl=ttl)
+    
+    async def create(self, kind: str, owner_id: uuid.UUID, **fields: Any) -> Dict[str, Any]:
+        """Create a pending job record."""
+        job = {
+            "id": str(uuid.uuid4()),
+            "kind": kind,
+            "owner_id": str(owner_id),
+            "status": "pending",
+            "created_at": datetime.now(timezone.utc).isoformat(),
+            "finished_at": None,
+            "error": None,
+            **fields,
+        }
+        await self.save(job)
+        return job
+    
+    async def save(self, job: Dict[str, Any]) -> None:
+        """Store the current state of a job."""
+        if not redis_client.is_connected:
+            self._local.set(job["id"], json.loads(json.dumps(job)))
+            return
+        
+        try:
+            await redis_client.set(f"{JOB_PREFIX}{job['id']}", json.dumps(job), expire=self.ttl)
+        except Exception as e:
+            logger.warning(f"Failed to save job {job['id']}: {e}")
+            self._local.set(job["id"], json.loads(json.dumps(job)))
+    
+    async def get(self, job_id: str) -> Optional[Dict[str, Any]]:
+        """Get a job by ID."""
+        job = self._local.get(job_id)
+        if job is not None:
+            return job
+        
+        if not redis_client.is_connected:
+            return None
+        
+        try:
+            raw = await redis_client.get(f"{JOB_PREFIX}{job_id}")
+        except Exception as e:
+            logger.warning(f"Failed to read job {job_id}: {e}")
+            return None
+        return json.loads(raw) if raw else None
+    
+    async def finish(self, job: Dict[str, Any], error: Optional[str] = None) -> None:
+        """Mark a job as completed, or failed with an error message."""
+        job["status"] = "failed" if error else "completed"
+        job["error"] = error
+        job["finished_at"] = datetime.now(timezone.utc).isoformat()
+        await self.save(job)
+
+
+# Global job store instance
+job_store = JobStore(ttl=settings.JOB_TTL_SECONDS, local_size=settings.JOB_LOCAL_SIZE)
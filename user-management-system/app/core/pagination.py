@@ -0,0 +1,50 @@
+"""Opaque cursors for keyset pagination."""
+
+import base64
+import binascii
+import json
+import uuid
+from dataclasses import dataclass
+from datetime import datetime
+
+from app.core.exceptions import BadRequestError
+
+
+@dataclass(frozen=True)
+class Cursor:
+    """
+    Position in a list ordered by (created_at, id) descending.
+    
+    Direction "next" fetches rows after the position, "prev" rows
+    before it.
+    """
+    
+    created_at: datetime
+    id: uuid.UUID
+    direction: str = "next"
+    
+    def encode(self) -> str:
+        """Encode as an opaque URL-safe string."""
+        raw = json.dumps([self.created_at.isoformat(), str(self.id), self.direction])
+        return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+    
+    @classmethod
+    def decode(cls, value: str) -> "Cursor":
+        """
+        Decode an opaque cursor string.
+        
+        Raises:
+            BadRequestError: If the cursor is malformed
+        """
+        try:
+            padded = value + "=" * (-len(value) % 4)
+            created_at, id_, direction = json.loads(base64.urlsafe_b64decode(padded))
+            if direction not in ("next", "prev"):
+                raise ValueError(direction)
+            return cls(
+                created_at=datetime.fromisoformat(created_at),
+                id=uuid.UUID(id_),
+                direction=direction,
+            )
+        except (binascii.Error, TypeError, ValueError):
+            raise BadRequestError("Invalid cursor")
@@ -0,0 +1,200 @@
+"""Compiled bitset permission engine for RBAC checks."""
+
+import asyncio
+import logging
+import time
+import uuid
+from typing import Dict, FrozenSet, Iterable, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.pubsub import pubsub_listener
+from app.core.redis import redis_client
+from app.models.role import Permission, Role, RolePermission
+
+logger = logging.getLogger(__name__)
+
+
+PERMISSIONS_CHANGED_CHANNEL = "permissions:changed"
+
+# Upper bound on memoized role-set masks per compiled snapshot
+MAX_MEMOIZED_ROLE_SETS = 10000
+
+
+class CompiledPermissions:
+    """
+    Immutable compiled view of the role/permission tables.
+    
+    Every (resource, action, scope) permission is assigned a bit; each
+    role's effective permissions, including those inherited through
+    parent roles, are precomputed as an integer mask. A permission
+    check is then a single AND of two integers.
+    """
+    
+    def __init__(
+        self,
+        bits: Dict[Tuple[str, str, str], int],
+        role_masks: Dict[uuid.UUID, int],
+    ):
+        self.bits = bits
+        self.role_masks = role_masks
+        
+        # Permission checks ignore scope: any scope of resource:action grants it
+        self.action_masks: Dict[Tuple[str, str], int] = {}
+        for (resource, action, _scope), bit in bits.items():
+            key = (resource, action)
+            self.action_masks[key] = self.action_masks.get(key, 0) | (1 << bit)
+        
+        self._user_masks: Dict[FrozenSet[uuid.UUID], int] = {}
+    
+    def mask_for_roles(self, role_ids: FrozenSet[uuid.UUID]) -> int:
+        """Get the combined permission mask for a set of roles (memoized)."""
+        mask = self._user_masks.get(role_ids)
+        if mask is None:
+            mask = 0
+            for role_id in role_ids:
+                mask |= self.role_masks.get(role_id, 0)
+            if len(self._user_masks) >= MAX_MEMOIZED_ROLE_SETS:
+                self._user_masks.clear()
+            self._user_masks[role_ids] = mask
+        return mask
+    
+    def required_mask(self, resource: str, action: str) -> int:
+        """Get the mask of permissions satisfying resource:action."""
+        return self.action_masks.get((resource, action), 0)
+    
+    def allows(self, role_ids: FrozenSet[uuid.UUID], resource: str, action: str) -> bool:
+        """Check if any of the roles grants resource:action."""
+        return bool(self.mask_for_roles(role_ids) & self.required_mask(resource, action))
+
+
+def compile_permissions(
+    permissions: Iterable[Tuple[uuid.UUID, str, str, str]],
+    roles: Iterable[Tuple[uuid.UUID, Optional[uuid.UUID]]],
+    grants: Iterable[Tuple[uuid.UUID, uuid.UUID]],
+) -> CompiledPermissions:
+    """
+    Compile role/permission rows into bitmasks.
+    
+    Args:
+        permissions: (permission_id, resource, action, scope) rows
+        roles: (role_id, parent_role_id) rows
+        grants: (role_id, permission_id) rows
+    
+    Returns:
+        Compiled permissions
+    """
+    bits: Dict[Tuple[str, str, str], int] = {}
+    permission_bits: Dict[uuid.UUID, int] = {}
+    for permission_id, resource, action, scope in permissions:
+        key = (resource, action, scope)
+        if key not in bits:
+            bits[key] = len(bits)
+        permission_bits[permission_id] = bits[key]
+    
+    direct: Dict[uuid.UUID, int] = {}
+    for role_id, permission_id in grants:
+        bit = permission_bits.get(permission_id)
+        if bit is not None:
+            direct[role_id] = direct.get(role_id, 0) | (1 << bit)
+    
+    parents = dict(roles)
+    role_masks: Dict[uuid.UUID, int] = {}
+    for role_id in parents:
+        # Walk up the parent chain; the visited set guards against cycles
+        mask = 0
+        visited = set()
+        current: Optional[uuid.UUID] = role_id
+        while current is not None and current not in visited:
+            visited.add(current)
+            mask |= direct.get(current, 0)
+            current = parents.get(current)
+        role_masks[role_id] = mask
+    
+    return CompiledPermissions(bits=bits, role_masks=role_masks)
+
+
+class PermissionEngine:
+    """
+    Per-worker holder of the compiled permission tables.
+    
+    Recompiles lazily once the compiled tables are older than
+    PERMISSION_ENGINE_TTL_SECONDS, or sooner after notify_changed(),
+    which code changing roles or permissions (e.g. scripts/seed_db.py) calls
+    to reach every worker over pub/sub. Without Redis, other workers
+    pick up changes only through the TTL.
+    """
+    
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._compiled: Optional[CompiledPermissions] = None
+        self._compiled_at: float = 0.0
+        self._lock = asyncio.Lock()
+    
+    def _is_fresh(self) -> bool:
+        return (
+            self._compiled is not None
+            and time.monotonic() - self._compiled_at < self.ttl
+        )
+    
+    async def get(self, db: AsyncSession) -> CompiledPermissions:
+        """Get compiled permissions, compiling from the database if stale."""
+        if self._is_fresh():
+            return self._compiled
+        
+        async with self._lock:
+            if not self._is_fresh():
+                self._compiled = await self._compile(db)
+                self._compiled_at = time.monotonic()
+        return self._compiled
+    
+    async def _compile(self, db: AsyncSession) -> CompiledPermissions:
+        permissions = await db.execute(
+            select(Permission.id, Permission.resource, Permission.action, Permission.scope)
+            .order_by(Permission.resource, Permission.action, Permission.scope)
+        )
+        roles = await db.execute(select(Role.id, Role.parent_role_id))
+        grants = await db.execute(
+            select(RolePermission.role_id, RolePermission.permission_id)
+        )
+        
+        compiled = compile_permissions(
+            permissions=(
+                (pid, resource, action.value, scope.value)
+                for pid, resource, action, scope in permissions.all()
+            ),
+            roles=roles.all(),
+            grants=grants.all(),
+        )
+        logger.info(
+            f"Compiled {len(compiled.bits)} permissions for {len(compiled.role_masks)} roles"
+        )
+        return compiled
+    
+    def invalidate(self, message: Optional[str] = None) -> None:
+        """Drop the compiled tables on this worker."""
+        self._compiled = None
+    
+    async def notify_changed(self) -> None:
+        """Recompile on every worker after roles or permissions change."""
+        self.invalidate()
+        
+        if not redis_client.is_connected:
+            return
+        
+        try:
+            await redis_client.publish(PERMISSIONS_CHANGED_CHANNEL, "1")
+        except Exception as e:
+            logger.warning(f"Failed to publish permission change: {e}")
+
+
+# Global permission engine instance
+permission_engine = PermissionEngine(ttl=settings.PERMISSION_ENGINE_TTL_SECONDS)
+
+pubsub_listener.subscribe(
+    PERMISSIONS_CHANGED_CHANNEL,
+    permission_engine.invalidate,
+    on_reset=permission_engine.invalidate,
+)
@@ -0,0 +1,292 @@
+"""Cached authorization snapshot ("principal") of a user."""
+
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import FrozenSet, Optional, Tuple
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.pubsub import pubsub_listener
+from app.core.redis import redis_client
+from app.models.enums import UserStatus
+from app.models.role import Role, UserRole
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+PRINCIPAL_CACHE_PREFIX = "principal:v2:"
+PRINCIPAL_INVALIDATION_CHANNEL = "principal:invalidate"
+PRINCIPAL_GENERATION_PREFIX = "principal:gen:"
+
+# Stores a loaded principal only if the user's generation (bumped by
+# every invalidation) is still the one read before loading. KEYS: cache
+# key, generation key; ARGV: generation, principal JSON, TTL seconds.
+# Returns 1 if stored, 0 if an invalidation happened meanwhile.
+SET_IF_GENERATION_LUA = """
+if (redis.call('GET', KEYS[2]) or '0') ~= ARGV[1] then
+    return 0
+end
+redis.call('SET', KEYS[1], ARGV[2], 'EX', tonumber(ARGV[3]))
+return 1
+"""
+
+
+@dataclass(frozen=True)
+class RoleGrant:
+    """Role assigned to a user, with optional expiry (POSIX timestamp)."""
+    
+    id: uuid.UUID
+    name: str
+    expires_at: Optional[float] = None
+    
+    def is_active(self, now: float) -> bool:
+        """Check if the assignment has not expired."""
+        return self.expires_at is None or self.expires_at > now
+
+
+@dataclass(frozen=True)
+class Principal:
+    """
+    Authorization snapshot of a user.
+    
+    Carries everything needed to authenticate and authorize a request
+    without loading the User/Role/Permission ORM graph. Role expiry is
+    evaluated at check time, so cached principals never grant an
+    expired role.
+    """
+    
+    id: uuid.UUID
+    email: str
+    status: UserStatus
+    is_deleted: bool
+    roles: Tuple[RoleGrant, ...] = ()
+    
+    @property
+    def is_active(self) -> bool:
+        """Check if user is active."""
+        return self.status == UserStatus.ACTIVE and not self.is_deleted
+    
+    def active_role_ids(self) -> FrozenSet[uuid.UUID]:
+        """Get IDs of roles whose assignment has not expired."""
+        now = time.time()
+        return frozenset(role.id for role in self.roles if role.is_active(now))
+    
+    @property
+    def role_names(self) -> FrozenSet[str]:
+        """Get names of roles whose assignment has not expired."""
+        now = time.time()
+        return frozenset(role.name for role in self.roles if role.is_active(now))
+    
+    def has_any_role(self, *names: str) -> bool:
+        """Check if user has any of the given roles."""
+        role_names = self.role_names
+        return any(name in role_names for name in names)
+    
+    def to_json(self) -> str:
+        """Serialize for the Redis cache tier."""
+        return json.dumps({
+            "id": str(self.id),
+            "email": self.email,
+            "status": self.status.value,
+            "is_deleted": self.is_deleted,
+            "roles": [
+                [str(role.id), role.name, role.expires_at] for role in self.roles
+            ],
+        })
+    
+    @classmethod
+    def from_json(cls, raw: str) -> "Principal":
+        """Deserialize from the Redis cache tier."""
+        data = json.loads(raw)
+        return cls(
+            id=uuid.UUID(data["id"]),
+            email=data["email"],
+            status=UserStatus(data["status"]),
+            is_deleted=data["is_deleted"],
+            roles=tuple(
+                RoleGrant(id=uuid.UUID(role_id), name=name, expires_at=expires_at)
+                for role_id, name, expires_at in data["roles"]
+            ),
+        )
+
+
+def _timestamp(value: Optional[datetime]) -> Optional[float]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+async def load_principal(db: AsyncSession, user_id: uuid.UUID) -> Optional[Principal]:
+    """
+    Build a principal from the database.
+    
+    Uses two column-only queries instead of hydrating User, Role and
+    Permission objects. Permissions are resolved from role IDs by the
+    compiled permission engine.
+    """
+    result = await db.execute(
+        select(User.id, User.email, User.status, User.deleted_at)
+        .where(User.id == user_id)
+    )
+    row = result.one_or_none()
+    if row is None:
+        return None
+    
+    result = await db.execute(
+        select(Role.id, Role.name, UserRole.expires_at)
+        .join(UserRole, UserRole.role_id == Role.id)
+        .where(UserRole.user_id == user_id)
+    )
+    
+    now = time.time()
+    roles = []
+    for role_id, role_name, expires_at in result.all():
+        role = RoleGrant(id=role_id, name=role_name, expires_at=_timestamp(expires_at))
+        if role.is_active(now):
+            roles.append(role)
+    
+    return Principal(
+        id=row.id,
+        email=row.email,
+        status=row.status,
+        is_deleted=row.deleted_at is not None,
+        roles=tuple(roles),
+    )
+
+
+class PrincipalCache:
+    """
+    Two-tier principal cache: per-worker LRU backed by Redis.
+    
+    Invalidations are published over Redis pub/sub so every worker
+    evicts its local copy. Both tiers are bypassed when Redis is not
+    connected, since local entries could not be invalidated.
+    
+    A principal loaded from the database is only cached if no
+    invalidation of it happened during the load: every invalidation
+    bumps a per-user generation in Redis (and a per-worker counter for
+    the local tier), and the write is skipped if it changed.
+    """
+    
+    def __init__(self, maxsize: int, local_ttl: int, ttl: int):
+        self.ttl = ttl
+        self._local: TTLCache[Principal] = TTLCache(maxsize=maxsize, ttl=local_ttl)
+        self._local_generation = 0
+        self._script = None
+        self._script_client = None
+    
+    @staticmethod
+    def _key(user_id: uuid.UUID) -> str:
+        return f"{PRINCIPAL_CACHE_PREFIX}{user_id}"
+    
+    @staticmethod
+    def _generation_key(user_id: uuid.UUID) -> str:
+        return f"{PRINCIPAL_GENERATION_PREFIX}{user_id}"
+    
+    def _get_script(self):
+        client = redis_client.client
+        if self._script_client is not client:
+            self._script = client.register_script(SET_IF_GENERATION_LUA)
+            self._script_client = client
+        return self._script
+    
+    @property
+    def enabled(self) -> bool:
+        return settings.PRINCIPAL_CACHE_ENABLED and redis_client.is_connected
+    
+    async def get(self, db: AsyncSession, user_id: uuid.UUID) -> Optional[Principal]:
+        """Get principal from cache, loading it from the database on a miss."""
+        if not self.enabled:
+            return await load_principal(db, user_id)
+        
+        principal = self._local.get(user_id)
+        if principal is not None:
+            return principal
+        
+        local_generation = self._local_generation
+        try:
+            raw, generation = await redis_client.client.mget(
+                self._key(user_id), self._generation_key(user_id)
+            )
+        except Exception as e:
+            logger.warning(f"Principal cache read failed: {e}")
+            return await load_principal(db, user_id)
+        
+        if raw:
+            principal = Principal.from_json(raw)
+        else:
+            principal = await load_principal(db, user_id)
+            if principal is None:
+                return None
+            try:
+                stored = await self._get_script()(
+                    keys=[self._key(user_id), self._generation_key(user_id)],
+                    args=[generation or "0", principal.to_json(), self.ttl],
+                )
+            except Exception as e:
+                logger.warning(f"Principal cache write failed: {e}")
+                stored = False
+            if not stored:
+                return principal
+        
+        if self._local_generation == local_generation:
+            self._local.set(user_id, principal)
+        return principal
+    
+    async def invalidate(self, *user_ids: uuid.UUID) -> None:
+        """Evict principals from Redis and from every worker's local tier."""
+        self._local_generation += 1
+        for user_id in user_ids:
+            self._local.pop(user_id)
+        
+        if not redis_client.is_connected or not user_ids:
+            return
+        
+        try:
+            pipe = redis_client.client.pipeline(transaction=False)
+            for user_id in user_ids:
+                pipe.incr(self._generation_key(user_id))
+                pipe.expire(self._generation_key(user_id), self.ttl)
+            pipe.delete(*(self._key(user_id) for user_id in user_ids))
+            pipe.publish(
+                PRINCIPAL_INVALIDATION_CHANNEL,
+                json.dumps([str(user_id) for user_id in user_ids]),
+            )
+            await pipe.execute()
+        except Exception as e:
+            logger.warning(f"Principal cache invalidation failed: {e}")
+    
+    def handle_invalidation(self, message: str) -> None:
+        """Evict local entries named in a pub/sub invalidation message."""
+        self._local_generation += 1
+        for user_id in json.loads(message):
+            self._local.pop(uuid.UUID(user_id))
+    
+    def clear_local(self) -> None:
+        """Drop all local entries."""
+        self._local_generation += 1
+        self._local.clear()
+
+
+# Global principal cache instance
+principal_cache = PrincipalCache(
+    maxsize=settings.PRINCIPAL_CACHE_LOCAL_SIZE,
+    local_ttl=settings.PRINCIPAL_CACHE_LOCAL_TTL_SECONDS,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+)
+
+pubsub_listener.subscribe(
+    PRINCIPAL_INVALIDATION_CHANNEL,
+    principal_cache.handle_invalidation,
+    on_reset=principal_cache.clear_local,
+)
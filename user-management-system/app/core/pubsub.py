@@ -0,0 +1,112 @@
+"""Redis pub/sub listener for cross-worker cache invalidation."""
+
+import asyncio
+import inspect
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional, Union
+
+from app.core.redis import redis_client
+
+logger = logging.getLogger(__name__)
+
+
+MessageHandler = Callable[[str], Union[None, Awaitable[None]]]
+ResetHandler = Callable[[], Union[None, Awaitable[None]]]
+
+
+class PubSubListener:
+    """
+    Per-worker Redis pub/sub listener.
+    
+    Modules register channel handlers at import time; the listener is
+    started from the application lifespan. Reset handlers are called
+    whenever the subscription is (re)established, since messages
+    published while disconnected are lost.
+    """
+    
+    def __init__(self):
+        self._handlers: Dict[str, List[MessageHandler]] = {}
+        self._reset_handlers: List[ResetHandler] = []
+        self._task: Optional[asyncio.Task] = None
+        self._retry_delay: float = 1.0
+    
+    def subscribe(
+        self,
+        channel: str,
+        handler: MessageHandler,
+        on_reset: Optional[ResetHandler] = None,
+    ) -> None:
+        """Register a handler for messages on a channel."""
+        self._handlers.setdefault(channel, []).append(handler)
+        if on_reset is not None:
+            self._reset_handlers.append(on_reset)
+    
+    @property
+    def is_running(self) -> bool:
+        """Check if the listener task is running."""
+        return self._task is not None and not self._task.done()
+    
+    async def start(self) -> None:
+        """Start listening in a background task."""
+        if self.is_running or not self._handlers:
+            return
+        self._task = asyncio.create_task(self._run(), name="redis-pubsub-listener")
+    
+    async def stop(self) -> None:
+        """Stop the background task."""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+    
+    async def _reset(self) -> None:
+        for handler in self._reset_handlers:
+            try:
+                result = handler()
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"Pub/sub reset handler failed: {e}")
+    
+    async def dispatch(self, channel: str, data: str) -> None:
+        """Run this worker's handlers for a message, e.g. one that could not be published."""
+        for handler in self._handlers.get(channel, []):
+            try:
+                result = handler(data)
+                if inspect.isawaitable(result):
+                    await result
+            except Exception as e:
+                logger.warning(f"Pub/sub handler for '{channel}' failed: {e}")
+    
+    async def _run(self) -> None:
+        while True:
+            pubsub = None
+            try:
+                pubsub = redis_client.client.pubsub(ignore_subscribe_messages=True)
+                await pubsub.subscribe(*self._handlers.keys())
+                await self._reset()
+                logger.info(f"Subscribed to {len(self._handlers)} pub/sub channels")
+                
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    await self.dispatch(message["channel"], message["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Pub/sub listener error, reconnecting: {e}")
+                await asyncio.sleep(self._retry_delay)
+            finally:
+                if pubsub is not None:
+                    try:
+                        await pubsub.aclose()
+                    except Exception:
+                        pass
+
+
+# Global listener instance
+pubsub_listener = PubSubListener()
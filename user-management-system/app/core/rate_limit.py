@@ -0,0 +1,167 @@
+"""Redis sliding-window rate limiting middleware."""
+
+import logging
+import math
+import time
+import uuid
+from typing import Dict, List, Optional, Tuple
+
+from fastapi import Request
+from fastapi.responses import JSONResponse
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from app.core.dependencies import get_client_ip
+from app.core.exceptions import RateLimitError
+from app.core.redis import redis_client
+from app.core.security import decode_token
+
+logger = logging.getLogger(__name__)
+
+
+RATE_LIMIT_PREFIX = "ratelimit:"
+WINDOW_MS = 60_000
+
+# Checks every budget, then records the hit in all of them only if none
+# is exhausted. KEYS: sorted-set per budget; ARGV: now_ms, window_ms,
+# member, then one limit per key. Returns 0 if allowed, else the
+# milliseconds until the tightest exhausted budget frees a slot.
+SLIDING_WINDOW_LUA = """
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+local member = ARGV[3]
+local retry_after = 0
+
+for i, key in ipairs(KEYS) do
+    redis.call('ZREMRANGEBYSCORE', key, 0, now - window)
+    if redis.call('ZCARD', key) >= tonumber(ARGV[3 + i]) then
+        local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+        local wait = tonumber(oldest[2]) + window - now
+        if wait > retry_after then
+            retry_after = wait
+        end
+    end
+end
+
+if retry_after > 0 then
+    return retry_after
+end
+
+for _, key in ipairs(KEYS) do
+    redis.call('ZADD', key, now, member)
+    redis.call('PEXPIRE', key, window)
+end
+return 0
+"""
+
+
+class RateLimiter:
+    """
+    Sliding-window limiter over several budgets in one Redis round trip.
+    
+    Fails open when Redis is unavailable.
+    """
+    
+    def __init__(self):
+        self._script = None
+        self._script_client = None
+    
+    def _get_script(self):
+        client = redis_client.client
+        if self._script_client is not client:
+            self._script = client.register_script(SLIDING_WINDOW_LUA)
+            self._script_client = client
+        return self._script
+    
+    async def hit(self, budgets: List[Tuple[str, int]]) -> Optional[float]:
+        """
+        Record a request against budgets of (key, limit per minute).
+        
+        Returns:
+            Seconds to wait if any budget is exhausted, otherwise None
+        """
+        if not redis_client.is_connected or not budgets:
+            return None
+        
+        try:
+            retry_after_ms = await self._get_script()(
+                keys=[f"{RATE_LIMIT_PREFIX}{key}" for key, _ in budgets],
+                args=[
+                    int(time.time() * 1000),
+                    WINDOW_MS,
+                    uuid.uuid4().hex,
+                    *(limit for _, limit in budgets),
+                ],
+            )
+        except Exception as e:
+            logger.warning(f"Rate limit check failed, allowing request: {e}")
+            return None
+        
+        if not retry_after_ms:
+            return None
+        return retry_after_ms / 1000
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware enforcing per-IP, per-user and per-route budgets.
+    
+    API requests with a valid access token count against the user's
+    budget, and all others against the client IP budget, so users behind
+    a shared address are limited individually. Routes listed in
+    route_limits additionally get a tighter per-IP budget of their own.
+    """
+    
+    def __init__(
+        self,
+        app: ASGIApp,
+        ip_limit: int,
+        user_limit: int,
+        route_limits: Optional[Dict[str, int]] = None,
+        path_prefix: str = "",
+    ):
+        self.app = app
+        self.ip_limit = ip_limit
+        self.user_limit = user_limit
+        self.route_limits = route_limits or {}
+        self.path_prefix = path_prefix
+        self.limiter = RateLimiter()
+    
+    def _budgets(self, request: Request) -> List[Tuple[str, int]]:
+        ip = get_client_ip(request)
+        path = request.url.path
+        
+        budgets = []
+        
+        authorization = request.headers.get("Authorization", "")
+        scheme, _, token = authorization.partition(" ")
+        if scheme.lower() == "bearer" and token:
+            payload = decode_token(token)
+            if payload and payload.get("type") == "access" and payload.get("sub"):
+                budgets.append((f"user:{payload['sub']}", self.user_limit))
+        
+        if not budgets:
+            budgets.append((f"ip:{ip}", self.ip_limit))
+        
+        route_limit = self.route_limits.get(path)
+        if route_limit is not None:
+            budgets.append((f"route:{path}:{ip}", route_limit))
+        
+        return budgets
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+        
+        retry_after = await self.limiter.hit(self._budgets(Request(scope)))
+        if retry_after is None:
+            await self.app(scope, receive, send)
+            return
+        
+        exc = RateLimitError(retry_after=max(1, math.ceil(retry_after)))
+        response = JSONResponse(
+            status_code=exc.status_code,
+            content={"detail": exc.detail},
+            headers=exc.headers,
+        )
+        await response(scope, receive, send)
@@ -0,0 +1,286 @@
+"""Real-time notification delivery to WebSocket and SSE clients."""
+
+import asyncio
+import json
+import logging
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Dict, Iterable, Mapping, Optional, Set
+
+from app.core.config import settings
+from app.core.pubsub import pubsub_listener
+from app.core.redis import redis_client
+from app.core.revocation import REVOCATION_CHANNEL
+from app.models.enums import NotificationPriority, NotificationType
+
+logger = logging.getLogger(__name__)
+
+
+# Pub/sub channel carrying new notifications to every worker
+NOTIFICATION_CHANNEL = "notifications:new"
+
+# Sent to clients idle for REALTIME_HEARTBEAT_SECONDS
+HEARTBEAT_EVENT = json.dumps({"type": "ping"})
+
+# Replaces the backlog of a client that fell behind; it should refetch its notifications
+RESYNC_EVENT = json.dumps({"type": "resync"})
+
+# Last event of a connection whose access token expired or whose session was revoked
+EXPIRED_EVENT = json.dumps({"type": "expired"})
+
+
+def notification_fields(
+    title: str,
+    message: str,
+    type: NotificationType,
+    priority: NotificationPriority,
+    action_url: Optional[str],
+    created_at: datetime,
+    id: Optional[uuid.UUID] = None,
+) -> Dict[str, Any]:
+    """Fields of a notification event that are the same for all of its recipients."""
+    return {
+        "id": str(id) if id else None,
+        "title": title,
+        "message": message,
+        "type": NotificationType(type).value,
+        "priority": NotificationPriority(priority).value,
+        "action_url": action_url,
+        "created_at": created_at.isoformat(),
+    }
+
+
+class Connection:
+    """
+    A connected client of a user, with a bounded queue of serialized events.
+    
+    Keeps the session and expiry of the access token the client connected
+    with; the connection ends when the token expires or the session is
+    revoked, as a request with that token would be rejected.
+    """
+    
+    __slots__ = ("user_id", "session_id", "expires_at", "queue", "closed")
+    
+    def __init__(
+        self,
+        user_id: uuid.UUID,
+        queue_size: int,
+        session_id: Optional[uuid.UUID] = None,
+        expires_at: Optional[float] = None,
+    ):
+        self.user_id = user_id
+        self.session_id = session_id
+        self.expires_at = expires_at  # Unix timestamp of the token's exp
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.closed = False
+    
+    @property
+    def expired(self) -> bool:
+        """Check if the access token of the connection has expired."""
+        return self.expires_at is not None and time.time() >= self.expires_at
+    
+    def push(self, event: str) -> None:
+        """
+        Queue an event without waiting.
+        
+        A client whose queue is full has stopped keeping up: its backlog
+        is replaced with a single resync event, so a slow client neither
+        delays delivery to others nor grows the worker's memory.
+        """
+        if self.closed:
+            return
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            self._replace_backlog(RESYNC_EVENT)
+    
+    def close(self) -> None:
+        """End the connection: pending events are dropped for a final EXPIRED_EVENT."""
+        if not self.closed:
+            self.closed = True
+            self._replace_backlog(EXPIRED_EVENT)
+    
+    def _replace_backlog(self, event: str) -> None:
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(event)
+    
+    async def next_event(self, heartbeat: float) -> str:
+        """
+        Wait for the next event, or a heartbeat after `heartbeat` idle seconds.
+        
+        Returns EXPIRED_EVENT, after which the caller must end the
+        connection, once the token expires or the connection is closed.
+        """
+        if self.expired:
+            self.close()
+        
+        timeout = heartbeat
+        if self.expires_at is not None:
+            timeout = max(min(heartbeat, self.expires_at - time.time()), 0)
+        
+        try:
+            async with asyncio.timeout(timeout):
+                return await self.queue.get()
+        except TimeoutError:
+            if self.expired:
+                self.close()
+                return EXPIRED_EVENT
+            return HEARTBEAT_EVENT
+
+
+class NotificationHub:
+    """
+    Per-worker registry of real-time notification clients.
+    
+    New notifications are published once to NOTIFICATION_CHANNEL; each
+    worker's pub/sub listener passes them to deliver, which queues them
+    for the clients connected to that worker only. Without Redis,
+    publishing delivers to this worker's clients directly.
+    """
+    
+    def __init__(self):
+        self._connections: Dict[uuid.UUID, Set[Connection]] = {}
+        self._sessions: Dict[uuid.UUID, Set[Connection]] = {}
+        self._count = 0
+    
+    @property
+    def connection_count(self) -> int:
+        """Number of clients connected to this worker."""
+        return self._count
+    
+    @property
+    def is_full(self) -> bool:
+        """Check if the worker holds REALTIME_MAX_CONNECTIONS clients."""
+        return self._count >= settings.REALTIME_MAX_CONNECTIONS
+    
+    def connect(
+        self,
+        user_id: uuid.UUID,
+        session_id: Optional[uuid.UUID] = None,
+        expires_at: Optional[float] = None,
+    ) -> Optional[Connection]:
+        """
+        Register a client of a user, or return None if the worker is full.
+        
+        Args:
+            user_id: User ID
+            session_id: Session of the client's access token
+            expires_at: Expiry of the client's access token (Unix timestamp)
+        """
+        if self.is_full:
+            return None
+        connection = Connection(user_id, settings.REALTIME_QUEUE_SIZE, session_id, expires_at)
+        self._connections.setdefault(user_id, set()).add(connection)
+        if session_id is not None:
+            self._sessions.setdefault(session_id, set()).add(connection)
+        self._count += 1
+        return connection
+    
+    def disconnect(self, connection: Connection) -> None:
+        """Unregister a client."""
+        connections = self._connections.get(connection.user_id)
+        if not connections or connection not in connections:
+            return
+        connections.discard(connection)
+        self._count -= 1
+        if not connections:
+            del self._connections[connection.user_id]
+        
+        sessions = self._sessions.get(connection.session_id)
+        if sessions is not None:
+            sessions.discard(connection)
+            if not sessions:
+                del self._sessions[connection.session_id]
+    
+    def close_sessions(self, session_ids: Iterable[uuid.UUID]) -> int:
+        """End this worker's connections authenticated by any of the sessions, returning how many."""
+        closed = 0
+        for session_id in session_ids:
+            for connection in self._sessions.get(session_id, ()):
+                connection.close()
+                closed += 1
+        return closed
+    
+    def handle_revocation(self, message: str) -> None:
+        """End the connections of sessions in a pub/sub revocation message."""
+        self.close_sessions(uuid.UUID(session_id) for session_id, _ in json.loads(message))
+    
+    async def publish(
+        self,
+        notification: Mapping[str, Any],
+        recipients: Optional[Mapping[uuid.UUID, uuid.UUID]] = None,
+        exclude: Iterable[uuid.UUID] = (),
+    ) -> None:
+        """
+        Publish a new notification to its recipients' clients on all workers.
+        
+        Args:
+            notification: Event fields (see notification_fields)
+            recipients: Notification ID of each recipient; None for a broadcast
+            exclude: Users a broadcast is not sent to
+        """
+        data = json.dumps({
+            "notification": dict(notification),
+            "recipients": (
+                None if recipients is None
+                else {str(user_id): str(notification_id) for user_id, notification_id in recipients.items()}
+            ),
+            "exclude": [str(user_id) for user_id in exclude],
+        })
+        
+        if redis_client.is_connected:
+            try:
+                await redis_client.publish(NOTIFICATION_CHANNEL, data)
+                return
+            except Exception as e:
+                logger.warning(f"Failed to publish notification, delivering locally: {e}")
+        self.deliver(data)
+    
+    def deliver(self, data: str) -> int:
+        """Queue a published notification for this worker's clients, returning how many."""
+        message = json.loads(data)
+        notification = message["notification"]
+        delivered = 0
+        
+        if message["recipients"] is None:
+            excluded = {uuid.UUID(user_id) for user_id in message["exclude"]}
+            event = json.dumps({"type": "notification", "notification": notification})
+            for user_id, connections in self._connections.items():
+                if user_id in excluded:
+                    continue
+                for connection in connections:
+                    connection.push(event)
+                    delivered += 1
+            return delivered
+        
+        for user_id, notification_id in message["recipients"].items():
+            connections = self._connections.get(uuid.UUID(user_id))
+            if not connections:
+                continue
+            event = json.dumps({
+                "type": "notification",
+                "notification": {**notification, "id": notification_id},
+            })
+            for connection in connections:
+                connection.push(event)
+                delivered += 1
+        return delivered
+    
+    def resync(self) -> None:
+        """Ask every client to refetch, e.g. after missing pub/sub messages."""
+        for connections in self._connections.values():
+            for connection in connections:
+                connection.push(RESYNC_EVENT)
+
+
+# Global hub instance, fed by the pub/sub listener
+notification_hub = NotificationHub()
+
+pubsub_listener.subscribe(
+    NOTIFICATION_CHANNEL,
+    notification_hub.deliver,
+    on_reset=notification_hub.resync,
+)
+pubsub_listener.subscribe(REVOCATION_CHANNEL, notification_hub.handle_revocation)
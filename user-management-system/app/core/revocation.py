@@ -0,0 +1,165 @@
+"""Revoked-session denylist for stateless access tokens."""
+
+import json
+import logging
+import time
+import uuid
+from datetime import datetime, timezone
+from functools import partial
+from typing import Dict, Iterable, Tuple
+
+from sqlalchemy import event, select
+from sqlalchemy.orm import object_session
+
+from app.core.config import settings
+from app.core.database import AFTER_COMMIT_KEY, async_session_factory
+from app.core.pubsub import pubsub_listener
+from app.core.redis import redis_client
+from app.models.session import Session
+
+logger = logging.getLogger(__name__)
+
+
+REVOCATION_KEY = "revoked:sessions"
+REVOCATION_CHANNEL = "revoked:sessions"
+
+# How often expired local entries are swept
+PRUNE_INTERVAL_SECONDS = 60
+
+
+def _timestamp(value: datetime) -> float:
+    """Convert a (possibly naive UTC) datetime to a Unix timestamp."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class RevocationList:
+    """
+    Denylist of revoked session IDs.
+    
+    Entries live in a Redis sorted set scored by expiry and only need to
+    outlive the access tokens issued before the revocation. Each worker
+    keeps a local copy, updated over pub/sub and reloaded from Redis and
+    the sessions table whenever the subscription is (re)established, so
+    checking a token is a dictionary lookup.
+    """
+    
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+        self._local: Dict[uuid.UUID, float] = {}
+        self._loaded = False
+        self._next_prune = 0.0
+    
+    @property
+    def is_ready(self) -> bool:
+        """Check if the local copy is being kept current."""
+        return self._loaded and redis_client.is_connected and pubsub_listener.is_running
+    
+    def is_revoked(self, session_id: uuid.UUID) -> bool:
+        """Check if a session is on the denylist."""
+        expires_at = self._local.get(session_id)
+        if expires_at is None:
+            return False
+        if expires_at <= time.time():
+            self._local.pop(session_id, None)
+            return False
+        return True
+    
+    def _add(self, entries: Iterable[Tuple[uuid.UUID, float]]) -> None:
+        self._local.update(entries)
+        
+        now = time.time()
+        if now >= self._next_prune:
+            self._local = {sid: exp for sid, exp in self._local.items() if exp > now}
+            self._next_prune = now + PRUNE_INTERVAL_SECONDS
+    
+    async def revoke(self, *session_ids: uuid.UUID) -> None:
+        """
+        Publish revoked sessions to every worker.
+        
+        With STATELESS_ACCESS_TOKENS they are added to the denylist; the
+        revocation is published either way, so other subscribers (such as
+        real-time connections) can end the sessions. Without Redis, this
+        worker's subscribers are notified directly.
+        """
+        if not session_ids:
+            return
+        
+        now = time.time()
+        expires_at = now + self.ttl
+        message = json.dumps([[str(session_id), expires_at] for session_id in session_ids])
+        if settings.STATELESS_ACCESS_TOKENS:
+            self._add((session_id, expires_at) for session_id in session_ids)
+        
+        if redis_client.is_connected:
+            try:
+                pipe = redis_client.client.pipeline(transaction=False)
+                if settings.STATELESS_ACCESS_TOKENS:
+                    pipe.zadd(REVOCATION_KEY, {str(session_id): expires_at for session_id in session_ids})
+                    pipe.zremrangebyscore(REVOCATION_KEY, "-inf", now)
+                    pipe.expire(REVOCATION_KEY, self.ttl)
+                pipe.publish(REVOCATION_CHANNEL, message)
+                await pipe.execute()
+                return
+            except Exception as e:
+                logger.warning(f"Failed to publish session revocation: {e}")
+        
+        await pubsub_listener.dispatch(REVOCATION_CHANNEL, message)
+    
+    def handle_revocation(self, message: str) -> None:
+        """Apply a pub/sub revocation message to the local copy."""
+        self._add((uuid.UUID(session_id), expires_at) for session_id, expires_at in json.loads(message))
+    
+    async def reload(self) -> None:
+        """Rebuild the local copy from Redis and recently revoked sessions."""
+        self._loaded = False
+        if not settings.STATELESS_ACCESS_TOKENS:
+            return
+        
+        now = time.time()
+        
+        entries = await redis_client.client.zrangebyscore(
+            REVOCATION_KEY, now, "+inf", withscores=True
+        )
+        local = {uuid.UUID(session_id): expires_at for session_id, expires_at in entries}
+        
+        # Revocations made while Redis was unreachable were never published
+        async with async_session_factory() as db:
+            result = await db.execute(
+                select(Session.id, Session.revoked_at)
+                .where(Session.revoked == True)
+                .where(Session.revoked_at >= datetime.fromtimestamp(now - self.ttl, tz=timezone.utc))
+            )
+            for session_id, revoked_at in result.all():
+                expires_at = _timestamp(revoked_at) + self.ttl
+                local[session_id] = max(local.get(session_id, 0.0), expires_at)
+        
+        self._local = local
+        self._loaded = True
+        logger.info(f"Loaded {len(local)} revoked sessions")
+
+
+# Global revocation list instance (entries outlive any access token issued before revocation)
+revocation_list = RevocationList(ttl=settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+
+pubsub_listener.subscribe(
+    REVOCATION_CHANNEL,
+    revocation_list.handle_revocation,
+    on_reset=revocation_list.reload,
+)
+
+
+@event.listens_for(Session.revoked, "set")
+def _on_session_revoked(target: Session, value: bool, oldvalue, initiator) -> None:
+    """Add revoked sessions to the denylist once the transaction commits."""
+    if not value:
+        return
+    
+    db = object_session(target)
+    if db is None:
+        return
+    
+    db.info.setdefault(AFTER_COMMIT_KEY, []).append(
+        partial(revocation_list.revoke, target.id)
+    )
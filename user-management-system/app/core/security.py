@@ -1,17 +1,32 @@
 """Security utilities for JWT and password hashing."""
 
+import asyncio
 import logging
+from abc import ABC, abstractmethod
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Optional
+from typing import Any, Callable, List, Optional, TypeVar
 import hashlib
+import time
 import bcrypt
 
-from jose import JWTError, jwt
+from jose import JWTError, jwk, jwt
 
+from app.core.cache import TTLCache
 from app.core.config import settings
+from app.core.exceptions import ServiceUnavailableError
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
+# Worker pool for bcrypt (created lazily, shut down on application exit)
+_hash_executor: Optional[Executor] = None
+_hash_pending: int = 0
+
+# Separate process pool for bulk imports, so imports cannot starve logins
+_bulk_hash_executor: Optional[ProcessPoolExecutor] = None
+
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a plain password against a hash."""
@@ -32,6 +47,240 @@ def get_password_hash(password: str) -> str:
     return hashed.decode('utf-8')
 
 
+def _get_hash_executor() -> Executor:
+    """Get (or create) the password hashing worker pool."""
+    global _hash_executor
+    
+    if _hash_executor is None:
+        workers = max(1, settings.PASSWORD_HASH_WORKERS)
+        if settings.PASSWORD_HASH_EXECUTOR == "process":
+            _hash_executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            # bcrypt releases the GIL, so threads scale across cores as well
+            _hash_executor = ThreadPoolExecutor(
+                max_workers=workers,
+                thread_name_prefix="password-hash",
+            )
+    return _hash_executor
+
+
+async def _run_in_hash_pool(func: Callable[..., T], *args: Any) -> T:
+    """
+    Run a hashing function in the worker pool.
+    
+    Raises:
+        ServiceUnavailableError: If too many hashing jobs are already queued
+    """
+    global _hash_pending
+    
+    if _hash_pending >= settings.PASSWORD_HASH_MAX_PENDING:
+        logger.warning(f"Password hashing pool saturated ({_hash_pending} pending)")
+        raise ServiceUnavailableError("Server is busy, please retry shortly")
+    
+    _hash_pending += 1
+    try:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_get_hash_executor(), func, *args)
+    finally:
+        _hash_pending -= 1
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a plain password against a hash without blocking the event loop."""
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Generate password hash without blocking the event loop."""
+    return await _run_in_hash_pool(get_password_hash, password)
+
+
+def get_password_hashes(passwords: List[str]) -> List[str]:
+    """Generate password hashes for a batch of passwords."""
+    return [get_password_hash(password) for password in passwords]
+
+
+async def get_password_hashes_async(passwords: List[str]) -> List[str]:
+    """
+    Hash a batch of passwords in the bulk hashing process pool.
+    
+    The batch is split evenly across the pool's worker processes, so
+    each process receives a single chunk.
+    """
+    global _bulk_hash_executor
+    
+    if not passwords:
+        return []
+    
+    workers = max(1, settings.IMPORT_HASH_WORKERS)
+    if _bulk_hash_executor is None:
+        _bulk_hash_executor = ProcessPoolExecutor(max_workers=workers)
+    
+    size = -(-len(passwords) // workers)
+    loop = asyncio.get_running_loop()
+    chunks = await asyncio.gather(*(
+        loop.run_in_executor(_bulk_hash_executor, get_password_hashes, passwords[i:i + size])
+        for i in range(0, len(passwords), size)
+    ))
+    return [hashed for chunk in chunks for hashed in chunk]
+
+
+def shutdown_hash_executor() -> None:
+    """Shut down the password hashing worker pools."""
+    global _hash_executor, _bulk_hash_executor
+    
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=False, cancel_futures=True)
+        _hash_executor = None
+    
+    if _bulk_hash_executor is not None:
+        _bulk_hash_executor.shutdown(wait=False, cancel_futures=True)
+        _bulk_hash_executor = None
+
+
+class TokenCodec(ABC):
+    """
+    Interface for JWT encoding and signature verification.
+    
+    Implementations must validate the signature and the exp claim.
+    """
+    
+    @abstractmethod
+    def encode(self, claims: dict[str, Any]) -> str:
+        """Sign claims into a token."""
+    
+    @abstractmethod
+    def decode(self, token: str) -> Optional[dict[str, Any]]:
+        """Verify a token and return its claims, or None if invalid."""
+    
+    def jwks(self) -> dict[str, Any]:
+        """Get the public verification keys as a JWK Set."""
+        return {"keys": []}
+
+
+class JoseTokenCodec(TokenCodec):
+    """Token codec backed by python-jose."""
+    
+    def __init__(self, secret_key: str, algorithm: str):
+        self.secret_key = secret_key
+        self.algorithm = algorithm
+    
+    def encode(self, claims: dict[str, Any]) -> str:
+        return jwt.encode(claims, self.secret_key, algorithm=self.algorithm)
+    
+    def decode(self, token: str) -> Optional[dict[str, Any]]:
+        try:
+            return jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+        except JWTError:
+            return None
+
+
+class KeySetTokenCodec(TokenCodec):
+    """
+    Asymmetric (RS*/ES*) token codec with key rotation.
+    
+    Tokens are signed with the active private key and carry its kid in
+    the header; they are verified with the public key matching their
+    kid, so tokens signed with a retired key remain valid until they
+    expire as long as its public key is still configured.
+    """
+    
+    def __init__(
+        self,
+        algorithm: str,
+        signing_kid: str,
+        signing_key_pem: str,
+        verification_keys_pem: Optional[dict[str, str]] = None,
+    ):
+        self.algorithm = algorithm
+        self.signing_kid = signing_kid
+        self._signing_key = jwk.construct(signing_key_pem, algorithm)
+        
+        self._verification_keys = {
+            kid: jwk.construct(pem, algorithm).public_key()
+            for kid, pem in (verification_keys_pem or {}).items()
+        }
+        self._verification_keys[signing_kid] = self._signing_key.public_key()
+        
+        self._jwks = {
+            "keys": [
+                {**key.to_dict(), "kid": kid, "use": "sig"}
+                for kid, key in self._verification_keys.items()
+            ]
+        }
+    
+    def encode(self, claims: dict[str, Any]) -> str:
+        return jwt.encode(
+            claims,
+            self._signing_key,
+            algorithm=self.algorithm,
+            headers={"kid": self.signing_kid},
+        )
+    
+    def decode(self, token: str) -> Optional[dict[str, Any]]:
+        try:
+            kid = jwt.get_unverified_header(token).get("kid")
+            key = self._verification_keys.get(kid)
+            if key is None:
+                return None
+            return jwt.decode(token, key, algorithms=[self.algorithm])
+        except JWTError:
+            return None
+    
+    def jwks(self) -> dict[str, Any]:
+        return self._jwks
+
+
+def _read_key_file(path: str) -> str:
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+
+def build_token_codec() -> TokenCodec:
+    """Build the token codec configured by JWT settings."""
+    if settings.ALGORITHM.startswith("HS"):
+        return JoseTokenCodec(settings.SECRET_KEY, settings.ALGORITHM)
+    
+    return KeySetTokenCodec(
+        algorithm=settings.ALGORITHM,
+        signing_kid=settings.JWT_KEY_ID,
+        signing_key_pem=_read_key_file(settings.JWT_PRIVATE_KEY_FILE),
+        verification_keys_pem={
+            kid: _read_key_file(path)
+            for kid, path in settings.jwt_public_key_files.items()
+        },
+    )
+
+
+_token_codec: TokenCodec = build_token_codec()
+
+# Verified payloads keyed by token digest; _INVALID_TOKEN marks rejected tokens.
+# Only accessed from the event loop.
+_INVALID_TOKEN: dict[str, Any] = {}
+_token_cache: TTLCache[dict[str, Any]] = TTLCache(
+    maxsize=settings.TOKEN_CACHE_SIZE,
+    ttl=settings.TOKEN_NEGATIVE_CACHE_TTL_SECONDS,
+)
+
+
+def get_token_codec() -> TokenCodec:
+    """Get the active token codec."""
+    return _token_codec
+
+
+def set_token_codec(codec: TokenCodec) -> None:
+    """Replace the active token codec and drop cached verifications."""
+    global _token_codec
+    
+    _token_codec = codec
+    clear_token_cache()
+
+
+def clear_token_cache() -> None:
+    """Drop all cached token verifications."""
+    _token_cache.clear()
+
+
 def create_access_token(
     data: dict[str, Any],
     expires_delta: Optional[timedelta] = None,
@@ -54,18 +303,12 @@ def create_access_token(
         expire = datetime.now(timezone.utc) + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     
     to_encode.update({
-        "exp": expire,
-        "iat": datetime.now(timezone.utc),
+        "exp": int(expire.timestamp()),
+        "iat": int(datetime.now(timezone.utc).timestamp()),
         "type": "access",
     })
     
-    encoded_jwt = jwt.encode(
-        to_encode,
-        settings.SECRET_KEY,
-        algorithm=settings.ALGORITHM,
-    )
-    
-    return encoded_jwt
+    return _token_codec.encode(to_encode)
 
 
 def create_refresh_token(
@@ -90,39 +333,52 @@ def create_refresh_token(
         expire = datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
     
     to_encode.update({
-        "exp": expire,
-        "iat": datetime.now(timezone.utc),
+        "exp": int(expire.timestamp()),
+        "iat": int(datetime.now(timezone.utc).timestamp()),
         "type": "refresh",
     })
     
-    encoded_jwt = jwt.encode(
-        to_encode,
-        settings.SECRET_KEY,
-        algorithm=settings.ALGORITHM,
-    )
-    
-    return encoded_jwt
+    return _token_codec.encode(to_encode)
 
 
 def decode_token(token: str) -> Optional[dict[str, Any]]:
     """
     Decode and validate JWT token.
     
+    Verified payloads are cached by token digest until the token's exp,
+    and rejected tokens for TOKEN_NEGATIVE_CACHE_TTL_SECONDS, so a token
+    reused across requests is only verified once.
+    
     Args:
         token: JWT token string
         
     Returns:
         Decoded payload or None if invalid
     """
-    try:
-        payload = jwt.decode(
-            token,
-            settings.SECRET_KEY,
-            algorithms=[settings.ALGORITHM],
-        )
-        return payload
-    except JWTError:
+    if not settings.TOKEN_CACHE_ENABLED:
+        return _token_codec.decode(token)
+    
+    key = hashlib.sha256(token.encode()).digest()
+    cached = _token_cache.get(key)
+    if cached is not None:
+        if cached is _INVALID_TOKEN:
+            return None
+        return dict(cached)
+    
+    payload = _token_codec.decode(token)
+    
+    if payload is None:
+        _token_cache.set(key, _INVALID_TOKEN)
         return None
+    
+    exp = payload.get("exp")
+    if isinstance(exp, (int, float)):
+        ttl = exp - time.time()
+        if ttl > 0:
+            _token_cache.set(key, payload, ttl=ttl)
+            return dict(payload)
+    
+    return payload
 
 
 def hash_token(token: str) -> str:
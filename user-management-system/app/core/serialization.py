@@ -0,0 +1,93 @@
+"""Single-pass JSON response serialization."""
+
+import functools
+import inspect
+from typing import Any, Callable, Optional
+
+from fastapi import Response
+from fastapi.routing import APIRoute
+from pydantic import TypeAdapter
+
+
+# Name of the parameter added to endpoints that do not take a Response
+RESPONSE_PARAM = "_fast_json_response"
+
+
+class FastJSONRoute(APIRoute):
+    """
+    Route class that validates a response once and writes JSON bytes.
+    
+    By default FastAPI dumps returned models back to dicts, validates
+    them against the response_model and then encodes the result. Routes
+    of this class validate whatever the endpoint returns (dicts, Core
+    rows' dicts, ORM objects or models) against the response model's
+    TypeAdapter in one pass, reading attributes directly, and serialize
+    it with pydantic-core's dump_json. An instance of the response model
+    itself is serialized without validation.
+    
+    Opt in per router with APIRouter(route_class=FastJSONRoute).
+    Endpoints returning a Response, and routes without a response model,
+    behave as usual. Headers and status codes set on an injected
+    Response parameter are kept.
+    """
+    
+    def __init__(self, path: str, endpoint: Callable[..., Any], **kwargs: Any):
+        if inspect.iscoroutinefunction(endpoint):
+            endpoint = self._wrap(endpoint)
+        super().__init__(path, endpoint, **kwargs)
+        
+        self._adapter: Optional[TypeAdapter] = None
+        if self.response_model is not None:
+            self._adapter = TypeAdapter(self.response_model)
+    
+    def _wrap(self, endpoint: Callable[..., Any]) -> Callable[..., Any]:
+        signature = inspect.signature(endpoint)
+        response_param = next(
+            (name for name, param in signature.parameters.items() if param.annotation is Response),
+            None,
+        )
+        
+        # Ask FastAPI for the Response it collects headers and cookies on
+        added = response_param is None
+        if added:
+            response_param = RESPONSE_PARAM
+            signature = signature.replace(parameters=[
+                *signature.parameters.values(),
+                inspect.Parameter(RESPONSE_PARAM, inspect.Parameter.KEYWORD_ONLY, annotation=Response),
+            ])
+        
+        @functools.wraps(endpoint)
+        async def wrapper(**kwargs: Any) -> Any:
+            sub_response = kwargs.pop(response_param) if added else kwargs[response_param]
+            value = await endpoint(**kwargs)
+            if isinstance(value, Response) or self._adapter is None:
+                return value
+            return self._render(value, sub_response)
+        
+        wrapper.__signature__ = signature
+        return wrapper
+    
+    def _render(self, value: Any, sub_response: Response) -> Response:
+        if type(value) is not self.response_model:
+            value = self._adapter.validate_python(value, from_attributes=True)
+        
+        body = self._adapter.dump_json(
+            value,
+            include=self.response_model_include,
+            exclude=self.response_model_exclude,
+            by_alias=self.response_model_by_alias,
+            exclude_unset=self.response_model_exclude_unset,
+            exclude_defaults=self.response_model_exclude_defaults,
+            exclude_none=self.response_model_exclude_none,
+        )
+        
+        response = Response(
+            content=body,
+            status_code=sub_response.status_code or self.status_code or 200,
+            media_type="application/json",
+        )
+        response.raw_headers.extend(
+            (name, header) for name, header in sub_response.raw_headers
+            if name != b"content-length"
+        )
+        return response
@@ -0,0 +1,158 @@
+"""Redis-backed cache of authentication session validity."""
+
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from functools import partial
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import object_session
+
+from app.core.config import settings
+from app.core.database import AFTER_COMMIT_KEY
+from app.core.redis import redis_client
+from app.models.session import Session
+
+logger = logging.getLogger(__name__)
+
+
+SESSION_CACHE_PREFIX = "session:state:"
+
+
+def _timestamp(value: datetime) -> float:
+    """Convert a (possibly naive UTC) datetime to a Unix timestamp."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+@dataclass(frozen=True)
+class CachedSession:
+    """Cached validity state of a session."""
+    
+    user_id: uuid.UUID
+    revoked: bool
+    expires_at: float  # Unix timestamp
+    
+    @property
+    def is_active(self) -> bool:
+        """Check if session is active (not revoked and not expired)."""
+        return not self.revoked and time.time() < self.expires_at
+
+
+class SessionCache:
+    """
+    Cache of session revoked/expiry state keyed by session ID.
+    
+    Lets get_current_user validate a session without querying the
+    sessions table. All operations degrade to a cache miss when Redis
+    is unavailable.
+    
+    Active states are only written if the key is absent, while revoked
+    states always overwrite, so a fill from a row read before a
+    concurrent revoke cannot replace the revoked entry.
+    """
+    
+    def __init__(self, ttl: int):
+        self.ttl = ttl
+    
+    @staticmethod
+    def _key(session_id: uuid.UUID) -> str:
+        return f"{SESSION_CACHE_PREFIX}{session_id}"
+    
+    @property
+    def enabled(self) -> bool:
+        return settings.SESSION_CACHE_ENABLED and redis_client.is_connected
+    
+    async def get(self, session_id: uuid.UUID) -> Optional[CachedSession]:
+        """Get cached session state, or None on a cache miss."""
+        if not self.enabled:
+            return None
+        
+        try:
+            raw = await redis_client.get(self._key(session_id))
+        except Exception as e:
+            logger.warning(f"Session cache read failed: {e}")
+            return None
+        
+        if not raw:
+            return None
+        
+        data = json.loads(raw)
+        return CachedSession(
+            user_id=uuid.UUID(data["user_id"]),
+            revoked=data["revoked"],
+            expires_at=data["expires_at"],
+        )
+    
+    async def _write(
+        self,
+        session_id: uuid.UUID,
+        user_id: uuid.UUID,
+        revoked: bool,
+        expires_at: float,
+    ) -> None:
+        if not self.enabled:
+            return
+        
+        ttl = self.ttl
+        if not revoked:
+            ttl = min(ttl, int(expires_at - time.time()))
+            if ttl <= 0:
+                return
+        
+        value = json.dumps({
+            "user_id": str(user_id),
+            "revoked": revoked,
+            "expires_at": expires_at,
+        })
+        try:
+            await redis_client.client.set(self._key(session_id), value, ex=ttl, nx=not revoked)
+        except Exception as e:
+            logger.warning(f"Session cache write failed: {e}")
+    
+    async def store(self, session: Session) -> None:
+        """Cache the state of a session; an active state never replaces a cached one."""
+        await self._write(
+            session.id,
+            session.user_id,
+            session.revoked,
+            _timestamp(session.expires_at),
+        )
+    
+    async def mark_revoked(
+        self,
+        session_id: uuid.UUID,
+        user_id: uuid.UUID,
+        expires_at: float,
+    ) -> None:
+        """Record that a session has been revoked."""
+        await self._write(session_id, user_id, True, expires_at)
+
+
+# Global session cache instance
+session_cache = SessionCache(ttl=settings.SESSION_CACHE_TTL_SECONDS)
+
+
+@event.listens_for(Session.revoked, "set")
+def _on_session_revoked(target: Session, value: bool, oldvalue, initiator) -> None:
+    """Propagate Session.revoke() to the cache once the transaction commits."""
+    if not value:
+        return
+    
+    db = object_session(target)
+    if db is None or target.expires_at is None:
+        return
+    
+    db.info.setdefault(AFTER_COMMIT_KEY, []).append(
+        partial(
+            session_cache.mark_revoked,
+            target.id,
+            target.user_id,
+            _timestamp(target.expires_at),
+        )
+    )
@@ -10,6 +10,9 @@ from fastapi.responses import JSONResponse
 from app.core.config import settings
 from app.core.database import close_db, check_db_connection
 from app.core.redis import redis_client
+from app.core.pubsub import pubsub_listener
+from app.core.rate_limit import RateLimitMiddleware
+from app.core.security import get_token_codec, shutdown_hash_executor
 from app.api.v1 import router as v1_router
 
 
@@ -23,6 +26,9 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     await redis_client.connect()
     print("Redis connected")
     
+    # Listen for cross-worker cache invalidations
+    await pubsub_listener.start()
+    
     # Check database connection
     db_ok = await check_db_connection()
     if db_ok:
@@ -39,12 +45,16 @@ async def lifespan(app: FastAPI) -> AsyncGenerator:
     print(f"Shutting down {settings.APP_NAME}...")
     
     # Disconnect Redis
+    await pubsub_listener.stop()
     await redis_client.disconnect()
     print("Redis disconnected")
     
     # Close database connections
     await close_db()
     print("Database connections closed")
+    
+    # Stop password hashing workers
+    shutdown_hash_executor()
 
 
 # Create FastAPI application
@@ -58,6 +68,19 @@ app = FastAPI(
     lifespan=lifespan,
 )
 
+# Add rate limiting middleware (added before CORS so 429s carry CORS headers)
+if settings.RATE_LIMIT_ENABLED:
+    app.add_middleware(
+        RateLimitMiddleware,
+        ip_limit=settings.RATE_LIMIT_PER_MINUTE,
+        user_limit=settings.RATE_LIMIT_USER_PER_MINUTE,
+        route_limits={
+            f"{settings.API_V1_PREFIX}/auth/login": settings.RATE_LIMIT_LOGIN_PER_MINUTE,
+            f"{settings.API_V1_PREFIX}/auth/register": settings.RATE_LIMIT_REGISTER_PER_MINUTE,
+        },
+        path_prefix=settings.API_V1_PREFIX,
+    )
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -105,6 +128,16 @@ async def health_check():
     }
 
 
+# JWKS endpoint for local token verification by other services
+@app.get("/.well-known/jwks.json", tags=["Auth"])
+async def jwks():
+    """Get public keys for verifying access tokens."""
+    return JSONResponse(
+        content=get_token_codec().jwks(),
+        headers={"Cache-Control": f"public, max-age={settings.JWKS_CACHE_MAX_AGE_SECONDS}"},
+    )
+
+
 # Root endpoint
 @app.get("/", tags=["Root"])
 async def root():
@@ -13,7 +13,7 @@ from app.models.enums import (
 from app.models.user import User
 from app.models.role import Role, Permission, RolePermission, UserRole
 from app.models.session import Session
-from app.models.notification import Notification
+from app.models.notification import BroadcastNotification, BroadcastReceipt, Notification
 from app.models.audit import AuditLog
 
 __all__ = [
@@ -40,5 +40,7 @@ __all__ = [
     "UserRole",
     "Session",
     "Notification",
+    "BroadcastNotification",
+    "BroadcastReceipt",
     "AuditLog",
 ]
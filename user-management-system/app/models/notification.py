@@ -109,3 +109,92 @@ class Notification(Base, UUIDMixin):
     
     def __repr__(self) -> str:
         return f"<Notification(id={self.id}, user_id={self.user_id}, type={self.type})>"
+
+
+class BroadcastNotification(Base, UUIDMixin):
+    """
+    Notification broadcast to all users.
+    
+    Stored once rather than copied per user: every user created before
+    the broadcast sees it among their notifications, and their read or
+    dismissed state is kept in a BroadcastReceipt only once they act on it.
+    """
+    
+    __tablename__ = "broadcast_notifications"
+    
+    title: Mapped[str] = mapped_column(
+        String(200),
+        nullable=False,
+    )
+    
+    message: Mapped[str] = mapped_column(
+        Text,
+        nullable=False,
+    )
+    
+    priority: Mapped[NotificationPriority] = mapped_column(
+        SQLEnum(
+            NotificationPriority,
+            name="notification_priority",
+            create_constraint=False,
+            native_enum=True,
+            values_callable=lambda x: [e.value for e in x]
+        ),
+        default=NotificationPriority.NORMAL,
+        nullable=False,
+    )
+    
+    action_url: Mapped[Optional[str]] = mapped_column(
+        String(500),
+        nullable=True,
+    )
+    
+    metadata_: Mapped[dict] = mapped_column(
+        "metadata",
+        JSONType,
+        default=dict,
+        nullable=False,
+    )
+    
+    created_by: Mapped[Optional[uuid.UUID]] = mapped_column(
+        ForeignKey("users.id", ondelete="SET NULL"),
+        nullable=True,
+    )
+    
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False,
+        index=True,
+    )
+    
+    def __repr__(self) -> str:
+        return f"<BroadcastNotification(id={self.id}, title={self.title})>"
+
+
+class BroadcastReceipt(Base):
+    """A user's read / dismissed state of a broadcast notification."""
+    
+    __tablename__ = "broadcast_receipts"
+    
+    user_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    
+    broadcast_id: Mapped[uuid.UUID] = mapped_column(
+        ForeignKey("broadcast_notifications.id", ondelete="CASCADE"),
+        primary_key=True,
+        index=True,
+    )
+    
+    read_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+    
+    # Deleted by the user, or excluded from the broadcast
+    dismissed_at: Mapped[Optional[datetime]] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
@@ -136,6 +136,7 @@ class User(Base, UUIDMixin, TimestampMixin, SoftDeleteMixin):
     __table_args__ = (
         Index("ix_users_email_not_deleted", "email", postgresql_where="deleted_at IS NULL"),
         Index("ix_users_status_not_deleted", "status", postgresql_where="deleted_at IS NULL"),
+        Index("ix_users_created_at_id", "created_at", "id"),
     )
     
     @property
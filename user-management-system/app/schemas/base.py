@@ -69,30 +69,44 @@ T = TypeVar("T")
 
 
 class PaginatedResponse(BaseModel, Generic[T]):
-    """Paginated response schema."""
+    """
+    Paginated response schema.
+    
+    page is None when the page was requested by cursor. When
+    total_is_estimate is set, total (and pages) are approximate.
+    """
     
     items: List[T]
     total: int
-    page: int
+    total_is_estimate: bool = False
+    page: Optional[int]
     page_size: int
     pages: int
+    next_cursor: Optional[str] = None
+    prev_cursor: Optional[str] = None
     
     @classmethod
     def create(
         cls,
         items: List[T],
         total: int,
-        page: int,
+        page: Optional[int],
         page_size: int,
+        next_cursor: Optional[str] = None,
+        prev_cursor: Optional[str] = None,
+        total_is_estimate: bool = False,
     ) -> "PaginatedResponse[T]":
         """Create paginated response."""
         pages = (total + page_size - 1) // page_size if page_size > 0 else 0
         return cls(
             items=items,
             total=total,
+            total_is_estimate=total_is_estimate,
             page=page,
             page_size=page_size,
             pages=pages,
+            next_cursor=next_cursor,
+            prev_cursor=prev_cursor,
         )
 
 
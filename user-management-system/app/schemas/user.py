@@ -1,7 +1,7 @@
 """User Pydantic schemas."""
 
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, List, Literal, Optional
 from uuid import UUID
 
 from pydantic import BaseModel, EmailStr, Field, field_validator
@@ -93,7 +93,7 @@ class PasswordResetConfirm(BaseSchema):
 class UserResponse(IDSchema, TimestampSchema):
     """Schema for user response."""
     
-    email: EmailStr
+    email: str  # Output only; validated on the way in
     username: Optional[str]
     first_name: Optional[str]
     last_name: Optional[str]
@@ -115,7 +115,7 @@ class UserResponse(IDSchema, TimestampSchema):
 class UserResponseBrief(IDSchema):
     """Brief user response for lists."""
     
-    email: EmailStr
+    email: str  # Output only; validated on the way in
     username: Optional[str]
     first_name: Optional[str]
     last_name: Optional[str]
@@ -128,6 +128,79 @@ class UserWithRoles(UserResponse):
     roles: List["RoleResponseBrief"] = []
 
 
+# Maximum number of users addressed by one bulk request
+BULK_MAX_USER_IDS = 5000
+
+
+class BulkUserIds(BaseSchema):
+    """Users addressed by a bulk operation."""
+    
+    user_ids: List[UUID] = Field(..., min_length=1, max_length=BULK_MAX_USER_IDS)
+
+
+class BulkStatusUpdate(BulkUserIds):
+    """Schema for changing the status of many users."""
+    
+    status: UserStatus
+
+
+class BulkRoleUpdate(BulkUserIds):
+    """Schema for assigning a role to (or removing it from) many users."""
+    
+    role_id: UUID
+    action: Literal["assign", "remove"] = "assign"
+    expires_at: Optional[datetime] = None
+
+
+class BulkUserResult(BaseModel):
+    """Outcome of a bulk operation for one user."""
+    
+    id: UUID
+    outcome: Literal["updated", "unchanged", "not_found"]
+
+
+class BulkOperationResponse(BaseModel):
+    """Per-user outcomes of a bulk operation."""
+    
+    results: List[BulkUserResult]
+    counts: Dict[str, int]
+    
+    @classmethod
+    def create(cls, outcomes: Dict[UUID, str]) -> "BulkOperationResponse":
+        """Create response from outcomes keyed by user ID."""
+        counts: Dict[str, int] = {}
+        for outcome in outcomes.values():
+            counts[outcome] = counts.get(outcome, 0) + 1
+        return cls(
+            results=[BulkUserResult(id=id, outcome=outcome) for id, outcome in outcomes.items()],
+            counts=counts,
+        )
+
+
+class UserImportRowError(BaseModel):
+    """Problem with one row of a user import."""
+    
+    row: int = Field(..., description="1-based row number (excluding a CSV header)")
+    field: Optional[str] = None
+    message: str
+
+
+class UserImportJobResponse(BaseModel):
+    """Progress and error report of a user import job."""
+    
+    id: UUID
+    status: str = Field(..., description="pending, running, completed or failed")
+    format: str
+    processed: int = 0
+    created: int = 0
+    failed: int = 0
+    errors: List[UserImportRowError] = []
+    errors_truncated: bool = False
+    error: Optional[str] = None
+    created_at: datetime
+    finished_at: Optional[datetime] = None
+
+
 # Forward reference
 from app.schemas.role import RoleResponseBrief
 UserWithRoles.model_rebuild()
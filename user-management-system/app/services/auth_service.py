@@ -1,26 +1,31 @@
 """Authentication service."""
 
 from datetime import datetime, timedelta, timezone
+from functools import partial
 from typing import Optional, Tuple
 import uuid
 
-from sqlalchemy import select
+from sqlalchemy import select, update
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload
+from sqlalchemy.orm import aliased, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
+from app.core.activity import activity_buffer
 from app.core.config import settings
+from app.core.database import after_commit
 from app.core.security import (
     create_access_token,
     create_refresh_token,
     decode_token,
-    get_password_hash,
+    get_password_hash_async,
     hash_token,
-    verify_password,
+    verify_password_async,
 )
+from app.core.principal import Principal, principal_cache
+from app.core.session_cache import session_cache
 from app.core.exceptions import (
     AuthenticationError,
     BadRequestError,
-    ConflictError,
     NotFoundError,
     UserInactiveError,
 )
@@ -34,6 +39,7 @@ from app.schemas.auth import (
     LoginResponse,
 )
 from app.schemas.user import UserResponse
+from app.services.user_service import UserService
 
 
 class AuthService:
@@ -58,38 +64,17 @@ class AuthService:
             Created user
             
         Raises:
-            ConflictError: If email already exists
+            ConflictError: If email or username already exists
         """
-        # Check if email already exists
-        result = await self.db.execute(
-            select(User).where(User.email == data.email.lower())
-        )
-        if result.scalar_one_or_none():
-            raise ConflictError("Email already registered")
-        
-        # Check if username already exists
-        if data.username:
-            result = await self.db.execute(
-                select(User).where(User.username == data.username.lower())
-            )
-            if result.scalar_one_or_none():
-                raise ConflictError("Username already taken")
-        
-        # Create user
-        user = User(
+        return await UserService(self.db).insert_user(
             email=data.email.lower(),
             username=data.username.lower() if data.username else None,
-            password_hash=get_password_hash(data.password),
+            password_hash=await get_password_hash_async(data.password),
             first_name=data.first_name,
             last_name=data.last_name,
             status=UserStatus.PENDING_VERIFICATION,
             email_verified=False,
         )
-        
-        self.db.add(user)
-        await self.db.flush()
-        
-        return user
     
     async def login(
         self,
@@ -124,7 +109,7 @@ class AuthService:
             raise AuthenticationError("Invalid email or password")
         
         # Verify password
-        if not verify_password(data.password, user.password_hash):
+        if not await verify_password_async(data.password, user.password_hash):
             raise AuthenticationError("Invalid email or password")
         
         # Check user status
@@ -146,11 +131,32 @@ class AuthService:
             user_agent=user_agent,
         )
         
-        # Update last login
-        user.last_login_at = datetime.now(timezone.utc)
+        # Update last login (write-behind when buffered; the response
+        # still shows the new value without dirtying the users row)
+        now = datetime.now(timezone.utc)
+        if activity_buffer.enabled:
+            set_committed_value(user, "last_login_at", now)
+            after_commit(self.db, partial(activity_buffer.record_login, user.id, now))
+        else:
+            user.last_login_at = now
         
         return user, tokens, session
     
+    @staticmethod
+    def _create_access_token(
+        user_id: uuid.UUID,
+        session_id: uuid.UUID,
+        email: Optional[str],
+    ) -> str:
+        """Create access token for a session."""
+        return create_access_token(
+            data={
+                "sub": str(user_id),
+                "session_id": str(session_id),
+                "email": email,
+            }
+        )
+    
     async def _create_session(
         self,
         user: User,
@@ -164,19 +170,14 @@ class AuthService:
         session_id = uuid.uuid4()
         
         # Create access token
-        access_token = create_access_token(
-            data={
-                "sub": str(user.id),
-                "session_id": str(session_id),
-                "email": user.email,
-            }
-        )
+        access_token = self._create_access_token(user.id, session_id, user.email)
         
-        # Create refresh token
+        # Create refresh token (carries email so refresh needn't read users)
         refresh_token = create_refresh_token(
             data={
                 "sub": str(user.id),
                 "session_id": str(session_id),
+                "email": user.email,
             }
         )
         
@@ -205,6 +206,9 @@ class AuthService:
         self.db.add(session)
         await self.db.flush()
         
+        # Warm the session cache once the session is committed
+        after_commit(self.db, partial(session_cache.store, session))
+        
         tokens = TokenResponse(
             access_token=access_token,
             refresh_token=refresh_token,
@@ -240,58 +244,74 @@ class AuthService:
         if payload.get("type") != "refresh":
             raise AuthenticationError("Invalid token type")
         
-        # Get session
-        session_id = payload.get("session_id")
-        if not session_id:
+        try:
+            session_id = uuid.UUID(payload["session_id"])
+            user_id = uuid.UUID(payload["sub"])
+        except (KeyError, TypeError, ValueError):
             raise AuthenticationError("Invalid token")
         
-        result = await self.db.execute(
-            select(Session)
-            .where(Session.id == uuid.UUID(session_id))
-            .where(Session.revoked == False)
-        )
-        session = result.scalar_one_or_none()
-        
-        if not session:
-            raise AuthenticationError("Session not found or revoked")
+        # The new access token is minted up front from the refresh token's
+        # claims so validation and rotation happen in a single UPDATE
+        email = payload.get("email")
+        access_token = self._create_access_token(user_id, session_id, email)
         
-        if not session.is_active:
-            raise AuthenticationError("Session expired")
+        now = datetime.now(timezone.utc)
+        values = {"token_hash": hash_token(access_token)}
+        if ip_address:
+            values["ip_address"] = ip_address
         
-        # Verify token hash
-        if session.refresh_token_hash != hash_token(refresh_token):
-            raise AuthenticationError("Invalid refresh token")
+        # last_activity is written behind when the activity buffer is up
+        buffered = activity_buffer.enabled
+        if not buffered:
+            values["last_activity"] = now
         
-        # Get user
+        # SQLite cannot return columns of UPDATE ... FROM tables, so the
+        # email is read through a correlated alias
+        user_email = aliased(User)
         result = await self.db.execute(
-            select(User)
-            .where(User.id == session.user_id)
+            update(Session)
+            .where(Session.id == session_id)
+            .where(Session.user_id == user_id)
+            .where(Session.revoked == False)
+            .where(Session.expires_at > now)
+            .where(Session.refresh_token_hash == hash_token(refresh_token))
+            .where(User.id == Session.user_id)
             .where(User.deleted_at.is_(None))
+            .where(User.status == UserStatus.ACTIVE)
+            .values(**values)
+            .returning(
+                select(user_email.email)
+                .where(user_email.id == Session.user_id)
+                .scalar_subquery()
+            )
+            .execution_options(synchronize_session=False)
         )
-        user = result.scalar_one_or_none()
+        current_email = result.scalar_one_or_none()
         
-        if not user or user.status != UserStatus.ACTIVE:
-            raise AuthenticationError("User not found or inactive")
+        if current_email is None:
+            raise AuthenticationError("Invalid refresh token")
         
-        # Create new access token
-        access_token = create_access_token(
-            data={
-                "sub": str(user.id),
-                "session_id": str(session.id),
-                "email": user.email,
-            }
-        )
+        if buffered:
+            after_commit(
+                self.db,
+                partial(activity_buffer.record_session_activity, session_id, now),
+            )
         
-        access_expires_at = datetime.now(timezone.utc) + timedelta(
+        # Refresh tokens issued before the email claim, or after an email
+        # change, need the access token re-minted with the current email
+        if current_email != email:
+            access_token = self._create_access_token(user_id, session_id, current_email)
+            await self.db.execute(
+                update(Session)
+                .where(Session.id == session_id)
+                .values(token_hash=hash_token(access_token))
+                .execution_options(synchronize_session=False)
+            )
+        
+        access_expires_at = now + timedelta(
             minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES
         )
         
-        # Update session
-        session.token_hash = hash_token(access_token)
-        session.update_activity()
-        if ip_address:
-            session.ip_address = ip_address
-        
         return TokenResponse(
             access_token=access_token,
             refresh_token=refresh_token,
@@ -301,7 +321,7 @@ class AuthService:
     
     async def logout(
         self,
-        user: User,
+        user: Principal,
         session_id: Optional[uuid.UUID] = None,
         all_devices: bool = False,
     ) -> int:
@@ -376,4 +396,6 @@ class AuthService:
         user.email_verified = True
         user.status = UserStatus.ACTIVE
         
+        after_commit(self.db, partial(principal_cache.invalidate, user.id))
+        
         return user
@@ -0,0 +1,312 @@
+"""Bulk user import from CSV and NDJSON uploads."""
+
+import asyncio
+import csv
+import io
+import itertools
+import json
+import logging
+import uuid
+from datetime import datetime, timezone
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional, Set, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy import (
+    Column,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    delete,
+    literal,
+    select,
+    true,
+)
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine
+
+from app.core.config import settings
+from app.core.database import dialect_insert
+from app.core.jobs import job_store
+from app.core.security import get_password_hashes_async
+from app.models.base import GUID, JSONType
+from app.models.enums import UserStatus
+from app.models.user import User
+from app.schemas.user import UserCreate
+
+logger = logging.getLogger(__name__)
+
+
+IMPORT_FORMATS = {
+    "text/csv": "csv",
+    "application/x-ndjson": "ndjson",
+    "application/jsonl": "ndjson",
+}
+
+# Per-connection scratch table the rows of one batch are copied into
+# before being merged into users (not part of the application metadata)
+import_staging = Table(
+    "user_import_staging",
+    MetaData(),
+    Column("row_number", Integer, primary_key=True),
+    Column("id", GUID(), nullable=False),
+    Column("email", String(255), nullable=False),
+    Column("username", String(50)),
+    Column("password_hash", String(255), nullable=False),
+    Column("first_name", String(100)),
+    Column("last_name", String(100)),
+    Column("phone", String(20)),
+    Column("locale", String(10), nullable=False),
+    Column("timezone", String(50), nullable=False),
+    prefixes=["TEMPORARY"],
+)
+
+STAGED_COLUMNS = [column.name for column in import_staging.columns]
+
+
+def _iter_csv(source: BinaryIO) -> Iterator[Tuple[int, Any]]:
+    """Yield (row number, record) pairs from a CSV file with a header row."""
+    reader = csv.DictReader(io.TextIOWrapper(source, encoding="utf-8-sig", newline=""))
+    for row_number, record in enumerate(reader, start=1):
+        # Empty cells mean "not provided", so schema defaults apply
+        yield row_number, {key: value for key, value in record.items() if key and value}
+
+
+def _iter_ndjson(source: BinaryIO) -> Iterator[Tuple[int, Any]]:
+    """Yield (row number, record) pairs from a newline-delimited JSON file."""
+    for row_number, line in enumerate(io.TextIOWrapper(source, encoding="utf-8"), start=1):
+        if not line.strip():
+            continue
+        try:
+            yield row_number, json.loads(line)
+        except json.JSONDecodeError as e:
+            yield row_number, e
+
+
+class UserImportService:
+    """
+    Creates users in bulk from an uploaded file.
+    
+    Rows are validated with the same rules as POST /users and processed
+    in batches of IMPORT_BATCH_SIZE: each batch is parsed and validated
+    in a worker thread, passwords are hashed in a process pool, the
+    batch is copied into a temporary staging table, and email and
+    username conflicts are resolved with set-based queries before a
+    single INSERT ... SELECT. Every batch commits on its own, so rows of
+    completed batches stay imported if a later batch fails.
+    """
+    
+    def __init__(self, bind: AsyncEngine):
+        self.bind = bind
+        self._seen_emails: Dict[str, int] = {}
+        self._seen_usernames: Dict[str, int] = {}
+    
+    async def run(self, job: Dict[str, Any], source: BinaryIO) -> None:
+        """
+        Import every row of source, recording progress in the job.
+        
+        Args:
+            job: Job record created by the job store
+            source: Uploaded file, positioned at the start
+        """
+        job["status"] = "running"
+        await job_store.save(job)
+        
+        rows = _iter_csv(source) if job["format"] == "csv" else _iter_ndjson(source)
+        
+        try:
+            async with self.bind.connect() as conn:
+                await conn.run_sync(import_staging.create)
+                await conn.commit()
+                try:
+                    while True:
+                        # Decoding and validation are CPU-bound and kept off the event loop
+                        processed, valid, errors = await asyncio.to_thread(self._read_batch, rows)
+                        if not processed:
+                            break
+                        await self._import_batch(conn, job, processed, valid, errors)
+                finally:
+                    await conn.rollback()
+                    await conn.run_sync(import_staging.drop)
+                    await conn.commit()
+        except Exception:
+            logger.exception(f"User import {job['id']} failed")
+            await job_store.finish(
+                job, error=f"Import stopped after {job['processed']} rows due to an internal error"
+            )
+            return
+        finally:
+            source.close()
+        
+        logger.info(
+            f"User import {job['id']} finished: {job['created']} created, "
+            f"{job['failed']} failed"
+        )
+        await job_store.finish(job)
+    
+    def _read_batch(
+        self,
+        rows: Iterator[Tuple[int, Any]],
+    ) -> Tuple[int, List[Tuple[int, UserCreate]], List[Dict[str, Any]]]:
+        """Read and validate the next IMPORT_BATCH_SIZE rows (blocking)."""
+        processed = 0
+        errors: List[Dict[str, Any]] = []
+        valid: List[Tuple[int, UserCreate]] = []
+        
+        for row_number, record in itertools.islice(rows, settings.IMPORT_BATCH_SIZE):
+            processed += 1
+            data = self._validate(row_number, record, errors)
+            if data is not None:
+                valid.append((row_number, data))
+        
+        return processed, valid, errors
+    
+    async def _import_batch(
+        self,
+        conn: AsyncConnection,
+        job: Dict[str, Any],
+        processed: int,
+        valid: List[Tuple[int, UserCreate]],
+        errors: List[Dict[str, Any]],
+    ) -> None:
+        created = 0
+        if valid:
+            hashes = await get_password_hashes_async([data.password for _, data in valid])
+            staged = [
+                (
+                    row_number,
+                    uuid.uuid4(),
+                    data.email.lower(),
+                    data.username,
+                    password_hash,
+                    data.first_name,
+                    data.last_name,
+                    data.phone,
+                    data.locale,
+                    data.timezone,
+                )
+                for (row_number, data), password_hash in zip(valid, hashes)
+            ]
+            created = await self._merge(conn, staged, errors)
+        
+        job["processed"] += processed
+        job["created"] += created
+        job["failed"] += len({error["row"] for error in errors})
+        
+        room = settings.IMPORT_MAX_REPORTED_ERRORS - len(job["errors"])
+        errors.sort(key=lambda error: error["row"])
+        job["errors"].extend(errors[:max(room, 0)])
+        job["errors_truncated"] = job["errors_truncated"] or len(errors) > room
+        await job_store.save(job)
+    
+    def _validate(
+        self,
+        row_number: int,
+        record: Any,
+        errors: List[Dict[str, Any]],
+    ) -> Optional[UserCreate]:
+        if isinstance(record, json.JSONDecodeError):
+            errors.append({"row": row_number, "field": None, "message": f"Invalid JSON: {record.msg}"})
+            return None
+        if not isinstance(record, dict):
+            errors.append({"row": row_number, "field": None, "message": "Row must be an object"})
+            return None
+        
+        try:
+            data = UserCreate.model_validate(record)
+        except ValidationError as e:
+            for error in e.errors():
+                errors.append({
+                    "row": row_number,
+                    "field": ".".join(str(part) for part in error["loc"]) or None,
+                    "message": error["msg"],
+                })
+            return None
+        
+        # Duplicates within the file are rejected in favour of the first row
+        for field, value, seen in (
+            ("email", data.email.lower(), self._seen_emails),
+            ("username", data.username, self._seen_usernames),
+        ):
+            if value is None:
+                continue
+            first_row = seen.setdefault(value, row_number)
+            if first_row != row_number:
+                errors.append({
+                    "row": row_number,
+                    "field": field,
+                    "message": f"Duplicate {field}, already used in row {first_row}",
+                })
+                return None
+        
+        return data
+    
+    async def _merge(
+        self,
+        conn: AsyncConnection,
+        staged: List[tuple],
+        errors: List[Dict[str, Any]],
+    ) -> int:
+        """Merge staged rows into users, returning the number of users created."""
+        await conn.execute(delete(import_staging))
+        
+        if conn.dialect.name == "postgresql":
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(
+                import_staging.name,
+                records=staged,
+                columns=STAGED_COLUMNS,
+            )
+        else:
+            await conn.execute(
+                import_staging.insert(),
+                [dict(zip(STAGED_COLUMNS, row)) for row in staged],
+            )
+        
+        users = User.__table__
+        rejected: Set[int] = set()
+        for field, message in (
+            ("email", "Email already registered"),
+            ("username", "Username already taken"),
+        ):
+            result = await conn.execute(
+                select(import_staging.c.row_number)
+                .join(users, users.c[field] == import_staging.c[field])
+            )
+            for (row_number,) in result:
+                if row_number not in rejected:
+                    rejected.add(row_number)
+                    errors.append({"row": row_number, "field": field, "message": message})
+        
+        if rejected:
+            await conn.execute(
+                delete(import_staging).where(import_staging.c.row_number.in_(rejected))
+            )
+        
+        now = datetime.now(timezone.utc)
+        columns = [name for name in STAGED_COLUMNS if name != "row_number"]
+        insert = dialect_insert(conn.dialect, users).from_select(
+            [*columns, "status", "email_verified", "metadata", "created_at", "updated_at"],
+            select(
+                *(import_staging.c[name] for name in columns),
+                literal(UserStatus.PENDING_VERIFICATION, users.c.status.type),
+                literal(False),
+                literal({}, JSONType()),
+                literal(now, users.c.created_at.type),
+                literal(now, users.c.updated_at.type),
+            # SQLite needs a WHERE clause to parse ON CONFLICT after a SELECT
+            ).where(true()),
+        ).on_conflict_do_nothing()
+        result = await conn.execute(insert)
+        created = result.rowcount
+        
+        # Rows that lost a race with users created since the conflict check
+        if created < len(staged) - len(rejected):
+            result = await conn.execute(
+                select(import_staging.c.row_number)
+                .where(import_staging.c.id.not_in(select(users.c.id)))
+            )
+            for (row_number,) in result:
+                errors.append({"row": row_number, "field": None, "message": "User already exists"})
+        
+        await conn.commit()
+        return created
@@ -0,0 +1,421 @@
+"""Notification service merging personal and broadcast notifications."""
+
+import uuid
+from datetime import datetime, timezone
+from functools import partial
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from sqlalchemy import Row, and_, case, delete, exists, func, insert, literal, select, union_all, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Subquery
+
+from app.core.counting import CountStrategy, Total, count_total
+from app.core.database import after_commit, dialect_insert, gather_reads, match_any
+from app.core.exceptions import AuthorizationError, NotFoundError
+from app.core.realtime import notification_fields, notification_hub
+from app.models.enums import NotificationPriority, NotificationType
+from app.models.notification import BroadcastNotification, BroadcastReceipt, Notification
+from app.models.user import User
+from app.schemas.notification import NotificationResponse
+
+
+# Columns of the merged notification listing: exactly the fields of NotificationResponse
+INBOX_FIELDS = tuple(NotificationResponse.model_fields)
+
+
+class NotificationService:
+    """
+    Service for a user's notifications.
+    
+    A user's notifications are their personal notifications plus every
+    broadcast sent since they signed up. Broadcasts are stored once
+    (fan-out on read) and merged into the user's listing with UNION ALL;
+    reading or deleting one records a BroadcastReceipt for that user
+    only, so sending a broadcast costs the same for any number of users.
+    """
+    
+    def __init__(self, db: AsyncSession):
+        self.db = db
+    
+    def _visible_broadcasts(self, user_id: uuid.UUID) -> Any:
+        """Condition for broadcasts sent since the user signed up."""
+        signed_up = select(User.created_at).where(User.id == user_id).scalar_subquery()
+        return BroadcastNotification.created_at >= signed_up
+    
+    def inbox(self, user_id: uuid.UUID) -> Subquery:
+        """The user's personal and broadcast notifications as one subquery of INBOX_FIELDS."""
+        personal = (
+            select(*(getattr(Notification, field) for field in INBOX_FIELDS))
+            .where(Notification.user_id == user_id)
+        )
+        
+        broadcast_columns = {
+            "id": BroadcastNotification.id,
+            "user_id": literal(user_id, Notification.user_id.type),
+            "title": BroadcastNotification.title,
+            "message": BroadcastNotification.message,
+            "type": literal(NotificationType.BROADCAST, Notification.type.type),
+            "priority": BroadcastNotification.priority,
+            "read": BroadcastReceipt.read_at.is_not(None),
+            "read_at": BroadcastReceipt.read_at,
+            "action_url": BroadcastNotification.action_url,
+            "created_at": BroadcastNotification.created_at,
+        }
+        broadcasts = (
+            select(*(broadcast_columns[field].label(field) for field in INBOX_FIELDS))
+            .select_from(BroadcastNotification)
+            .outerjoin(
+                BroadcastReceipt,
+                and_(
+                    BroadcastReceipt.broadcast_id == BroadcastNotification.id,
+                    BroadcastReceipt.user_id == user_id,
+                ),
+            )
+            .where(self._visible_broadcasts(user_id))
+            .where(BroadcastReceipt.dismissed_at.is_(None))
+        )
+        
+        return union_all(personal, broadcasts).subquery("inbox")
+    
+    async def list_notifications(
+        self,
+        user_id: uuid.UUID,
+        page: int = 1,
+        page_size: int = 20,
+        is_read: Optional[bool] = None,
+        type: Optional[NotificationType] = None,
+        count_strategy: CountStrategy = CountStrategy.EXACT,
+    ) -> Tuple[List[Row], Total]:
+        """
+        List a user's notifications, newest first.
+        
+        Args:
+            user_id: User ID
+            page: Page number (1-based)
+            page_size: Items per page
+            is_read: Filter by read status
+            type: Filter by type
+            count_strategy: How the total count is computed
+        
+        Returns:
+            Tuple of (notification rows, total count)
+        """
+        inbox = self.inbox(user_id)
+        filters = []
+        if is_read is not None:
+            filters.append(inbox.c.read == is_read)
+        if type:
+            filters.append(inbox.c.type == type)
+        
+        query = (
+            select(inbox)
+            .where(*filters)
+            .order_by(inbox.c.created_at.desc(), inbox.c.id.desc())
+            .offset((page - 1) * page_size)
+            .limit(page_size)
+        )
+        
+        result, total = await gather_reads(
+            self.db,
+            lambda session: session.execute(query),
+            lambda session: count_total(session, select(inbox.c.id).where(*filters), count_strategy),
+        )
+        return list(result), total
+    
+    async def get_stats(self, user_id: uuid.UUID) -> Tuple[int, int, Dict[str, int]]:
+        """
+        Get a user's notification statistics in one query.
+        
+        Returns:
+            Tuple of (total, unread, count by type)
+        """
+        inbox = self.inbox(user_id)
+        result = await self.db.execute(
+            select(
+                inbox.c.type,
+                func.count(),
+                func.sum(case((inbox.c.read == False, 1), else_=0)),
+            ).group_by(inbox.c.type)
+        )
+        
+        by_type = {ntype.value: 0 for ntype in NotificationType}
+        total = unread = 0
+        for ntype, count, type_unread in result:
+            by_type[NotificationType(ntype).value] = count
+            total += count
+            unread += type_unread or 0
+        
+        return total, unread, by_type
+    
+    async def get_unread_count(self, user_id: uuid.UUID) -> int:
+        """Get the number of unread notifications of a user."""
+        inbox = self.inbox(user_id)
+        result = await self.db.execute(
+            select(func.count()).select_from(inbox).where(inbox.c.read == False)
+        )
+        return result.scalar() or 0
+    
+    async def get_notification(self, notification_id: uuid.UUID, user_id: uuid.UUID) -> Row:
+        """
+        Get one of a user's notifications.
+        
+        Raises:
+            NotFoundError: If the notification does not exist or was dismissed
+            AuthorizationError: If it is another user's notification
+        """
+        inbox = self.inbox(user_id)
+        result = await self.db.execute(select(inbox).where(inbox.c.id == notification_id))
+        row = result.first()
+        if row:
+            return row
+        
+        if await self.db.get(Notification, notification_id):
+            raise AuthorizationError("You can only access your own notifications")
+        raise NotFoundError("Notification", str(notification_id))
+    
+    async def _get_personal(
+        self,
+        notification_id: uuid.UUID,
+        user_id: uuid.UUID,
+        denied: str,
+    ) -> Optional[Notification]:
+        """Get a personal notification, checking it belongs to the user."""
+        notification = await self.db.get(Notification, notification_id)
+        if notification and notification.user_id != user_id:
+            raise AuthorizationError(denied)
+        return notification
+    
+    async def _update_receipt(
+        self,
+        notification_id: uuid.UUID,
+        user_id: uuid.UUID,
+        column: str,
+    ) -> None:
+        """Set read_at or dismissed_at of a visible broadcast for a user, once."""
+        visible = await self.db.scalar(
+            select(BroadcastNotification.id)
+            .outerjoin(
+                BroadcastReceipt,
+                and_(
+                    BroadcastReceipt.broadcast_id == BroadcastNotification.id,
+                    BroadcastReceipt.user_id == user_id,
+                ),
+            )
+            .where(BroadcastNotification.id == notification_id)
+            .where(self._visible_broadcasts(user_id))
+            .where(BroadcastReceipt.dismissed_at.is_(None))
+        )
+        if visible is None:
+            raise NotFoundError("Notification", str(notification_id))
+        
+        receipts = BroadcastReceipt.__table__
+        stmt = dialect_insert(self.db.bind.dialect, receipts).values(
+            user_id=user_id,
+            broadcast_id=notification_id,
+            **{column: datetime.now(timezone.utc)},
+        )
+        await self.db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[receipts.c.user_id, receipts.c.broadcast_id],
+                set_={column: stmt.excluded[column]},
+                where=receipts.c[column].is_(None),
+            )
+        )
+    
+    async def mark_as_read(
+        self,
+        notification_id: uuid.UUID,
+        user_id: uuid.UUID,
+    ) -> Union[Notification, Row]:
+        """Mark one of a user's notifications as read and return it."""
+        notification = await self._get_personal(
+            notification_id, user_id, "You can only mark your own notifications as read"
+        )
+        if notification:
+            notification.mark_as_read()
+            await self.db.commit()
+            await self.db.refresh(notification)
+            return notification
+        
+        await self._update_receipt(notification_id, user_id, "read_at")
+        await self.db.commit()
+        return await self.get_notification(notification_id, user_id)
+    
+    async def mark_all_as_read(self, user_id: uuid.UUID) -> int:
+        """Mark all of a user's notifications as read, returning how many changed."""
+        now = datetime.now(timezone.utc)
+        
+        personal = await self.db.execute(
+            update(Notification)
+            .where(Notification.user_id == user_id)
+            .where(Notification.read == False)
+            .values(read=True, read_at=now)
+        )
+        
+        receipted = await self.db.execute(
+            update(BroadcastReceipt)
+            .where(BroadcastReceipt.user_id == user_id)
+            .where(BroadcastReceipt.read_at.is_(None))
+            .where(BroadcastReceipt.dismissed_at.is_(None))
+            .values(read_at=now)
+        )
+        
+        # Receipts for the visible broadcasts the user never touched
+        unreceipted = await self.db.execute(
+            insert(BroadcastReceipt).from_select(
+                ["user_id", "broadcast_id", "read_at"],
+                select(
+                    literal(user_id, BroadcastReceipt.user_id.type),
+                    BroadcastNotification.id,
+                    literal(now, BroadcastReceipt.read_at.type),
+                )
+                .where(self._visible_broadcasts(user_id))
+                .where(
+                    ~exists().where(
+                        BroadcastReceipt.user_id == user_id,
+                        BroadcastReceipt.broadcast_id == BroadcastNotification.id,
+                    )
+                ),
+            )
+        )
+        
+        await self.db.commit()
+        return personal.rowcount + receipted.rowcount + unreceipted.rowcount
+    
+    async def delete_notification(self, notification_id: uuid.UUID, user_id: uuid.UUID) -> None:
+        """Delete one of a user's notifications (dismiss it, for a broadcast)."""
+        notification = await self._get_personal(
+            notification_id, user_id, "You can only delete your own notifications"
+        )
+        if notification:
+            await self.db.delete(notification)
+        else:
+            await self._update_receipt(notification_id, user_id, "dismissed_at")
+        await self.db.commit()
+    
+    async def delete_read(self, user_id: uuid.UUID) -> int:
+        """Delete all read notifications of a user, returning how many."""
+        personal = await self.db.execute(
+            delete(Notification)
+            .where(Notification.user_id == user_id)
+            .where(Notification.read == True)
+        )
+        dismissed = await self.db.execute(
+            update(BroadcastReceipt)
+            .where(BroadcastReceipt.user_id == user_id)
+            .where(BroadcastReceipt.read_at.is_not(None))
+            .where(BroadcastReceipt.dismissed_at.is_(None))
+            .values(dismissed_at=datetime.now(timezone.utc))
+        )
+        await self.db.commit()
+        return personal.rowcount + dismissed.rowcount
+    
+    async def purge_broadcasts(self, before: datetime) -> Tuple[int, int]:
+        """
+        Delete broadcasts sent before a cutoff that every recipient has
+        read or dismissed, with their receipts.
+        
+        A broadcast still unread by any remaining user who could see it
+        is kept. Receipts of soft-deleted users are deleted too. Other
+        receipts of remaining broadcasts are kept, since without one the
+        broadcast would show up again as unread.
+        
+        Returns:
+            Tuple of (broadcasts deleted, receipts deleted)
+        """
+        unread = (
+            select(User.id)
+            .outerjoin(
+                BroadcastReceipt,
+                and_(
+                    BroadcastReceipt.user_id == User.id,
+                    BroadcastReceipt.broadcast_id == BroadcastNotification.id,
+                ),
+            )
+            .where(User.deleted_at.is_(None))
+            .where(User.created_at <= BroadcastNotification.created_at)
+            .where(BroadcastReceipt.read_at.is_(None))
+            .where(BroadcastReceipt.dismissed_at.is_(None))
+        )
+        # Selected up front, as deleting receipts would change which broadcasts qualify
+        expired = list(await self.db.scalars(
+            select(BroadcastNotification.id)
+            .where(BroadcastNotification.created_at < before)
+            .where(~unread.exists())
+        ))
+        deleted_users = select(User.id).where(User.deleted_at.is_not(None))
+        
+        # Deleted explicitly rather than by ON DELETE CASCADE, which SQLite only enforces on request
+        receipts = await self.db.execute(
+            delete(BroadcastReceipt).where(
+                match_any(self.db, BroadcastReceipt.broadcast_id, expired)
+                | BroadcastReceipt.user_id.in_(deleted_users)
+            )
+        )
+        broadcasts = await self.db.execute(
+            delete(BroadcastNotification).where(match_any(self.db, BroadcastNotification.id, expired))
+        )
+        await self.db.commit()
+        return broadcasts.rowcount, receipts.rowcount
+    
+    async def broadcast(
+        self,
+        title: str,
+        message: str,
+        priority: NotificationPriority = NotificationPriority.NORMAL,
+        action_url: Optional[str] = None,
+        metadata: Optional[Dict[str, Any]] = None,
+        created_by: Optional[uuid.UUID] = None,
+        exclude_user_ids: Sequence[uuid.UUID] = (),
+    ) -> BroadcastNotification:
+        """
+        Broadcast a notification to all users.
+        
+        Writes one row, plus a dismissed receipt per excluded user.
+        Connected clients are notified once the request commits.
+        
+        Args:
+            title: Notification title
+            message: Notification message
+            priority: Notification priority
+            action_url: Optional action URL
+            metadata: Additional metadata
+            created_by: ID of the sending user
+            exclude_user_ids: Users not to notify
+        
+        Returns:
+            Created broadcast
+        """
+        broadcast = BroadcastNotification(
+            title=title,
+            message=message,
+            priority=priority,
+            action_url=action_url,
+            metadata_=metadata or {},
+            created_by=created_by,
+        )
+        self.db.add(broadcast)
+        await self.db.flush()
+        
+        if exclude_user_ids:
+            await self.db.execute(
+                insert(BroadcastReceipt).from_select(
+                    ["user_id", "broadcast_id", "dismissed_at"],
+                    select(
+                        User.id,
+                        literal(broadcast.id, BroadcastReceipt.broadcast_id.type),
+                        literal(broadcast.created_at, BroadcastReceipt.dismissed_at.type),
+                    ).where(match_any(self.db, User.id, list(exclude_user_ids))),
+                )
+            )
+        
+        after_commit(self.db, partial(
+            notification_hub.publish,
+            notification_fields(
+                title, message, NotificationType.BROADCAST, priority, action_url,
+                broadcast.created_at, id=broadcast.id,
+            ),
+            exclude=list(exclude_user_ids),
+        ))
+        await self.db.commit()
+        return broadcast
@@ -1,14 +1,29 @@
 """User service for CRUD operations."""
 
-from datetime import datetime
-from typing import List, Optional, Tuple
+from datetime import datetime, timezone
+from functools import partial
+from typing import AsyncIterator, Dict, List, Optional, Sequence, Set, Tuple
 import uuid
 
-from sqlalchemy import select, func, or_
+from sqlalchemy import Row, delete, literal, literal_column, select, func, or_, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.orm import selectinload
+from sqlalchemy.orm.attributes import set_committed_value
 
-from app.core.security import get_password_hash, verify_password
+from app.core.config import settings
+from app.core.counting import CountStrategy, Total, count_total
+from app.core.database import (
+    after_commit,
+    dialect_insert,
+    gather_reads,
+    is_postgresql,
+    match_any,
+    unique_violation_column,
+)
+from app.core.pagination import Cursor
+from app.core.principal import principal_cache
+from app.core.security import get_password_hash_async, verify_password_async
 from app.core.exceptions import (
     BadRequestError,
     ConflictError,
@@ -22,16 +37,74 @@ from app.schemas.user import (
     UserCreate,
     UserUpdate,
     UserUpdateAdmin,
+    UserResponse,
     PasswordChange,
 )
 
 
+# Must match the expression of the ix_users_search_trgm index (migration 003);
+# constants are rendered inline so the planner can match it
+USER_SEARCH_DOCUMENT = (
+    func.coalesce(User.email, literal_column("''"))
+    + literal_column("' '")
+    + func.coalesce(User.username, literal_column("''"))
+    + literal_column("' '")
+    + func.coalesce(User.first_name, literal_column("''"))
+    + literal_column("' '")
+    + func.coalesce(User.last_name, literal_column("''"))
+)
+
+
+# Conflict messages for the unique columns of users
+UNIQUE_CONFLICT_MESSAGES = {
+    "email": "Email already registered",
+    "username": "Username already taken",
+}
+
+# Columns selected by user listings: exactly the fields of UserResponse
+LIST_COLUMNS = tuple(getattr(User, field) for field in UserResponse.model_fields)
+
+# Columns written by user exports (never the password hash)
+EXPORT_COLUMNS = (
+    User.id,
+    User.email,
+    User.username,
+    User.first_name,
+    User.last_name,
+    User.phone,
+    User.status,
+    User.email_verified,
+    User.locale,
+    User.timezone,
+    User.last_login_at,
+    User.created_at,
+    User.updated_at,
+    User.deleted_at,
+)
+
+
+def _escape_like(value: str) -> str:
+    """Escape LIKE wildcards in user input."""
+    return value.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+async def _fetch_rows(query, db: AsyncSession) -> List[Row]:
+    """Execute a SELECT and return its rows as a list."""
+    result = await db.execute(query)
+    return list(result.all())
+
+
 class UserService:
     """Service for user CRUD operations."""
     
     def __init__(self, db: AsyncSession):
         self.db = db
     
+    def _invalidate_principal(self, *user_ids: uuid.UUID) -> None:
+        """Evict the users' cached principals once the transaction commits."""
+        if user_ids:
+            after_commit(self.db, partial(principal_cache.invalidate, *user_ids))
+    
     async def get_by_id(
         self,
         user_id: uuid.UUID,
@@ -46,6 +119,32 @@ class UserService:
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
     
+    async def get_version(self, user_id: uuid.UUID) -> Optional[Row]:
+        """
+        Get the version of a user and its role assignments.
+        
+        A single aggregate over the user row and its role links: the
+        user's updated_at, the number of assigned roles, the newest
+        assignment and the newest change to an assigned role. Any change
+        to what get_by_id returns moves one of them. Returns None for
+        missing or deleted users.
+        """
+        result = await self.db.execute(
+            select(
+                User.id,
+                User.updated_at,
+                func.count(UserRole.role_id),
+                func.max(UserRole.assigned_at),
+                func.max(Role.updated_at),
+            )
+            .outerjoin(UserRole, UserRole.user_id == User.id)
+            .outerjoin(Role, Role.id == UserRole.role_id)
+            .where(User.id == user_id)
+            .where(User.deleted_at.is_(None))
+            .group_by(User.id, User.updated_at)
+        )
+        return result.first()
+    
     async def get_by_email(
         self,
         email: str,
@@ -74,6 +173,15 @@ class UserService:
         result = await self.db.execute(query)
         return result.scalar_one_or_none()
     
+    def is_relevance_ordered(self, search: Optional[str]) -> bool:
+        """
+        Check if list_users orders a search by relevance.
+        
+        Searches on PostgreSQL list the most relevant matches first, so
+        their pages are not in the (created_at, id) order of the cursors.
+        """
+        return bool(search) and is_postgresql(self.db)
+    
     async def list_users(
         self,
         page: int = 1,
@@ -81,54 +189,207 @@ class UserService:
         search: Optional[str] = None,
         status: Optional[UserStatus] = None,
         include_deleted: bool = False,
-    ) -> Tuple[List[User], int]:
+        count_strategy: CountStrategy = CountStrategy.EXACT,
+    ) -> Tuple[List[Row], Total]:
         """
         List users with pagination and filters.
         
+        Users are returned as read-only rows of LIST_COLUMNS rather than
+        ORM objects, so no identity map entries or roles are loaded.
+        
         Args:
             page: Page number (1-based)
             page_size: Items per page
             search: Search in email, username, first_name, last_name
             status: Filter by status
             include_deleted: Include soft-deleted users
+            count_strategy: How the total count is computed
             
         Returns:
-            Tuple of (users list, total count)
+            Tuple of (user rows, total count)
+        """
+        filters = self._list_filters(search, status, include_deleted)
+        
+        order_by = [User.created_at.desc(), User.id.desc()]
+        if self.is_relevance_ordered(search):
+            order_by.insert(0, func.word_similarity(search.strip(), USER_SEARCH_DOCUMENT).desc())
+        
+        # Apply pagination
+        offset = (page - 1) * page_size
+        query = (
+            select(*LIST_COLUMNS)
+            .where(*filters)
+            .order_by(*order_by)
+            .offset(offset)
+            .limit(page_size)
+        )
+        
+        # Page and total count run concurrently where the database allows
+        users, total = await gather_reads(
+            self.db,
+            partial(_fetch_rows, query),
+            partial(count_total, query=select(User.id).where(*filters), strategy=count_strategy),
+        )
+        
+        return users, total
+    
+    async def list_users_by_cursor(
+        self,
+        cursor: Optional[Cursor] = None,
+        page_size: int = 20,
+        search: Optional[str] = None,
+        status: Optional[UserStatus] = None,
+        include_deleted: bool = False,
+        count_strategy: CountStrategy = CountStrategy.EXACT,
+    ) -> Tuple[List[Row], Total, Optional[Cursor], Optional[Cursor]]:
         """
-        query = select(User).options(selectinload(User.roles))
-        count_query = select(func.count(User.id))
+        List users with keyset pagination on (created_at, id).
+        
+        Every page is an index range scan, so deep pages cost the same
+        as the first one. Search results keep the (created_at, id)
+        order rather than relevance order. Users are returned as rows of
+        LIST_COLUMNS, like list_users.
+        
+        Args:
+            cursor: Position to continue from (None for the first page)
+            page_size: Items per page
+            search: Search in email, username, first_name, last_name
+            status: Filter by status
+            include_deleted: Include soft-deleted users
+            count_strategy: How the total count is computed
+            
+        Returns:
+            Tuple of (user rows, total count, next cursor, previous cursor)
+        """
+        filters = self._list_filters(search, status, include_deleted)
+        
+        query = select(*LIST_COLUMNS).where(*filters)
+        
+        backwards = cursor is not None and cursor.direction == "prev"
+        if cursor is not None:
+            position = tuple_(User.created_at, User.id)
+            bound = tuple_(
+                cursor.created_at,
+                cursor.id,
+                types=[User.created_at.type, User.id.type],
+            )
+            query = query.where(position > bound if backwards else position < bound)
+        
+        if backwards:
+            query = query.order_by(User.created_at.asc(), User.id.asc())
+        else:
+            query = query.order_by(User.created_at.desc(), User.id.desc())
+        
+        # One extra row tells whether there is another page in this direction
+        users, total = await gather_reads(
+            self.db,
+            partial(_fetch_rows, query.limit(page_size + 1)),
+            partial(count_total, query=select(User.id).where(*filters), strategy=count_strategy),
+        )
+        
+        has_more = len(users) > page_size
+        users = users[:page_size]
+        if backwards:
+            users.reverse()
+        
+        has_next = has_more if not backwards else True
+        has_prev = has_more if backwards else cursor is not None
+        
+        next_cursor = prev_cursor = None
+        if users and has_next:
+            next_cursor = Cursor(users[-1].created_at, users[-1].id, "next")
+        if users and has_prev:
+            prev_cursor = Cursor(users[0].created_at, users[0].id, "prev")
+        
+        return users, total, next_cursor, prev_cursor
+    
+    def export_users(
+        self,
+        search: Optional[str] = None,
+        status: Optional[UserStatus] = None,
+        include_deleted: bool = False,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """
+        Stream users matching the list filters in (created_at, id) order.
+        
+        Rows of EXPORT_COLUMNS are fetched from a server-side cursor in
+        batches of EXPORT_BATCH_SIZE on a connection of their own, so the
+        stream can outlive the request session and memory use does not
+        grow with the number of users.
+        
+        Args:
+            search: Search in email, username, first_name, last_name
+            status: Filter by status
+            include_deleted: Include soft-deleted users
+            
+        Returns:
+            Async iterator of row batches
+            
+        Raises:
+            BadRequestError: If the search term is too short
+        """
+        # Filters are validated now rather than once streaming has started
+        query = (
+            select(*EXPORT_COLUMNS)
+            .where(*self._list_filters(search, status, include_deleted))
+            .order_by(User.created_at, User.id)
+            .execution_options(yield_per=settings.EXPORT_BATCH_SIZE)
+        )
+        return self._stream_partitions(query)
+    
+    async def _stream_partitions(self, query) -> AsyncIterator[Sequence[Row]]:
+        async with self.db.bind.connect() as conn:
+            result = await conn.stream(query)
+            async for rows in result.partitions():
+                yield rows
+    
+    def _list_filters(
+        self,
+        search: Optional[str],
+        status: Optional[UserStatus],
+        include_deleted: bool,
+    ) -> list:
+        """Build WHERE conditions shared by user listings."""
+        filters = []
         
-        # Apply filters
         if not include_deleted:
-            query = query.where(User.deleted_at.is_(None))
-            count_query = count_query.where(User.deleted_at.is_(None))
+            filters.append(User.deleted_at.is_(None))
         
         if status:
-            query = query.where(User.status == status)
-            count_query = count_query.where(User.status == status)
+            filters.append(User.status == status)
         
         if search:
-            search_filter = or_(
-                User.email.ilike(f"%{search}%"),
-                User.username.ilike(f"%{search}%"),
-                User.first_name.ilike(f"%{search}%"),
-                User.last_name.ilike(f"%{search}%"),
-            )
-            query = query.where(search_filter)
-            count_query = count_query.where(search_filter)
+            filters.append(self._search_filter(search))
         
-        # Get total count
-        total_result = await self.db.execute(count_query)
-        total = total_result.scalar() or 0
+        return filters
+    
+    def _search_filter(self, search: str):
+        """
+        Match users whose email, username or name contains the term.
         
-        # Apply pagination
-        offset = (page - 1) * page_size
-        query = query.offset(offset).limit(page_size).order_by(User.created_at.desc())
+        On PostgreSQL this is one ILIKE over the concatenated columns,
+        served by the ix_users_search_trgm trigram index; elsewhere each
+        column is scanned.
         
-        result = await self.db.execute(query)
-        users = list(result.scalars().all())
+        Raises:
+            BadRequestError: If the term is too short to use the index
+        """
+        search = search.strip()
+        if len(search) < settings.USER_SEARCH_MIN_LENGTH:
+            raise BadRequestError(
+                f"Search term must be at least {settings.USER_SEARCH_MIN_LENGTH} characters"
+            )
         
-        return users, total
+        pattern = f"%{_escape_like(search)}%"
+        if is_postgresql(self.db):
+            return USER_SEARCH_DOCUMENT.ilike(pattern, escape="\\")
+        
+        return or_(
+            User.email.ilike(pattern, escape="\\"),
+            User.username.ilike(pattern, escape="\\"),
+            User.first_name.ilike(pattern, escape="\\"),
+            User.last_name.ilike(pattern, escape="\\"),
+        )
     
     async def create_user(
         self,
@@ -148,22 +409,10 @@ class UserService:
         Raises:
             ConflictError: If email or username already exists
         """
-        # Check for existing email
-        existing = await self.get_by_email(data.email)
-        if existing:
-            raise ConflictError("Email already registered")
-        
-        # Check for existing username
-        if data.username:
-            existing = await self.get_by_username(data.username)
-            if existing:
-                raise ConflictError("Username already taken")
-        
-        # Create user
-        user = User(
+        return await self.insert_user(
             email=data.email.lower(),
             username=data.username.lower() if data.username else None,
-            password_hash=get_password_hash(data.password),
+            password_hash=await get_password_hash_async(data.password),
             first_name=data.first_name,
             last_name=data.last_name,
             phone=data.phone,
@@ -171,10 +420,41 @@ class UserService:
             timezone=data.timezone,
             status=UserStatus.PENDING_VERIFICATION,
         )
+    
+    async def insert_user(self, **values) -> User:
+        """
+        Insert a user in one round trip, relying on the unique indexes.
         
-        self.db.add(user)
-        await self.db.flush()
+        Uses INSERT ... ON CONFLICT DO NOTHING RETURNING, so a duplicate
+        email or username leaves the transaction usable; only then is a
+        second query run to tell which of the two is taken.
+        
+        Args:
+            values: User column values (email and username already normalised)
+            
+        Returns:
+            Created user
+            
+        Raises:
+            ConflictError: If email or username already exists
+        """
+        result = await self.db.execute(
+            dialect_insert(self.db.bind.dialect, User)
+            .values(**values)
+            .on_conflict_do_nothing()
+            .returning(User)
+        )
+        user = result.scalar_one_or_none()
+        
+        if user is None:
+            existing = await self.db.execute(
+                select(User.id).where(User.email == values["email"]).limit(1)
+            )
+            field = "email" if existing.first() else "username"
+            raise ConflictError(UNIQUE_CONFLICT_MESSAGES[field])
         
+        # A new user has no roles; avoids a lazy load on first access
+        set_committed_value(user, "roles", [])
         return user
     
     async def update_user(
@@ -202,21 +482,22 @@ class UserService:
         if not user:
             raise NotFoundError("User", str(user_id))
         
-        # Check for email conflict
         if data.email and data.email.lower() != user.email:
-            existing = await self.get_by_email(data.email)
-            if existing:
-                raise ConflictError("Email already registered")
             user.email = data.email.lower()
         
-        # Check for username conflict
         if data.username is not None:
-            if data.username and data.username.lower() != user.username:
-                existing = await self.get_by_username(data.username)
-                if existing:
-                    raise ConflictError("Username already taken")
             user.username = data.username.lower() if data.username else None
         
+        # The unique indexes reject taken emails and usernames on flush
+        if self.db.is_modified(user):
+            try:
+                await self.db.flush()
+            except IntegrityError as e:
+                field = unique_violation_column(e, User.__table__)
+                if field not in UNIQUE_CONFLICT_MESSAGES:
+                    raise
+                raise ConflictError(UNIQUE_CONFLICT_MESSAGES[field])
+        
         # Update other fields
         update_fields = ["first_name", "last_name", "phone", "avatar_url", "locale", "timezone"]
         for field in update_fields:
@@ -224,6 +505,8 @@ class UserService:
             if value is not None:
                 setattr(user, field, value)
         
+        self._invalidate_principal(user.id)
+        
         return user
     
     async def update_user_admin(
@@ -276,11 +559,11 @@ class UserService:
             raise NotFoundError("User", str(user_id))
         
         # Verify current password
-        if not verify_password(data.current_password, user.password_hash):
+        if not await verify_password_async(data.current_password, user.password_hash):
             raise PasswordError("Current password is incorrect")
         
         # Update password
-        user.password_hash = get_password_hash(data.new_password)
+        user.password_hash = await get_password_hash_async(data.new_password)
         
         return user
     
@@ -313,6 +596,8 @@ class UserService:
         else:
             user.soft_delete()
         
+        self._invalidate_principal(user_id)
+        
         return True
     
     async def restore_user(self, user_id: uuid.UUID) -> User:
@@ -337,6 +622,7 @@ class UserService:
             raise BadRequestError("User is not deleted")
         
         user.restore()
+        self._invalidate_principal(user_id)
         return user
     
     async def assign_role(
@@ -390,6 +676,7 @@ class UserService:
             self.db.add(user_role)
         
         await self.db.flush()
+        self._invalidate_principal(user_id)
         
         # Refresh user with roles
         return await self.get_by_id(user_id)
@@ -418,5 +705,192 @@ class UserService:
         
         if user_role:
             await self.db.delete(user_role)
+            self._invalidate_principal(user_id)
         
         return await self.get_by_id(user_id)
+    
+    async def bulk_update_status(
+        self,
+        user_ids: List[uuid.UUID],
+        status: UserStatus,
+    ) -> Dict[uuid.UUID, str]:
+        """
+        Set the status of many users with one UPDATE.
+        
+        Args:
+            user_ids: User IDs
+            status: New status
+            
+        Returns:
+            Outcome per user ID ("updated", "unchanged" or "not_found")
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        result = await self.db.execute(
+            update(User)
+            .where(match_any(self.db, User.id, user_ids))
+            .where(User.deleted_at.is_(None))
+            .where(User.status != status)
+            .values(status=status)
+            .returning(User.id)
+            .execution_options(synchronize_session=False)
+        )
+        updated = set(result.scalars())
+        self._invalidate_principal(*updated)
+        return await self._bulk_outcomes(user_ids, updated)
+    
+    async def bulk_delete(self, user_ids: List[uuid.UUID]) -> Dict[uuid.UUID, str]:
+        """
+        Soft delete many users with one UPDATE.
+        
+        Args:
+            user_ids: User IDs
+            
+        Returns:
+            Outcome per user ID ("unchanged" if already deleted)
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        result = await self.db.execute(
+            update(User)
+            .where(match_any(self.db, User.id, user_ids))
+            .where(User.deleted_at.is_(None))
+            .values(deleted_at=datetime.now(timezone.utc))
+            .returning(User.id)
+            .execution_options(synchronize_session=False)
+        )
+        deleted = set(result.scalars())
+        self._invalidate_principal(*deleted)
+        return await self._bulk_outcomes(user_ids, deleted, include_deleted=True)
+    
+    async def bulk_restore(self, user_ids: List[uuid.UUID]) -> Dict[uuid.UUID, str]:
+        """
+        Restore many soft-deleted users with one UPDATE.
+        
+        Args:
+            user_ids: User IDs
+            
+        Returns:
+            Outcome per user ID ("unchanged" if not deleted)
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        result = await self.db.execute(
+            update(User)
+            .where(match_any(self.db, User.id, user_ids))
+            .where(User.deleted_at.is_not(None))
+            .values(deleted_at=None)
+            .returning(User.id)
+            .execution_options(synchronize_session=False)
+        )
+        restored = set(result.scalars())
+        self._invalidate_principal(*restored)
+        return await self._bulk_outcomes(user_ids, restored, include_deleted=True)
+    
+    async def bulk_assign_role(
+        self,
+        user_ids: List[uuid.UUID],
+        role_id: uuid.UUID,
+        assigned_by: uuid.UUID,
+        expires_at: Optional[datetime] = None,
+    ) -> Dict[uuid.UUID, str]:
+        """
+        Assign a role to many users with one INSERT ... ON CONFLICT.
+        
+        Existing assignments get the new expiration, like assign_role.
+        
+        Args:
+            user_ids: User IDs
+            role_id: Role ID to assign
+            assigned_by: ID of user assigning the role
+            expires_at: Optional expiration for the role assignments
+            
+        Returns:
+            Outcome per user ID
+            
+        Raises:
+            NotFoundError: If the role does not exist
+        """
+        await self._get_role_or_404(role_id)
+        user_ids = list(dict.fromkeys(user_ids))
+        
+        user_roles = UserRole.__table__
+        insert = dialect_insert(self.db.bind.dialect, user_roles).from_select(
+            ["user_id", "role_id", "expires_at", "assigned_at", "assigned_by"],
+            select(
+                User.id,
+                literal(role_id, user_roles.c.role_id.type),
+                literal(expires_at, user_roles.c.expires_at.type),
+                literal(datetime.now(timezone.utc), user_roles.c.assigned_at.type),
+                literal(assigned_by, user_roles.c.assigned_by.type),
+            )
+            .where(match_any(self.db, User.id, user_ids))
+            .where(User.deleted_at.is_(None)),
+        )
+        insert = insert.on_conflict_do_update(
+            index_elements=[user_roles.c.user_id, user_roles.c.role_id],
+            set_={"expires_at": insert.excluded.expires_at},
+            where=user_roles.c.expires_at.is_distinct_from(insert.excluded.expires_at),
+        ).returning(user_roles.c.user_id)
+        
+        result = await self.db.execute(insert)
+        assigned = set(result.scalars())
+        self._invalidate_principal(*assigned)
+        return await self._bulk_outcomes(user_ids, assigned)
+    
+    async def bulk_remove_role(
+        self,
+        user_ids: List[uuid.UUID],
+        role_id: uuid.UUID,
+    ) -> Dict[uuid.UUID, str]:
+        """
+        Remove a role from many users with one DELETE.
+        
+        Args:
+            user_ids: User IDs
+            role_id: Role ID to remove
+            
+        Returns:
+            Outcome per user ID
+            
+        Raises:
+            NotFoundError: If the role does not exist
+        """
+        await self._get_role_or_404(role_id)
+        user_ids = list(dict.fromkeys(user_ids))
+        
+        result = await self.db.execute(
+            delete(UserRole)
+            .where(UserRole.role_id == role_id)
+            .where(match_any(self.db, UserRole.user_id, user_ids))
+            .returning(UserRole.user_id)
+            .execution_options(synchronize_session=False)
+        )
+        removed = set(result.scalars())
+        self._invalidate_principal(*removed)
+        return await self._bulk_outcomes(user_ids, removed)
+    
+    async def _get_role_or_404(self, role_id: uuid.UUID) -> Role:
+        result = await self.db.execute(select(Role).where(Role.id == role_id))
+        role = result.scalar_one_or_none()
+        if not role:
+            raise NotFoundError("Role", str(role_id))
+        return role
+    
+    async def _bulk_outcomes(
+        self,
+        user_ids: List[uuid.UUID],
+        changed: Set[uuid.UUID],
+        include_deleted: bool = False,
+    ) -> Dict[uuid.UUID, str]:
+        """Classify the IDs a bulk statement did not change as unchanged or not found."""
+        remaining = [user_id for user_id in user_ids if user_id not in changed]
+        
+        existing: Set[uuid.UUID] = set()
+        if remaining:
+            query = select(User.id).where(match_any(self.db, User.id, remaining))
+            if not include_deleted:
+                query = query.where(User.deleted_at.is_(None))
+            existing = set((await self.db.execute(query)).scalars())
+        
+        return {
+            user_id: "updated" if user_id in changed else "unchanged" if user_id in existing else "not_found"
+            for user_id in user_ids
+        }
@@ -0,0 +1,118 @@
+"""Activity flush tasks for Celery."""
+
+import logging
+import uuid
+from datetime import datetime
+from typing import Dict
+
+from celery import shared_task
+from sqlalchemy import DateTime, column, literal, or_, select, union_all, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.activity import SESSION_ACTIVITY_KEY, USER_LOGIN_KEY, activity_buffer
+from app.core.database import async_session_factory, is_postgresql
+from app.core.redis import redis_client
+from app.models.base import GUID
+from app.models.session import Session
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+# Rows per UPDATE statement (keeps bind parameters well below driver limits)
+FLUSH_CHUNK_SIZE = 1000
+
+
+def run_async(coro):
+    """Run async function in sync context for Celery."""
+    import asyncio
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coro)
+    finally:
+        loop.close()
+
+
+def _timestamps_table(db: AsyncSession, rows: Dict[uuid.UUID, datetime]):
+    id_type, ts_type = GUID(), DateTime(timezone=True)
+    if is_postgresql(db):
+        return values(
+            column("id", id_type),
+            column("ts", ts_type),
+            name="buffered",
+        ).data(list(rows.items()))
+    
+    # SQLite cannot name the columns of a VALUES alias
+    return union_all(*(
+        select(literal(entity_id, id_type).label("id"), literal(ts, ts_type).label("ts"))
+        for entity_id, ts in rows.items()
+    )).subquery("buffered")
+
+
+async def _flush_session_activity(db: AsyncSession, rows: Dict[uuid.UUID, datetime]) -> None:
+    buffered = _timestamps_table(db, rows)
+    await db.execute(
+        update(Session)
+        .where(Session.id == buffered.c.id)
+        .where(Session.last_activity < buffered.c.ts)
+        .values(last_activity=buffered.c.ts)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def _flush_user_logins(db: AsyncSession, rows: Dict[uuid.UUID, datetime]) -> None:
+    buffered = _timestamps_table(db, rows)
+    await db.execute(
+        update(User)
+        .where(User.id == buffered.c.id)
+        .where(or_(User.last_login_at.is_(None), User.last_login_at < buffered.c.ts))
+        .values(last_login_at=buffered.c.ts)
+        .execution_options(synchronize_session=False)
+    )
+
+
+async def flush_buffered_activity(db: AsyncSession) -> Dict[str, int]:
+    """
+    Write every buffered timestamp batch, acknowledging each once committed.
+    
+    Returns:
+        Number of flushed rows per buffer key
+    """
+    stats = {}
+    for key, writer in (
+        (SESSION_ACTIVITY_KEY, _flush_session_activity),
+        (USER_LOGIN_KEY, _flush_user_logins),
+    ):
+        rows = await activity_buffer.drain(key)
+        if rows:
+            items = list(rows.items())
+            for i in range(0, len(items), FLUSH_CHUNK_SIZE):
+                await writer(db, dict(items[i:i + FLUSH_CHUNK_SIZE]))
+            await db.commit()
+            await activity_buffer.ack(key)
+        stats[key] = len(rows)
+    return stats
+
+
+@shared_task(name="app.tasks.activity_tasks.flush_activity")
+def flush_activity() -> dict:
+    """
+    Write buffered session activity and last login timestamps.
+    
+    Each batch is applied with one multi-row UPDATE ... FROM (VALUES ...)
+    per chunk and only moves timestamps forward.
+    
+    Returns:
+        Number of flushed sessions and users
+    """
+    async def _flush():
+        await redis_client.connect()
+        try:
+            async with async_session_factory() as session:
+                stats = await flush_buffered_activity(session)
+            
+            logger.info(f"Flushed activity: {stats}")
+            return stats
+        finally:
+            await redis_client.disconnect()
+    
+    return run_async(_flush())
@@ -13,6 +13,7 @@ celery_app = Celery(
         "app.tasks.email_tasks",
         "app.tasks.notification_tasks",
         "app.tasks.cleanup_tasks",
+        "app.tasks.activity_tasks",
     ],
 )
 
@@ -54,11 +55,13 @@ celery_app.conf.update(
         "emails": {"routing_key": "emails"},
         "notifications": {"routing_key": "notifications"},
         "cleanup": {"routing_key": "cleanup"},
+        "activity": {"routing_key": "activity"},
     },
     task_routes={
         "app.tasks.email_tasks.*": {"queue": "emails"},
         "app.tasks.notification_tasks.*": {"queue": "notifications"},
         "app.tasks.cleanup_tasks.*": {"queue": "cleanup"},
+        "app.tasks.activity_tasks.*": {"queue": "activity"},
     },
 )
 
@@ -76,4 +79,8 @@ celery_app.conf.beat_schedule = {
         "task": "app.tasks.notification_tasks.send_pending_notifications",
         "schedule": 60.0,  # Every minute
     },
+    "flush-activity": {
+        "task": "app.tasks.activity_tasks.flush_activity",
+        "schedule": float(settings.ACTIVITY_FLUSH_INTERVAL_SECONDS),
+    },
 }
@@ -2,17 +2,20 @@
 
 import logging
 from datetime import datetime, timedelta, timezone
+from typing import Optional
 
 from celery import shared_task
 from sqlalchemy import select, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.database import async_session_factory
 from app.models.session import Session
 from app.models.notification import Notification
 from app.models.user import User
 from app.models.audit import AuditLog
 from app.models.enums import UserStatus
+from app.services.notification_service import NotificationService
 
 logger = logging.getLogger(__name__)
 
@@ -121,19 +124,27 @@ def cleanup_unverified_users(days: int = 7) -> int:
 
 
 @shared_task(name="app.tasks.cleanup_tasks.cleanup_old_notifications")
-def cleanup_old_notifications(days: int = 30) -> int:
+def cleanup_old_notifications(days: int = 30, broadcast_days: Optional[int] = None) -> int:
     """
-    Delete old read notifications.
+    Delete old read notifications and old read broadcasts.
+    
+    Broadcasts older than broadcast_days are deleted, together with their
+    receipts, once every recipient has read or dismissed them.
     
     Args:
         days: Days to retain read notifications
+        broadcast_days: Days to retain broadcasts (default BROADCAST_RETENTION_DAYS)
         
     Returns:
-        Number of notifications deleted
+        Number of notifications and broadcasts deleted
     """
+    if broadcast_days is None:
+        broadcast_days = settings.BROADCAST_RETENTION_DAYS
+    
     async def _cleanup():
         async with async_session_factory() as session:
-            cutoff_date = datetime.now(timezone.utc) - timedelta(days=days)
+            now = datetime.now(timezone.utc)
+            cutoff_date = now - timedelta(days=days)
             
             # Delete old read notifications
             result = await session.execute(
@@ -146,6 +157,14 @@ def cleanup_old_notifications(days: int = 30) -> int:
             
             count = result.rowcount
             logger.info(f"Cleaned up {count} old read notifications (older than {days} days)")
-            return count
+            
+            broadcasts, receipts = await NotificationService(session).purge_broadcasts(
+                now - timedelta(days=broadcast_days)
+            )
+            logger.info(
+                f"Cleaned up {broadcasts} old read broadcasts (older than {broadcast_days} days) "
+                f"and {receipts} broadcast receipts"
+            )
+            return count + broadcasts
     
     return run_async(_cleanup())
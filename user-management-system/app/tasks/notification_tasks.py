@@ -1,15 +1,22 @@
 """Notification tasks for Celery."""
 
 import logging
+from contextlib import asynccontextmanager
 from datetime import datetime, timezone
+from functools import partial
+from typing import AsyncIterator
 
 from celery import shared_task
-from sqlalchemy import select
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.core.database import async_session_factory
+from app.core.database import after_commit, async_session_factory, run_after_commit_hooks
+from app.core.realtime import notification_fields, notification_hub
+from app.core.redis import redis_client
 from app.models.notification import Notification
+from app.models.enums import NotificationType, NotificationPriority, UserStatus
 from app.models.user import User
-from app.models.enums import UserStatus, NotificationType, NotificationPriority
+from app.services.notification_service import NotificationService
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +31,40 @@ def run_async(coro):
         loop.close()
 
 
+@asynccontextmanager
+async def redis_connection() -> AsyncIterator[None]:
+    """
+    Connect the Redis client for the task's event loop.
+    
+    New notifications are published to the real-time clients of the API
+    workers through it; without Redis they are only stored.
+    """
+    try:
+        await redis_client.connect(max_retries=1)
+    except Exception as e:
+        logger.warning(f"Redis unavailable, notifications will not be pushed: {e}")
+    try:
+        yield
+    finally:
+        await redis_client.disconnect()
+
+
+async def store_notification(session: AsyncSession, notification: Notification) -> None:
+    """Store a notification and push it to the user's connected clients."""
+    session.add(notification)
+    await session.flush()
+    after_commit(session, partial(
+        notification_hub.publish,
+        notification_fields(
+            notification.title, notification.message, notification.type,
+            notification.priority, notification.action_url, notification.created_at,
+        ),
+        recipients={notification.user_id: notification.id},
+    ))
+    await session.commit()
+    await run_after_commit_hooks(session)
+
+
 @shared_task(name="app.tasks.notification_tasks.send_push_notification")
 def send_push_notification(
     user_id: str,
@@ -46,7 +87,7 @@ def send_push_notification(
     # TODO: Implement push notification via Firebase/APNs
     # For now, just create an in-app notification
     async def _send():
-        async with async_session_factory() as session:
+        async with redis_connection(), async_session_factory() as session:
             notification = Notification(
                 user_id=user_id,
                 title=title,
@@ -55,8 +96,7 @@ def send_push_notification(
                 priority=NotificationPriority.NORMAL,
                 metadata_=data or {},
             )
-            session.add(notification)
-            await session.commit()
+            await store_notification(session, notification)
             logger.info(f"Created notification for user {user_id}: {title}")
             return True
     
@@ -90,42 +130,35 @@ def broadcast_notification(
     """
     Broadcast notification to all active users.
     
+    The broadcast is stored once and listed among every user's
+    notifications (see NotificationService).
+    
     Args:
         title: Notification title
         message: Notification message
-        notification_type: Type of notification
+        notification_type: Type of notification; only broadcast is supported
         
     Returns:
-        Number of users notified
+        Number of active users notified
+        
+    Raises:
+        ValueError: If notification_type is not broadcast
     """
+    if NotificationType(notification_type) != NotificationType.BROADCAST:
+        raise ValueError(f"Broadcasts cannot be of type {notification_type}")
+    
     async def _broadcast():
-        async with async_session_factory() as session:
-            # Get all active users
-            result = await session.execute(
-                select(User.id).where(
+        async with redis_connection(), async_session_factory() as session:
+            broadcast = await NotificationService(session).broadcast(title=title, message=message)
+            await run_after_commit_hooks(session)
+            
+            count = await session.scalar(
+                select(func.count()).select_from(User).where(
                     User.status == UserStatus.ACTIVE,
                     User.deleted_at.is_(None),
                 )
             )
-            user_ids = result.scalars().all()
-            
-            # Create notifications for all users
-            notifications = []
-            for user_id in user_ids:
-                notification = Notification(
-                    user_id=user_id,
-                    title=title,
-                    message=message,
-                    type=NotificationType.BROADCAST,
-                    priority=NotificationPriority.NORMAL,
-                )
-                notifications.append(notification)
-            
-            session.add_all(notifications)
-            await session.commit()
-            
-            count = len(notifications)
-            logger.info(f"Broadcast notification sent to {count} users: {title}")
+            logger.info(f"Broadcast notification {broadcast.id} sent to {count} users: {title}")
             return count
     
     try:
@@ -155,7 +188,7 @@ def create_security_notification(
         True if created successfully
     """
     async def _create():
-        async with async_session_factory() as session:
+        async with redis_connection(), async_session_factory() as session:
             notification = Notification(
                 user_id=user_id,
                 title=title,
@@ -164,8 +197,7 @@ def create_security_notification(
                 priority=NotificationPriority.HIGH,
                 metadata_=metadata or {},
             )
-            session.add(notification)
-            await session.commit()
+            await store_notification(session, notification)
             logger.info(f"Created security notification for user {user_id}: {title}")
             return True
     
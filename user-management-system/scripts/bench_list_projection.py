@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Benchmark: ORM-hydrated vs column-projected user list pages.
+
+Seeds an in-memory SQLite database with --users users (each with one
+role carrying a few permissions) and times building --pages response
+pages of --page-size users both ways: full User objects with roles
+loaded and UserResponse.model_validate per object, versus the
+LIST_COLUMNS rows used by UserService.list_users turned into dicts.
+"""
+
+import argparse
+import asyncio
+import time
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import selectinload
+
+from app.models import Permission, Role, RolePermission, User, UserRole
+from app.models.base import Base
+from app.models.enums import PermissionAction, PermissionScope
+from app.schemas.user import UserResponse
+from app.services.user_service import LIST_COLUMNS
+
+
+async def seed(factory, users: int) -> None:
+    async with factory() as db:
+        role = Role(name="member")
+        db.add(role)
+        await db.flush()
+        for action in PermissionAction:
+            permission = Permission(resource="users", action=action, scope=PermissionScope.GLOBAL)
+            db.add(permission)
+            await db.flush()
+            db.add(RolePermission(role_id=role.id, permission_id=permission.id))
+        
+        for i in range(users):
+            user = User(email=f"user{i}@example.com", username=f"user{i}", password_hash="x")
+            db.add(user)
+            await db.flush()
+            db.add(UserRole(user_id=user.id, role_id=role.id))
+        await db.commit()
+
+
+async def orm_page(db: AsyncSession, page_size: int) -> list:
+    result = await db.execute(
+        select(User)
+        .options(selectinload(User.roles))
+        .order_by(User.created_at.desc(), User.id.desc())
+        .limit(page_size)
+    )
+    return [UserResponse.model_validate(user) for user in result.scalars().all()]
+
+
+async def projected_page(db: AsyncSession, page_size: int) -> list:
+    result = await db.execute(
+        select(*LIST_COLUMNS)
+        .order_by(User.created_at.desc(), User.id.desc())
+        .limit(page_size)
+    )
+    return [row._asdict() for row in result]
+
+
+async def timed(factory, build, pages: int, page_size: int) -> float:
+    start = time.perf_counter()
+    for _ in range(pages):
+        # A fresh session per page, like a request
+        async with factory() as db:
+            await build(db, page_size)
+    return (time.perf_counter() - start) / pages * 1000
+
+
+async def main(users: int, pages: int, page_size: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    
+    await seed(factory, users)
+    
+    orm_ms = await timed(factory, orm_page, pages, page_size)
+    projected_ms = await timed(factory, projected_page, pages, page_size)
+    
+    print(f"{pages} pages of {page_size} users")
+    print(f"  ORM + selectinload + model_validate: {orm_ms:8.2f} ms/page")
+    print(f"  LIST_COLUMNS rows as dicts:          {projected_ms:8.2f} ms/page")
+    print(f"  speedup: {orm_ms / projected_ms:.1f}x")
+    
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args()
+    
+    asyncio.run(main(args.users, args.pages, args.page_size))
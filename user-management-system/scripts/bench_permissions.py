@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""Microbenchmark: nested-loop permission check vs compiled bitset engine."""
+
+import argparse
+import random
+import timeit
+import uuid
+from types import SimpleNamespace
+
+from app.core.permissions import compile_permissions
+from app.models.enums import PermissionAction, PermissionScope
+
+
+def build_fixture(num_roles: int, num_permissions: int, seed: int = 42):
+    """Build ORM-like roles and the equivalent compiled permissions."""
+    rng = random.Random(seed)
+    actions = list(PermissionAction)
+    scopes = list(PermissionScope)
+    
+    permissions = []
+    for i in range(num_permissions):
+        permissions.append(SimpleNamespace(
+            id=uuid.uuid4(),
+            resource=f"resource_{i // (len(actions) * len(scopes))}",
+            action=actions[i % len(actions)],
+            scope=scopes[(i // len(actions)) % len(scopes)],
+        ))
+    
+    roles = []
+    for _ in range(num_roles):
+        roles.append(SimpleNamespace(
+            id=uuid.uuid4(),
+            parent_role_id=None,
+            permissions=rng.sample(permissions, num_permissions // num_roles),
+        ))
+    
+    compiled = compile_permissions(
+        permissions=(
+            (p.id, p.resource, p.action.value, p.scope.value) for p in permissions
+        ),
+        roles=((role.id, role.parent_role_id) for role in roles),
+        grants=((role.id, p.id) for role in roles for p in role.permissions),
+    )
+    return roles, compiled
+
+
+def nested_loop_check(roles, resource: str, action: str) -> bool:
+    """Permission check as previously done in PermissionChecker."""
+    for role in roles:
+        for permission in role.permissions:
+            if permission.resource == resource and permission.action.value == action:
+                return True
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--roles", type=int, default=50)
+    parser.add_argument("--permissions", type=int, default=500)
+    parser.add_argument("--number", type=int, default=10000)
+    args = parser.parse_args()
+    
+    roles, compiled = build_fixture(args.roles, args.permissions)
+    role_ids = frozenset(role.id for role in roles)
+    
+    # Worst case for the nested loop: the permission is not granted
+    resource, action = "missing", "read"
+    assert nested_loop_check(roles, resource, action) == compiled.allows(role_ids, resource, action)
+    
+    loop_time = timeit.timeit(
+        lambda: nested_loop_check(roles, resource, action), number=args.number
+    )
+    bitset_time = timeit.timeit(
+        lambda: compiled.allows(role_ids, resource, action), number=args.number
+    )
+    
+    print(f"{args.roles} roles x {args.permissions} permissions, {args.number} checks")
+    print(f"  nested loop: {loop_time / args.number * 1e6:10.2f} us/check")
+    print(f"  bitset:      {bitset_time / args.number * 1e6:10.2f} us/check")
+    print(f"  speedup:     {loop_time / bitset_time:10.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Benchmark: idle real-time connections held by one worker.
+
+Registers --connections clients with the NotificationHub, each served
+by a task running the same loop as the WebSocket endpoint (wait for an
+event or heartbeat, then send it) against a socket stub that only counts
+messages. Reports the memory held per idle client and how long a
+broadcast and a single-user notification take to reach their clients.
+Socket buffers and the server's per-connection protocol state are not
+included; they add a few KB per client on top of the figures shown.
+"""
+
+import argparse
+import asyncio
+import gc
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timezone
+
+from app.core.config import settings
+from app.core.realtime import HEARTBEAT_EVENT, NotificationHub, notification_fields
+from app.models.enums import NotificationPriority, NotificationType
+
+
+class CountingSocket:
+    """Stands in for a WebSocket; wakes the benchmark once every client has a notification."""
+    
+    def __init__(self, tracker: "Tracker"):
+        self.tracker = tracker
+    
+    async def send_text(self, event: str) -> None:
+        if event != HEARTBEAT_EVENT:
+            self.tracker.received()
+
+
+class Tracker:
+    def __init__(self):
+        self.expected = 0
+        self.count = 0
+        self.done = asyncio.Event()
+    
+    def expect(self, expected: int) -> None:
+        self.expected, self.count = expected, 0
+        self.done.clear()
+    
+    def received(self) -> None:
+        self.count += 1
+        if self.count >= self.expected:
+            self.done.set()
+
+
+async def serve(socket: CountingSocket, connection) -> None:
+    while True:
+        event = await connection.next_event(settings.REALTIME_HEARTBEAT_SECONDS)
+        async with asyncio.timeout(settings.REALTIME_SEND_TIMEOUT_SECONDS):
+            await socket.send_text(event)
+
+
+async def delivery_ms(hub: NotificationHub, tracker: Tracker, expected: int, **publish) -> float:
+    tracker.expect(expected)
+    start = time.perf_counter()
+    await hub.publish(**publish)
+    await tracker.done.wait()
+    return (time.perf_counter() - start) * 1000
+
+
+async def main(connections: int, users: int) -> None:
+    settings.REALTIME_MAX_CONNECTIONS = connections
+    hub = NotificationHub()
+    tracker = Tracker()
+    user_ids = [uuid.uuid4() for _ in range(users)]
+    
+    gc.collect()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tasks = [
+        asyncio.create_task(serve(CountingSocket(tracker), hub.connect(user_ids[i % users])))
+        for i in range(connections)
+    ]
+    await asyncio.sleep(0)
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    
+    print(f"{hub.connection_count} idle connections of {users} users")
+    print(f"memory held: {held / 1024 / 1024:.1f} MB ({held / connections / 1024:.2f} KB per connection)")
+    
+    fields = dict(
+        title="Bench",
+        message="Message",
+        priority=NotificationPriority.NORMAL,
+        action_url=None,
+        created_at=datetime.now(timezone.utc),
+    )
+    broadcast_ms = await delivery_ms(
+        hub, tracker, connections,
+        notification=notification_fields(type=NotificationType.BROADCAST, id=uuid.uuid4(), **fields),
+    )
+    print(f"broadcast to all connections: {broadcast_ms:.1f} ms")
+    
+    per_user = sum(1 for i in range(connections) if i % users == 0)
+    single_ms = await delivery_ms(
+        hub, tracker, per_user,
+        notification=notification_fields(type=NotificationType.PERSONAL, **fields),
+        recipients={user_ids[0]: uuid.uuid4()},
+    )
+    print(f"notification to one user ({per_user} connections): {single_ms:.2f} ms")
+    
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--connections", type=int, default=10000)
+    parser.add_argument("--users", type=int, default=5000)
+    args = parser.parse_args()
+    
+    asyncio.run(main(args.connections, args.users))
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+Benchmark: default FastAPI response handling vs FastJSONRoute.
+
+Serves the same 100-item PaginatedResponse[UserResponse] page from two
+routes and times --requests in-process requests against each:
+
+- default: the handler builds UserResponse models (with the EmailStr
+  output field the schema used to have) and FastAPI re-validates and
+  serializes them against response_model;
+- fast: the handler returns row dicts, and FastJSONRoute validates them
+  once and writes bytes with dump_json.
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+
+from fastapi import APIRouter, FastAPI
+from httpx import ASGITransport, AsyncClient
+from pydantic import EmailStr
+
+from app.core.serialization import FastJSONRoute
+from app.schemas.base import PaginatedResponse
+from app.schemas.user import UserResponse
+
+
+class LegacyUserResponse(UserResponse):
+    """UserResponse with email validated on output, as before."""
+    
+    email: EmailStr
+
+
+def make_rows(count: int) -> list:
+    now = datetime.now(timezone.utc)
+    return [
+        {
+            "id": uuid.uuid4(),
+            "created_at": now,
+            "updated_at": now,
+            "email": f"user{i}@example.com",
+            "username": f"user{i}",
+            "first_name": "First",
+            "last_name": "Last",
+            "phone": None,
+            "avatar_url": None,
+            "status": "active",
+            "email_verified": True,
+            "locale": "en",
+            "timezone": "UTC",
+            "last_login_at": now,
+        }
+        for i in range(count)
+    ]
+
+
+def build_app(rows: list) -> FastAPI:
+    default = APIRouter()
+    fast = APIRouter(route_class=FastJSONRoute)
+    
+    @default.get("/default", response_model=PaginatedResponse[LegacyUserResponse])
+    async def default_page():
+        return PaginatedResponse.create(
+            items=[LegacyUserResponse.model_validate(row) for row in rows],
+            total=len(rows),
+            page=1,
+            page_size=len(rows),
+        )
+    
+    @fast.get("/fast", response_model=PaginatedResponse[UserResponse])
+    async def fast_page():
+        return PaginatedResponse.create(items=rows, total=len(rows), page=1, page_size=len(rows))
+    
+    app = FastAPI()
+    app.include_router(default)
+    app.include_router(fast)
+    return app
+
+
+async def timed(client: AsyncClient, path: str, requests: int) -> float:
+    await client.get(path)
+    start = time.perf_counter()
+    for _ in range(requests):
+        response = await client.get(path)
+        response.raise_for_status()
+    return (time.perf_counter() - start) / requests * 1000
+
+
+async def main(items: int, requests: int) -> None:
+    app = build_app(make_rows(items))
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://bench") as client:
+        default_ms = await timed(client, "/default", requests)
+        fast_ms = await timed(client, "/fast", requests)
+    
+    print(f"{requests} requests, {items} users per page")
+    print(f"  default route:  {default_ms:7.3f} ms/request")
+    print(f"  FastJSONRoute:  {fast_ms:7.3f} ms/request")
+    print(f"  speedup: {default_ms / fast_ms:.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--requests", type=int, default=1000)
+    args = parser.parse_args()
+    
+    asyncio.run(main(args.items, args.requests))
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-recipient vs batched notification sends.
+
+Seeds an in-memory SQLite database with --users users and times sending
+one notification to growing recipient lists (a tenth of them unknown)
+both ways: a SELECT per recipient plus one ORM Notification each, as
+send_notification used to do, versus one validation query and
+bulk_insert. SQLite runs in-process, so every per-recipient round trip
+costs far more against a networked PostgreSQL than shown here.
+"""
+
+import argparse
+import asyncio
+import time
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core.database import bulk_insert, match_any
+from app.models import Notification, User
+from app.models.base import Base
+from app.models.enums import NotificationPriority, NotificationType
+
+
+async def seed(factory, users: int) -> list:
+    async with factory() as db:
+        rows = [
+            User(email=f"user{i}@example.com", username=f"user{i}", password_hash="x")
+            for i in range(users)
+        ]
+        db.add_all(rows)
+        await db.commit()
+        return [user.id for user in rows]
+
+
+async def per_recipient(db: AsyncSession, user_ids: list) -> int:
+    sent = 0
+    for user_id in user_ids:
+        result = await db.execute(select(User).where(User.id == user_id))
+        if result.scalar_one_or_none():
+            db.add(Notification(user_id=user_id, title="Bench", message="Message"))
+            sent += 1
+    await db.commit()
+    return sent
+
+
+async def batched(db: AsyncSession, user_ids: list) -> int:
+    result = await db.execute(select(User.id).where(match_any(db, User.id, user_ids)))
+    existing = set(result.scalars().all())
+    now = datetime.now(timezone.utc)
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "title": "Bench",
+            "message": "Message",
+            "type": NotificationType.PERSONAL,
+            "priority": NotificationPriority.NORMAL,
+            "read": False,
+            "read_at": None,
+            "action_url": None,
+            "metadata": {},
+            "created_at": now,
+        }
+        for user_id in user_ids
+        if user_id in existing
+    ]
+    await bulk_insert(db, Notification.__table__, rows)
+    await db.commit()
+    return len(rows)
+
+
+async def timed(factory, send, user_ids: list, repeats: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeats):
+        async with factory() as db:
+            await send(db, user_ids)
+    return (time.perf_counter() - start) / repeats * 1000
+
+
+async def main(users: int, repeats: int) -> None:
+    engine = create_async_engine("sqlite+aiosqlite:///:memory:")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    factory = async_sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
+    
+    ids = await seed(factory, users)
+    
+    print(f"{'recipients':>10}  {'per-recipient':>14}  {'batched':>10}  speedup")
+    recipients = 10
+    while recipients <= users:
+        known = ids[:recipients - recipients // 10]
+        user_ids = known + [uuid.uuid4() for _ in range(recipients // 10)]
+        slow_ms = await timed(factory, per_recipient, user_ids, repeats)
+        fast_ms = await timed(factory, batched, user_ids, repeats)
+        print(f"{recipients:>10}  {slow_ms:>11.2f} ms  {fast_ms:>7.2f} ms  {slow_ms / fast_ms:6.1f}x")
+        recipients *= 10
+    
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=10000)
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+    
+    asyncio.run(main(args.users, args.repeats))
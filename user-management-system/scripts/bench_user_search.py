@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Benchmark: four-column ILIKE search vs trigram-indexed search on PostgreSQL.
+
+Builds a scratch copy of the searched users columns with --rows synthetic
+users, then prints the query plan and timing of both queries with
+EXPLAIN ANALYZE. Requires DATABASE_URL to point at PostgreSQL with the
+pg_trgm extension available. The scratch table is dropped afterwards.
+"""
+
+import argparse
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.config import settings
+
+
+TABLE = "bench_user_search"
+
+DOCUMENT = (
+    "(coalesce(email, '') || ' ' || coalesce(username, '') || ' ' "
+    "|| coalesce(first_name, '') || ' ' || coalesce(last_name, ''))"
+)
+
+LEGACY_QUERY = f"""
+SELECT id FROM {TABLE}
+WHERE email ILIKE :pattern OR username ILIKE :pattern
+   OR first_name ILIKE :pattern OR last_name ILIKE :pattern
+ORDER BY created_at DESC
+LIMIT 20
+"""
+
+TRIGRAM_QUERY = f"""
+SELECT id FROM {TABLE}
+WHERE {DOCUMENT} ILIKE :pattern
+ORDER BY word_similarity(:term, {DOCUMENT}) DESC, created_at DESC
+LIMIT 20
+"""
+
+
+async def explain(conn, query: str, params: dict) -> None:
+    result = await conn.execute(text(f"EXPLAIN (ANALYZE, BUFFERS) {query}"), params)
+    for (line,) in result:
+        print(f"    {line}")
+
+
+async def main(rows: int, term: str) -> None:
+    engine = create_async_engine(settings.DATABASE_URL)
+    params = {"pattern": f"%{term}%", "term": term}
+    
+    async with engine.connect() as conn:
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+        await conn.execute(text(f"""
+            CREATE TABLE {TABLE} AS
+            SELECT
+                gen_random_uuid() AS id,
+                'user' || i || '@example' || (i % 1000) || '.com' AS email,
+                'user_' || md5(i::text) AS username,
+                'First' || (i % 5000) AS first_name,
+                'Last' || (i % 20000) AS last_name,
+                now() - (i || ' seconds')::interval AS created_at
+            FROM generate_series(1, :rows) AS i
+        """), {"rows": rows})
+        await conn.execute(text(f"ANALYZE {TABLE}"))
+        await conn.commit()
+        
+        try:
+            print(f"{rows} users, term {term!r}")
+            
+            print("\n  Four-column ILIKE (no index):")
+            await explain(conn, LEGACY_QUERY, params)
+            
+            print("\n  Building trigram index...")
+            await conn.execute(text(
+                f"CREATE INDEX ON {TABLE} USING gin ({DOCUMENT} gin_trgm_ops)"
+            ))
+            await conn.execute(text(f"ANALYZE {TABLE}"))
+            await conn.commit()
+            
+            print("\n  Trigram index with relevance ranking:")
+            await explain(conn, TRIGRAM_QUERY, params)
+        finally:
+            await conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+            await conn.commit()
+    
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--term", default="last1234")
+    args = parser.parse_args()
+    
+    asyncio.run(main(args.rows, args.term))
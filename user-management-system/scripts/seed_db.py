@@ -8,6 +8,8 @@ import bcrypt
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.database import async_session_factory
+from app.core.permissions import permission_engine
+from app.core.redis import redis_client
 from app.models.user import User
 from app.models.role import Role, Permission, RolePermission, UserRole
 from app.models.enums import UserStatus, PermissionAction, PermissionScope
@@ -180,6 +182,20 @@ async def seed_admin_user(
     return admin
 
 
+async def notify_permissions_changed() -> None:
+    """Make running API workers recompile the seeded roles and permissions."""
+    try:
+        await redis_client.connect(max_retries=1)
+    except Exception as e:
+        print(f"Redis unavailable, workers pick up the changes within their TTL: {e}")
+        return
+    
+    try:
+        await permission_engine.notify_changed()
+    finally:
+        await redis_client.disconnect()
+
+
 async def main():
     """Main seeding function."""
     print("Starting database seeding...")
@@ -193,6 +209,8 @@ async def main():
             await session.commit()
             print("Database seeding completed successfully!")
             
+            await notify_permissions_changed()
+            
         except Exception as e:
             await session.rollback()
             print(f"Error seeding database: {e}")
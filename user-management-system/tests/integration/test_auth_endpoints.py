@@ -1,7 +1,34 @@
 """Integration tests for auth endpoints."""
 
+import uuid
+from datetime import datetime, timedelta, timezone
+
 import pytest
 from httpx import AsyncClient
+from sqlalchemy import select, update
+
+from app.core.security import create_refresh_token, decode_token, hash_token
+from app.models.enums import UserStatus
+from app.models.session import Session
+from app.models.user import User
+
+
+async def login(client: AsyncClient, test_session, user_data: dict) -> dict:
+    """Register an active user and log in, returning the tokens."""
+    await client.post("/api/v1/auth/register", json=user_data)
+    await test_session.execute(
+        update(User)
+        .where(User.email == user_data["email"].lower())
+        .values(status=UserStatus.ACTIVE)
+    )
+    await test_session.commit()
+    
+    response = await client.post(
+        "/api/v1/auth/login",
+        json={"email": user_data["email"], "password": user_data["password"]},
+    )
+    assert response.status_code == 200
+    return response.json()["tokens"]
 
 
 @pytest.mark.asyncio
@@ -28,6 +55,19 @@ class TestAuthEndpoints:
         response = await client.post("/api/v1/auth/register", json=user_data)
         
         assert response.status_code == 409
+        assert response.json()["detail"] == "Email already registered"
+    
+    async def test_register_duplicate_username(self, client: AsyncClient, user_data: dict):
+        """Test registration with a taken username."""
+        await client.post("/api/v1/auth/register", json=user_data)
+        
+        response = await client.post(
+            "/api/v1/auth/register",
+            json={**user_data, "email": f"other_{user_data['email']}"},
+        )
+        
+        assert response.status_code == 409
+        assert response.json()["detail"] == "Username already taken"
     
     async def test_login_success(self, client: AsyncClient, user_data: dict):
         """Test successful login."""
@@ -70,6 +110,112 @@ class TestAuthEndpoints:
         assert response.status_code == 401
 
 
+@pytest.mark.asyncio
+class TestRefreshToken:
+    """Tests for refresh token rotation."""
+    
+    async def refresh(self, client: AsyncClient, refresh_token: str):
+        return await client.post("/api/v1/auth/refresh", json={"refresh_token": refresh_token})
+    
+    async def update_session(self, test_session, refresh_token: str, **values) -> None:
+        session_id = uuid.UUID(decode_token(refresh_token)["session_id"])
+        await test_session.execute(update(Session).where(Session.id == session_id).values(**values))
+        await test_session.commit()
+    
+    async def test_refresh_success(self, client: AsyncClient, test_session, user_data: dict):
+        """Test a refresh mints a new access token and records it on the session."""
+        tokens = await login(client, test_session, user_data)
+        
+        response = await self.refresh(client, tokens["refresh_token"])
+        
+        assert response.status_code == 200
+        data = response.json()
+        assert data["refresh_token"] == tokens["refresh_token"]
+        payload = decode_token(data["access_token"])
+        assert payload["type"] == "access"
+        assert payload["email"] == user_data["email"].lower()
+        
+        session = await test_session.scalar(
+            select(Session).where(Session.id == uuid.UUID(payload["session_id"]))
+            .execution_options(populate_existing=True)
+        )
+        assert session.token_hash == hash_token(data["access_token"])
+    
+    async def test_refresh_revoked_session(self, client: AsyncClient, test_session, user_data: dict):
+        """Test a revoked session cannot be refreshed."""
+        tokens = await login(client, test_session, user_data)
+        await self.update_session(test_session, tokens["refresh_token"], revoked=True)
+        
+        response = await self.refresh(client, tokens["refresh_token"])
+        
+        assert response.status_code == 401
+    
+    async def test_refresh_expired_session(self, client: AsyncClient, test_session, user_data: dict):
+        """Test an expired session cannot be refreshed."""
+        tokens = await login(client, test_session, user_data)
+        await self.update_session(
+            test_session, tokens["refresh_token"],
+            expires_at=datetime.now(timezone.utc) - timedelta(minutes=1),
+        )
+        
+        response = await self.refresh(client, tokens["refresh_token"])
+        
+        assert response.status_code == 401
+    
+    async def test_refresh_wrong_token(self, client: AsyncClient, test_session, user_data: dict):
+        """Test a validly signed refresh token not issued for the session is rejected."""
+        tokens = await login(client, test_session, user_data)
+        payload = decode_token(tokens["refresh_token"])
+        forged = create_refresh_token({
+            "sub": payload["sub"],
+            "session_id": payload["session_id"],
+            "email": payload["email"],
+            "jti": uuid.uuid4().hex,
+        })
+        
+        response = await self.refresh(client, forged)
+        
+        assert response.status_code == 401
+        assert (await self.refresh(client, tokens["refresh_token"])).status_code == 200
+    
+    async def test_refresh_inactive_user(self, client: AsyncClient, test_session, user_data: dict):
+        """Test sessions of a suspended user cannot be refreshed."""
+        tokens = await login(client, test_session, user_data)
+        await test_session.execute(
+            update(User)
+            .where(User.email == user_data["email"].lower())
+            .values(status=UserStatus.SUSPENDED)
+        )
+        await test_session.commit()
+        
+        response = await self.refresh(client, tokens["refresh_token"])
+        
+        assert response.status_code == 401
+    
+    async def test_refresh_after_email_change(self, client: AsyncClient, test_session, user_data: dict):
+        """Test the access token is re-minted with the user's current email."""
+        tokens = await login(client, test_session, user_data)
+        new_email = f"changed_{user_data['email'].lower()}"
+        await test_session.execute(
+            update(User)
+            .where(User.email == user_data["email"].lower())
+            .values(email=new_email)
+        )
+        await test_session.commit()
+        
+        response = await self.refresh(client, tokens["refresh_token"])
+        
+        assert response.status_code == 200
+        access_token = response.json()["access_token"]
+        payload = decode_token(access_token)
+        assert payload["email"] == new_email
+        
+        session = await test_session.scalar(
+            select(Session).where(Session.id == uuid.UUID(payload["session_id"]))
+            .execution_options(populate_existing=True)
+        )
+        assert session.token_hash == hash_token(access_token)
+
 @pytest.mark.asyncio
 class TestHealthEndpoint:
     """Tests for health check endpoint."""
@@ -0,0 +1,97 @@
+"""Tests for the write-behind activity buffer."""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+
+from app.core.activity import SESSION_ACTIVITY_KEY, USER_LOGIN_KEY, activity_buffer
+from app.core.redis import redis_client
+from app.models.enums import UserStatus
+from app.models.session import Session
+from app.models.user import User
+from app.tasks import activity_tasks
+from app.tasks.activity_tasks import flush_buffered_activity
+
+
+@pytest_asyncio.fixture
+async def fake_redis(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(redis_client, "_client", client)
+    yield client
+    await client.aclose()
+
+
+async def create_user_session(test_session, email: str, last_activity: datetime):
+    user = User(email=email, password_hash="x", status=UserStatus.ACTIVE)
+    test_session.add(user)
+    await test_session.flush()
+    session = Session(
+        user_id=user.id,
+        token_hash=f"access-{email}",
+        refresh_token_hash=f"refresh-{email}",
+        expires_at=last_activity + timedelta(days=30),
+        last_activity=last_activity,
+    )
+    test_session.add(session)
+    await test_session.commit()
+    return user, session
+
+
+class TestActivityFlush:
+    """Tests for flushing buffered timestamps."""
+    
+    async def test_flush_writes_timestamps(self, fake_redis, test_session, monkeypatch):
+        """Test buffered logins and activity land in their rows and the batch is cleared."""
+        monkeypatch.setattr(activity_tasks, "FLUSH_CHUNK_SIZE", 1)
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        alice, alice_session = await create_user_session(test_session, "alice@example.com", now - timedelta(hours=2))
+        bob, bob_session = await create_user_session(test_session, "bob@example.com", now - timedelta(hours=2))
+        
+        for user, session in ((alice, alice_session), (bob, bob_session)):
+            await activity_buffer.record_login(user.id, now - timedelta(hours=1))
+            await activity_buffer.record_session_activity(session.id, now - timedelta(hours=1))
+        # A later write for the same session replaces the buffered value
+        await activity_buffer.record_session_activity(alice_session.id, now)
+        
+        stats = await flush_buffered_activity(test_session)
+        
+        assert stats == {SESSION_ACTIVITY_KEY: 2, USER_LOGIN_KEY: 2}
+        assert not await fake_redis.exists(
+            SESSION_ACTIVITY_KEY, f"{SESSION_ACTIVITY_KEY}:flushing",
+            USER_LOGIN_KEY, f"{USER_LOGIN_KEY}:flushing",
+        )
+        
+        test_session.expire_all()
+        sessions = {s.id: s for s in await test_session.scalars(select(Session))}
+        users = {u.id: u for u in await test_session.scalars(select(User))}
+        assert sessions[alice_session.id].last_activity.replace(tzinfo=timezone.utc) == now
+        assert sessions[bob_session.id].last_activity.replace(tzinfo=timezone.utc) == now - timedelta(hours=1)
+        assert users[alice.id].last_login_at.replace(tzinfo=timezone.utc) == now - timedelta(hours=1)
+        assert users[bob.id].last_login_at.replace(tzinfo=timezone.utc) == now - timedelta(hours=1)
+    
+    async def test_flush_only_moves_forward_and_resumes(self, fake_redis, test_session):
+        """Test older buffered times are ignored and a batch left by a failed flush is drained first."""
+        now = datetime.now(timezone.utc).replace(microsecond=0)
+        user, session = await create_user_session(test_session, "alice@example.com", now)
+        session_id = session.id
+        
+        await activity_buffer.record_session_activity(session.id, now - timedelta(hours=1))
+        # A flush that renamed the hash but failed before writing
+        assert await activity_buffer.drain(SESSION_ACTIVITY_KEY)
+        await activity_buffer.record_login(user.id, now)
+        await activity_buffer.record_session_activity(session.id, now + timedelta(minutes=5))
+        
+        assert await flush_buffered_activity(test_session) == {SESSION_ACTIVITY_KEY: 1, USER_LOGIN_KEY: 1}
+        
+        test_session.expire_all()
+        refreshed = await test_session.get(Session, session_id)
+        assert refreshed.last_activity.replace(tzinfo=timezone.utc) == now
+        
+        # The batch written during the failed flush is picked up next time
+        assert await flush_buffered_activity(test_session) == {SESSION_ACTIVITY_KEY: 1, USER_LOGIN_KEY: 0}
+        test_session.expire_all()
+        refreshed = await test_session.get(Session, session_id)
+        assert refreshed.last_activity.replace(tzinfo=timezone.utc) == now + timedelta(minutes=5)
@@ -0,0 +1,111 @@
+"""Tests for fan-out-on-read broadcast notifications."""
+
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import func, select, update
+
+from app.models.enums import NotificationType, UserStatus
+from app.models.notification import BroadcastNotification, BroadcastReceipt, Notification
+from app.models.user import User
+from app.services.notification_service import NotificationService
+
+
+async def create_user(session, email: str) -> User:
+    user = User(email=email, password_hash="x", status=UserStatus.ACTIVE)
+    session.add(user)
+    await session.commit()
+    return user
+
+
+class TestBroadcastNotifications:
+    """Tests for broadcasts in NotificationService."""
+    
+    async def test_broadcast_merged_into_inbox(self, test_session):
+        """Test a broadcast is listed with personal notifications, for existing users only."""
+        alice = await create_user(test_session, "alice@example.com")
+        excluded = await create_user(test_session, "excluded@example.com")
+        test_session.add(Notification(user_id=alice.id, title="Personal", message="m"))
+        await test_session.commit()
+        
+        service = NotificationService(test_session)
+        broadcast = await service.broadcast(title="To all", message="m", exclude_user_ids=[excluded.id])
+        latecomer = await create_user(test_session, "late@example.com")
+        
+        notifications, total = await service.list_notifications(alice.id)
+        assert total.value == 2
+        assert notifications[0].id == broadcast.id
+        assert notifications[0].user_id == alice.id
+        assert notifications[0].type == NotificationType.BROADCAST
+        assert notifications[0].read is False
+        
+        assert (await service.list_notifications(excluded.id))[1].value == 0
+        assert (await service.list_notifications(latecomer.id))[1].value == 0
+        
+        # One row for the broadcast, one receipt for the excluded user
+        receipts = await test_session.scalar(select(func.count()).select_from(BroadcastReceipt))
+        assert receipts == 1
+    
+    async def test_read_and_delete_broadcast(self, test_session):
+        """Test read and dismissed state is kept per user."""
+        alice = await create_user(test_session, "alice@example.com")
+        bob = await create_user(test_session, "bob@example.com")
+        service = NotificationService(test_session)
+        first = await service.broadcast(title="First", message="m")
+        await service.broadcast(title="Second", message="m")
+        test_session.add(Notification(user_id=alice.id, title="Personal", message="m"))
+        await test_session.commit()
+        
+        assert await service.get_unread_count(alice.id) == 3
+        
+        read = await service.mark_as_read(first.id, alice.id)
+        assert read.read is True
+        assert await service.get_unread_count(alice.id) == 2
+        assert await service.get_unread_count(bob.id) == 2
+        
+        assert await service.mark_all_as_read(alice.id) == 2
+        assert await service.get_unread_count(alice.id) == 0
+        assert await service.get_stats(alice.id) == (
+            3, 0, {"system": 0, "security": 0, "personal": 1, "broadcast": 2},
+        )
+        
+        await service.delete_notification(first.id, bob.id)
+        assert (await service.list_notifications(bob.id))[1].value == 1
+        assert await service.delete_read(alice.id) == 3
+        assert (await service.list_notifications(alice.id))[1].value == 0
+    
+    async def test_purge_broadcasts(self, test_session):
+        """Test old read broadcasts are deleted with their receipts, and receipts of deleted users."""
+        alice = await create_user(test_session, "alice@example.com")
+        gone = await create_user(test_session, "gone@example.com")
+        service = NotificationService(test_session)
+        old = await service.broadcast(title="Old", message="m")
+        recent = await service.broadcast(title="Recent", message="m")
+        for user in (alice, gone):
+            await service.mark_all_as_read(user.id)
+        unread = await service.broadcast(title="Old unread", message="m")
+        
+        now = datetime.now(timezone.utc)
+        await test_session.execute(
+            update(User)
+            .where(User.id.in_([alice.id, gone.id]))
+            .values(created_at=now - timedelta(days=200))
+        )
+        await test_session.execute(
+            update(BroadcastNotification)
+            .where(BroadcastNotification.id.in_([old.id, unread.id]))
+            .values(created_at=now - timedelta(days=100))
+        )
+        await test_session.execute(update(User).where(User.id == gone.id).values(deleted_at=now))
+        await test_session.commit()
+        
+        # Alice has not read the other old broadcast yet, so it is kept
+        assert await service.purge_broadcasts(now - timedelta(days=90)) == (1, 3)
+        
+        notifications, total = await service.list_notifications(alice.id)
+        assert total.value == 2
+        assert [n.id for n in notifications] == [recent.id, unread.id]
+        assert notifications[0].read is True
+        assert notifications[1].read is False
+        
+        await service.mark_as_read(unread.id, alice.id)
+        assert await service.purge_broadcasts(now - timedelta(days=90)) == (1, 1)
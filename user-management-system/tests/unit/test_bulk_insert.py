@@ -0,0 +1,60 @@
+"""Tests for multi-row bulk inserts."""
+
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import func, select
+
+from app.core import database
+from app.core.database import bulk_insert
+from app.models.enums import NotificationPriority, NotificationType, UserStatus
+from app.models.notification import Notification
+from app.models.user import User
+
+
+class TestBulkInsert:
+    """Tests for bulk_insert."""
+    
+    async def test_rows_split_across_statements(self, test_session, monkeypatch):
+        """Test rows beyond the parameter budget go out in further statements, fully processed."""
+        user = User(email="bulk-insert@example.com", password_hash="x", status=UserStatus.ACTIVE)
+        test_session.add(user)
+        await test_session.flush()
+        
+        statements = []
+        execute = test_session.execute
+        
+        async def counting_execute(statement, *args, **kwargs):
+            statements.append(statement)
+            return await execute(statement, *args, **kwargs)
+        
+        monkeypatch.setattr(database, "MAX_INSERT_PARAMS", 30)
+        monkeypatch.setattr(test_session, "execute", counting_execute)
+        
+        now = datetime.now(timezone.utc)
+        rows = [
+            {
+                "id": uuid.uuid4(),
+                "user_id": user.id,
+                "title": f"t{i}",
+                "message": "m",
+                "type": NotificationType.SYSTEM,
+                "priority": NotificationPriority.NORMAL,
+                "read": False,
+                "read_at": None,
+                "action_url": None,
+                "metadata": {"n": i},
+                "created_at": now,
+            }
+            for i in range(7)
+        ]
+        await bulk_insert(test_session, Notification.__table__, rows, copy_threshold=1)
+        monkeypatch.undo()
+        
+        # 11 columns: 2 rows per statement, COPY is PostgreSQL-only
+        assert len(statements) == 4
+        count = await test_session.scalar(select(func.count()).select_from(Notification))
+        assert count == 7
+        stored = await test_session.get(Notification, rows[6]["id"])
+        assert stored.metadata_ == {"n": 6}
+        assert stored.type == NotificationType.SYSTEM
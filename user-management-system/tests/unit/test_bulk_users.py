@@ -0,0 +1,57 @@
+"""Tests for set-based bulk user operations."""
+
+import uuid
+
+from app.models.enums import UserStatus
+from app.models.role import Role
+from app.models.user import User
+from app.services.user_service import UserService
+
+
+async def create_users(session, count: int) -> list:
+    users = [
+        User(email=f"bulk{i}@example.com", password_hash="x", status=UserStatus.ACTIVE)
+        for i in range(count)
+    ]
+    session.add_all(users)
+    await session.flush()
+    return [user.id for user in users]
+
+
+class TestBulkOperations:
+    """Tests for UserService bulk methods."""
+    
+    async def test_status_outcomes(self, test_session):
+        """Test changed, unchanged and unknown IDs are reported per user."""
+        ids = await create_users(test_session, 3)
+        ghost = uuid.uuid4()
+        service = UserService(test_session)
+        
+        await service.bulk_update_status(ids[:1], UserStatus.SUSPENDED)
+        outcomes = await service.bulk_update_status([*ids, ghost], UserStatus.SUSPENDED)
+        
+        assert outcomes == {
+            ids[0]: "unchanged",
+            ids[1]: "updated",
+            ids[2]: "updated",
+            ghost: "not_found",
+        }
+    
+    async def test_deleted_users_are_skipped(self, test_session):
+        """Test soft-deleted users are not found for status and role changes."""
+        ids = await create_users(test_session, 2)
+        role = Role(name="bulk")
+        test_session.add(role)
+        await test_session.flush()
+        service = UserService(test_session)
+        
+        assert await service.bulk_delete(ids[:1]) == {ids[0]: "updated"}
+        assert await service.bulk_delete(ids[:1]) == {ids[0]: "unchanged"}
+        
+        outcomes = await service.bulk_assign_role(ids, role.id, assigned_by=ids[1])
+        assert outcomes == {ids[0]: "not_found", ids[1]: "updated"}
+        
+        outcomes = await service.bulk_assign_role(ids, role.id, assigned_by=ids[1])
+        assert outcomes == {ids[0]: "not_found", ids[1]: "unchanged"}
+        
+        assert await service.bulk_remove_role(ids[1:], role.id) == {ids[1]: "updated"}
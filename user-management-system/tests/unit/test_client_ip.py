@@ -0,0 +1,40 @@
+"""Tests for client IP resolution behind reverse proxies."""
+
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.core.dependencies import get_client_ip
+
+
+def request_from(peer: str, **headers: str) -> Request:
+    return Request({
+        "type": "http",
+        "headers": [
+            (name.replace("_", "-").lower().encode(), value.encode())
+            for name, value in headers.items()
+        ],
+        "client": (peer, 12345),
+    })
+
+
+class TestClientIP:
+    """Tests for get_client_ip."""
+    
+    def test_forwarded_headers_ignored_from_untrusted_peer(self, monkeypatch):
+        """Test a client connecting directly cannot choose its IP."""
+        monkeypatch.setattr(settings, "TRUSTED_PROXIES", "")
+        
+        assert get_client_ip(request_from("203.0.113.7", X_Forwarded_For="1.2.3.4")) == "203.0.113.7"
+        assert get_client_ip(request_from("203.0.113.7", X_Real_IP="1.2.3.4")) == "203.0.113.7"
+    
+    def test_rightmost_untrusted_hop(self, monkeypatch):
+        """Test the client is the last hop before the trusted proxies."""
+        monkeypatch.setattr(settings, "TRUSTED_PROXIES", "10.0.0.0/8, 192.168.1.5")
+        
+        # The spoofed left-most entry is ignored
+        request = request_from("10.0.0.2", X_Forwarded_For="1.2.3.4, 203.0.113.7, 192.168.1.5")
+        assert get_client_ip(request) == "203.0.113.7"
+        
+        assert get_client_ip(request_from("10.0.0.2", X_Forwarded_For="10.0.0.9, 10.0.0.3")) == "10.0.0.9"
+        assert get_client_ip(request_from("10.0.0.2", X_Real_IP="203.0.113.8")) == "203.0.113.8"
+        assert get_client_ip(request_from("10.0.0.2")) == "10.0.0.2"
@@ -0,0 +1,85 @@
+"""Tests for listing total-count strategies."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+import pytest_asyncio
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql.asyncpg import PGDialect_asyncpg
+
+from app.core.config import settings
+from app.core.counting import CountStrategy, Total, count_total
+from app.core.redis import redis_client
+from app.models.enums import UserStatus
+from app.models.user import User
+
+
+SEARCH = "%ann :smith%"
+
+
+def search_query(term: str = SEARCH):
+    return select(User).where(
+        User.email.ilike(term),
+        User.status.in_([UserStatus.ACTIVE, UserStatus.INACTIVE]),
+    )
+
+
+def postgres_session(*scalars) -> MagicMock:
+    db = MagicMock()
+    db.bind.dialect = PGDialect_asyncpg()
+    db.execute = AsyncMock(side_effect=[MagicMock(scalar=MagicMock(return_value=value)) for value in scalars])
+    return db
+
+
+@pytest_asyncio.fixture
+async def fake_redis(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(redis_client, "_client", client)
+    yield client
+    await client.aclose()
+
+
+class TestEstimate:
+    """Tests for planner-estimated totals."""
+    
+    async def test_search_term_is_bound(self):
+        """Test user input is passed as a parameter, not written into the EXPLAIN."""
+        db = postgres_session([{"Plan": {"Plan Rows": 50000}}])
+        
+        assert await count_total(db, search_query(), CountStrategy.ESTIMATE) == Total(50000, is_estimate=True)
+        
+        compiled = db.execute.call_args.args[0].compile(dialect=db.bind.dialect)
+        assert str(compiled).startswith("EXPLAIN (FORMAT JSON) SELECT")
+        assert "smith" not in str(compiled)
+        assert SEARCH in compiled.params.values()
+    
+    async def test_small_estimate_counted_exactly(self):
+        """Test estimates below the threshold fall back to count(*)."""
+        db = postgres_session([{"Plan": {"Plan Rows": settings.COUNT_ESTIMATE_THRESHOLD - 1}}], 42)
+        
+        assert await count_total(db, search_query(), CountStrategy.ESTIMATE) == Total(42)
+        assert db.execute.await_count == 2
+
+
+class TestCached:
+    """Tests for Redis-cached totals."""
+    
+    async def test_cached_per_filter_set(self, fake_redis, test_session):
+        """Test counts are cached per search term and served flagged as estimates."""
+        test_session.add_all([
+            User(email="ann :smith@example.com", password_hash="x", status=UserStatus.ACTIVE),
+            User(email="bob@example.com", password_hash="x", status=UserStatus.ACTIVE),
+            User(email="bobby@example.com", password_hash="x", status=UserStatus.ACTIVE),
+        ])
+        await test_session.commit()
+        
+        assert await count_total(test_session, search_query(), CountStrategy.CACHED) == Total(1)
+        assert await count_total(test_session, search_query("%bob%"), CountStrategy.CACHED) == Total(2)
+        
+        test_session.add(User(email="bobbie@example.com", password_hash="x", status=UserStatus.ACTIVE))
+        await test_session.commit()
+        
+        assert await count_total(test_session, search_query(), CountStrategy.CACHED) == Total(1, is_estimate=True)
+        assert await count_total(test_session, search_query("%bob%"), CountStrategy.CACHED) == Total(2, is_estimate=True)
+        assert len(await fake_redis.keys("count:*")) == 2
@@ -0,0 +1,84 @@
+"""Tests for entity tags and conditional GET."""
+
+import uuid
+
+from fastapi import FastAPI, Depends
+from httpx import ASGITransport, AsyncClient
+
+from app.core.etag import conditional_get, etag_matches, make_etag
+from app.models.enums import UserStatus
+from app.models.role import Role
+from app.models.user import User
+from app.services.user_service import UserService
+
+
+loads = []
+
+
+async def item_version(item_id: int):
+    return None if item_id == 0 else (item_id, "v1")
+
+
+app = FastAPI()
+
+
+@app.get("/items/{item_id}")
+async def get_item(item_id: int, etag=Depends(conditional_get(item_version))):
+    loads.append(item_id)
+    return {"id": item_id}
+
+
+class TestETag:
+    """Tests for ETag helpers."""
+    
+    def test_make_etag(self):
+        """Test tags are quoted and change with any part."""
+        etag = make_etag("a", 1)
+        
+        assert etag.startswith('"') and etag.endswith('"')
+        assert etag == make_etag("a", 1)
+        assert etag != make_etag("a", 2)
+    
+    def test_etag_matches(self):
+        """Test If-None-Match lists, weak forms and wildcards."""
+        etag = make_etag("a")
+        
+        assert etag_matches(f'"x", W/{etag}', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('"x"', etag)
+        assert not etag_matches(None, etag)
+    
+    async def test_not_modified_skips_endpoint(self):
+        """Test a matching If-None-Match is answered 304 before the endpoint runs."""
+        loads.clear()
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            first = await client.get("/items/1")
+            etag = first.headers["etag"]
+            second = await client.get("/items/1", headers={"If-None-Match": etag})
+            missing = await client.get("/items/0")
+        
+        assert first.status_code == 200
+        assert second.status_code == 304
+        assert second.headers["etag"] == etag
+        assert second.content == b""
+        assert "etag" not in missing.headers
+        assert loads == [1, 0]
+    
+    async def test_user_version(self, test_session):
+        """Test the user version follows role assignments."""
+        user = User(email="etag@example.com", password_hash="x", status=UserStatus.ACTIVE)
+        role = Role(name="etag")
+        test_session.add_all([user, role])
+        await test_session.flush()
+        service = UserService(test_session)
+        
+        initial = await service.get_version(user.id)
+        await service.assign_role(user.id, role.id, assigned_by=user.id)
+        assigned = await service.get_version(user.id)
+        await service.remove_role(user.id, role.id)
+        removed = await service.get_version(user.id)
+        
+        assert assigned != initial
+        # Same representation as before the assignment, same version
+        assert removed == initial
+        assert await service.get_version(uuid.uuid4()) is None
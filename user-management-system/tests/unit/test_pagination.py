@@ -0,0 +1,25 @@
+"""Tests for pagination cursors."""
+
+import uuid
+from datetime import datetime, timezone
+
+import pytest
+
+from app.core.exceptions import BadRequestError
+from app.core.pagination import Cursor
+
+
+class TestCursor:
+    """Tests for opaque cursor encoding."""
+    
+    def test_roundtrip(self):
+        """Test a cursor decodes to the same position."""
+        cursor = Cursor(datetime(2025, 1, 30, 12, 0, 0, 123456, tzinfo=timezone.utc), uuid.uuid4(), "prev")
+        
+        assert Cursor.decode(cursor.encode()) == cursor
+    
+    @pytest.mark.parametrize("value", ["", "garbage", "W10", "WyJ4IiwgInkiLCAibmV4dCJd"])
+    def test_invalid(self, value):
+        """Test malformed cursors are rejected."""
+        with pytest.raises(BadRequestError):
+            Cursor.decode(value)
@@ -0,0 +1,70 @@
+"""Tests for the compiled permission engine."""
+
+import time
+import uuid
+
+from app.core.permissions import compile_permissions
+from app.core.principal import Principal, RoleGrant
+from app.models.enums import UserStatus
+
+
+class TestCompiledPermissions:
+    """Tests for permission compilation."""
+    
+    def setup_method(self):
+        self.read_users = uuid.uuid4()
+        self.read_own_users = uuid.uuid4()
+        self.delete_users = uuid.uuid4()
+        self.base = uuid.uuid4()
+        self.admin = uuid.uuid4()
+        
+        self.compiled = compile_permissions(
+            permissions=[
+                (self.read_users, "users", "read", "global"),
+                (self.read_own_users, "users", "read", "own"),
+                (self.delete_users, "users", "delete", "global"),
+            ],
+            roles=[(self.base, None), (self.admin, self.base)],
+            grants=[(self.base, self.read_own_users), (self.admin, self.delete_users)],
+        )
+    
+    def test_direct_and_any_scope(self):
+        """Test a role grants its permissions in any scope."""
+        roles = frozenset({self.base})
+        assert self.compiled.allows(roles, "users", "read")
+        assert not self.compiled.allows(roles, "users", "delete")
+    
+    def test_inherits_parent_role(self):
+        """Test a role inherits its parent's permissions."""
+        roles = frozenset({self.admin})
+        assert self.compiled.allows(roles, "users", "delete")
+        assert self.compiled.allows(roles, "users", "read")
+    
+    def test_unknown_permission_and_role(self):
+        """Test unknown permissions and roles grant nothing."""
+        assert not self.compiled.allows(frozenset({self.admin}), "roles", "read")
+        assert not self.compiled.allows(frozenset({uuid.uuid4()}), "users", "read")
+    
+    def test_parent_cycle(self):
+        """Test compilation terminates on cyclic role inheritance."""
+        a, b, perm = uuid.uuid4(), uuid.uuid4(), uuid.uuid4()
+        compiled = compile_permissions(
+            permissions=[(perm, "users", "read", "global")],
+            roles=[(a, b), (b, a)],
+            grants=[(b, perm)],
+        )
+        assert compiled.allows(frozenset({a}), "users", "read")
+    
+    def test_expired_role_ignored(self):
+        """Test expired role assignments grant nothing."""
+        principal = Principal(
+            id=uuid.uuid4(),
+            email="user@example.com",
+            status=UserStatus.ACTIVE,
+            is_deleted=False,
+            roles=(RoleGrant(id=self.admin, name="admin", expires_at=time.time() - 1),),
+        )
+        
+        assert principal.active_role_ids() == frozenset()
+        assert not principal.has_any_role("admin")
+        assert Principal.from_json(principal.to_json()) == principal
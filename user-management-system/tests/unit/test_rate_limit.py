@@ -0,0 +1,250 @@
+"""Tests for the sliding-window rate limiter."""
+
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from starlette.requests import Request
+
+from app.core.config import settings
+from app.core.rate_limit import RateLimiter, RateLimitMiddleware
+from app.core.redis import redis_client
+from app.core.security import create_access_token, create_refresh_token
+
+
+LOGIN_PATH = f"{settings.API_V1_PREFIX}/auth/login"
+REGISTER_PATH = f"{settings.API_V1_PREFIX}/auth/register"
+
+
+app = FastAPI()
+
+
+@app.get(f"{settings.API_V1_PREFIX}/items")
+async def list_items():
+    return {"items": []}
+
+
+@app.get("/health")
+async def health():
+    return {"status": "ok"}
+
+
+def make_middleware() -> RateLimitMiddleware:
+    return RateLimitMiddleware(
+        app,
+        ip_limit=60,
+        user_limit=120,
+        route_limits={LOGIN_PATH: 10, REGISTER_PATH: 5},
+        path_prefix=settings.API_V1_PREFIX,
+    )
+
+
+def request_to(path: str, token: str = "") -> Request:
+    headers = [(b"authorization", f"Bearer {token}".encode())] if token else []
+    return Request({
+        "type": "http",
+        "method": "GET",
+        "path": path,
+        "query_string": b"",
+        "headers": headers,
+        "client": ("203.0.113.7", 12345),
+    })
+
+
+def mock_script(monkeypatch, script) -> MagicMock:
+    client = MagicMock()
+    client.register_script.return_value = script
+    monkeypatch.setattr(redis_client, "_client", client)
+    return client
+
+
+class TestBudgets:
+    """Tests for RateLimitMiddleware._budgets."""
+    
+    def test_ip_budget(self, monkeypatch):
+        """Test every request counts against the client IP budget."""
+        monkeypatch.setattr(settings, "TRUSTED_PROXIES", "")
+        middleware = make_middleware()
+        
+        assert middleware._budgets(request_to(f"{settings.API_V1_PREFIX}/items")) == [
+            ("ip:203.0.113.7", 60),
+        ]
+    
+    def test_route_budgets(self, monkeypatch):
+        """Test login and register get their own per-IP budgets."""
+        monkeypatch.setattr(settings, "TRUSTED_PROXIES", "")
+        middleware = make_middleware()
+        
+        assert middleware._budgets(request_to(LOGIN_PATH)) == [
+            ("ip:203.0.113.7", 60),
+            (f"route:{LOGIN_PATH}:203.0.113.7", 10),
+        ]
+        assert middleware._budgets(request_to(REGISTER_PATH)) == [
+            ("ip:203.0.113.7", 60),
+            (f"route:{REGISTER_PATH}:203.0.113.7", 5),
+        ]
+    
+    def test_user_budget_only_for_access_token(self, monkeypatch):
+        """Test a valid access token replaces the IP budget with the user's."""
+        monkeypatch.setattr(settings, "TRUSTED_PROXIES", "")
+        middleware = make_middleware()
+        path = f"{settings.API_V1_PREFIX}/items"
+        
+        access = create_access_token({"sub": "user-1"})
+        assert middleware._budgets(request_to(path, access)) == [("user:user-1", 120)]
+        assert middleware._budgets(request_to(LOGIN_PATH, access)) == [
+            ("user:user-1", 120),
+            (f"route:{LOGIN_PATH}:203.0.113.7", 10),
+        ]
+        
+        refresh = create_refresh_token({"sub": "user-1"})
+        assert middleware._budgets(request_to(path, refresh)) == [("ip:203.0.113.7", 60)]
+        assert middleware._budgets(request_to(path, "not-a-token")) == [("ip:203.0.113.7", 60)]
+
+
+class TestRateLimitMiddleware:
+    """Tests for RateLimitMiddleware responses."""
+    
+    async def test_exhausted_budget_returns_429(self, monkeypatch):
+        """Test a non-zero script result rejects with a whole-second Retry-After."""
+        middleware = make_middleware()
+        transport = ASGITransport(app=middleware)
+        
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            monkeypatch.setattr(middleware.limiter, "hit", AsyncMock(return_value=2.2))
+            response = await client.get(f"{settings.API_V1_PREFIX}/items")
+            
+            assert response.status_code == 429
+            assert response.json() == {"detail": "Rate limit exceeded"}
+            assert response.headers["Retry-After"] == "3"
+            
+            monkeypatch.setattr(middleware.limiter, "hit", AsyncMock(return_value=0.05))
+            response = await client.get(f"{settings.API_V1_PREFIX}/items")
+            
+            assert response.status_code == 429
+            assert response.headers["Retry-After"] == "1"
+    
+    async def test_allowed_request_passes_through(self, monkeypatch):
+        """Test a zero script result reaches the application."""
+        mock_script(monkeypatch, AsyncMock(return_value=0))
+        middleware = make_middleware()
+        transport = ASGITransport(app=middleware)
+        
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get(f"{settings.API_V1_PREFIX}/items")
+        
+        assert response.status_code == 200
+        assert response.json() == {"items": []}
+    
+    async def test_unprefixed_paths_skipped(self, monkeypatch):
+        """Test paths outside the API prefix are never limited."""
+        middleware = make_middleware()
+        hit = AsyncMock(return_value=5.0)
+        monkeypatch.setattr(middleware.limiter, "hit", hit)
+        transport = ASGITransport(app=middleware)
+        
+        async with AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/health")
+        
+        assert response.status_code == 200
+        hit.assert_not_called()
+    
+    async def test_non_http_scope_skipped(self, monkeypatch):
+        """Test lifespan and other non-HTTP scopes bypass the limiter."""
+        inner = AsyncMock()
+        middleware = RateLimitMiddleware(inner, ip_limit=1, user_limit=1)
+        hit = AsyncMock(return_value=5.0)
+        monkeypatch.setattr(middleware.limiter, "hit", hit)
+        scope = {"type": "lifespan"}
+        
+        await middleware(scope, AsyncMock(), AsyncMock())
+        
+        inner.assert_awaited_once()
+        hit.assert_not_called()
+
+
+class TestRateLimiter:
+    """Tests for RateLimiter.hit."""
+    
+    async def test_fails_open_when_disconnected(self, monkeypatch):
+        """Test requests are allowed without a Redis connection."""
+        monkeypatch.setattr(redis_client, "_client", None)
+        
+        assert await RateLimiter().hit([("ip:1.2.3.4", 1)]) is None
+    
+    async def test_fails_open_on_script_error(self, monkeypatch):
+        """Test requests are allowed when the script raises."""
+        mock_script(monkeypatch, AsyncMock(side_effect=ConnectionError("down")))
+        
+        assert await RateLimiter().hit([("ip:1.2.3.4", 1)]) is None
+    
+    async def test_empty_budgets(self, monkeypatch):
+        """Test no budgets means no Redis call."""
+        script = AsyncMock(return_value=0)
+        mock_script(monkeypatch, script)
+        
+        assert await RateLimiter().hit([]) is None
+        script.assert_not_called()
+    
+    async def test_script_result_in_seconds(self, monkeypatch):
+        """Test the script's millisecond wait is returned in seconds."""
+        script = AsyncMock(return_value=1500)
+        mock_script(monkeypatch, script)
+        
+        assert await RateLimiter().hit([("ip:1.2.3.4", 1), ("user:u", 2)]) == 1.5
+        
+        kwargs = script.call_args.kwargs
+        assert kwargs["keys"] == ["ratelimit:ip:1.2.3.4", "ratelimit:user:u"]
+        assert kwargs["args"][-2:] == [1, 2]
+
+
+class TestSlidingWindowScript:
+    """Tests for the Lua script against an in-memory Redis."""
+    
+    async def test_records_only_when_all_budgets_have_room(self, monkeypatch):
+        """Test a full budget blocks the hit from being recorded in any budget."""
+        fakeredis = pytest.importorskip("fakeredis")
+        pytest.importorskip("lupa")
+        client = fakeredis.FakeAsyncRedis(decode_responses=True)
+        monkeypatch.setattr(redis_client, "_client", client)
+        limiter = RateLimiter()
+        
+        assert await limiter.hit([("ip:a", 5), ("route:login:a", 1)]) is None
+        assert await client.zcard("ratelimit:ip:a") == 1
+        assert await client.zcard("ratelimit:route:login:a") == 1
+        
+        # The route budget is full, so the IP budget must not be charged
+        retry_after = await limiter.hit([("ip:a", 5), ("route:login:a", 1)])
+        assert 0 < retry_after <= 60
+        assert await client.zcard("ratelimit:ip:a") == 1
+        assert await client.zcard("ratelimit:route:login:a") == 1
+        
+        assert await limiter.hit([("ip:a", 5)]) is None
+        assert await client.zcard("ratelimit:ip:a") == 2
+        assert await client.pttl("ratelimit:ip:a") > 0
+        
+        await client.aclose()
+    
+    async def test_authenticated_client_gets_user_budget(self, monkeypatch):
+        """Test an authenticated client is held to the user budget, not the IP budget."""
+        fakeredis = pytest.importorskip("fakeredis")
+        pytest.importorskip("lupa")
+        client = fakeredis.FakeAsyncRedis(decode_responses=True)
+        monkeypatch.setattr(redis_client, "_client", client)
+        monkeypatch.setattr(settings, "TRUSTED_PROXIES", "")
+        transport = ASGITransport(app=make_middleware())
+        path = f"{settings.API_V1_PREFIX}/items"
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': 'user-1'})}"}
+        
+        async with AsyncClient(transport=transport, base_url="http://test") as http:
+            for _ in range(120):
+                assert (await http.get(path, headers=headers)).status_code == 200
+            assert (await http.get(path, headers=headers)).status_code == 429
+            
+            # Anonymous clients on the same address still have their own budget
+            for _ in range(60):
+                assert (await http.get(path)).status_code == 200
+            assert (await http.get(path)).status_code == 429
+        
+        await client.aclose()
@@ -0,0 +1,85 @@
+"""Tests for real-time notification fan-out."""
+
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+
+from app.core.config import settings
+from app.core.realtime import (
+    EXPIRED_EVENT,
+    HEARTBEAT_EVENT,
+    RESYNC_EVENT,
+    NotificationHub,
+    notification_fields,
+)
+from app.models.enums import NotificationPriority, NotificationType
+
+
+def fields(**kwargs) -> dict:
+    return notification_fields(
+        "Title", "Message", NotificationType.PERSONAL, NotificationPriority.NORMAL,
+        None, datetime.now(timezone.utc), **kwargs,
+    )
+
+
+class TestNotificationHub:
+    """Tests for NotificationHub."""
+    
+    async def test_publish_to_recipients(self):
+        """Test notifications reach only their recipients' connections (locally without Redis)."""
+        hub = NotificationHub()
+        alice, bob = uuid.uuid4(), uuid.uuid4()
+        first, second, other = hub.connect(alice), hub.connect(alice), hub.connect(bob)
+        notification_id = uuid.uuid4()
+        
+        await hub.publish(fields(), recipients={alice: notification_id, uuid.uuid4(): uuid.uuid4()})
+        
+        for connection in (first, second):
+            event = json.loads(await connection.next_event(1))
+            assert event["type"] == "notification"
+            assert event["notification"]["id"] == str(notification_id)
+        assert other.queue.empty()
+        
+        await hub.publish(fields(id=uuid.uuid4()), exclude=[alice])
+        assert json.loads(await other.next_event(1))["type"] == "notification"
+        assert first.queue.empty()
+        
+        hub.disconnect(first)
+        hub.disconnect(first)
+        assert hub.connection_count == 2
+    
+    async def test_backpressure_and_heartbeat(self, monkeypatch):
+        """Test a client that falls behind gets a resync event instead of a growing backlog."""
+        monkeypatch.setattr(settings, "REALTIME_QUEUE_SIZE", 3)
+        monkeypatch.setattr(settings, "REALTIME_MAX_CONNECTIONS", 1)
+        hub = NotificationHub()
+        connection = hub.connect(uuid.uuid4())
+        assert hub.connect(uuid.uuid4()) is None
+        
+        for _ in range(4):
+            await hub.publish(fields(id=uuid.uuid4()))
+        
+        assert connection.queue.qsize() == 1
+        assert await connection.next_event(1) == RESYNC_EVENT
+        assert await connection.next_event(0.01) == HEARTBEAT_EVENT
+    
+    async def test_connection_ends_with_token(self):
+        """Test connections end when their token expires or their session is revoked."""
+        hub = NotificationHub()
+        user_id, session_id = uuid.uuid4(), uuid.uuid4()
+        expiring = hub.connect(user_id, uuid.uuid4(), expires_at=time.time() + 0.05)
+        revoked = hub.connect(user_id, session_id, expires_at=time.time() + 900)
+        
+        assert await expiring.next_event(10) == EXPIRED_EVENT
+        
+        await hub.publish(fields(), recipients={user_id: uuid.uuid4()})
+        hub.handle_revocation(json.dumps([[str(session_id), time.time() + 900]]))
+        assert await revoked.next_event(10) == EXPIRED_EVENT
+        
+        # Closed connections take no further events
+        await hub.publish(fields(), recipients={user_id: uuid.uuid4()})
+        assert revoked.queue.empty()
+        
+        hub.disconnect(revoked)
+        assert hub.close_sessions([session_id]) == 0
@@ -0,0 +1,31 @@
+"""Tests for the revoked-session denylist."""
+
+import json
+import time
+import uuid
+
+from app.core.revocation import RevocationList
+
+
+class TestRevocationList:
+    """Tests for the local denylist copy."""
+    
+    def test_handle_revocation(self):
+        """Test pub/sub messages revoke sessions on this worker."""
+        revocations = RevocationList(ttl=900)
+        session_id = uuid.uuid4()
+        
+        revocations.handle_revocation(json.dumps([[str(session_id), time.time() + 900]]))
+        
+        assert revocations.is_revoked(session_id)
+        assert not revocations.is_revoked(uuid.uuid4())
+    
+    def test_expired_entry(self):
+        """Test entries lapse once tokens issued before revocation expire."""
+        revocations = RevocationList(ttl=900)
+        session_id = uuid.uuid4()
+        
+        revocations.handle_revocation(json.dumps([[str(session_id), time.time() - 1]]))
+        
+        assert not revocations.is_revoked(session_id)
+        assert not revocations.is_ready
@@ -1,14 +1,20 @@
 """Tests for security utilities."""
 
 import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import rsa
 
+from app.core import security
+from app.core.exceptions import ServiceUnavailableError
 from app.core.security import (
     create_access_token,
     create_refresh_token,
     decode_token,
     get_password_hash,
+    get_password_hash_async,
     hash_token,
     verify_password,
+    verify_password_async,
 )
 
 
@@ -36,6 +42,24 @@ class TestPasswordHashing:
         hashed = get_password_hash(password)
         
         assert verify_password("WrongPassword", hashed) is False
+    
+    async def test_hash_and_verify_async(self):
+        """Test password hashing in the worker pool."""
+        password = "TestPassword123!"
+        hashed = await get_password_hash_async(password)
+        
+        assert await verify_password_async(password, hashed) is True
+        assert await verify_password_async("WrongPassword", hashed) is False
+    
+    async def test_hash_pool_saturated(self, monkeypatch):
+        """Test that a saturated hashing pool fails fast with 503."""
+        monkeypatch.setattr(security, "_hash_pending", security.settings.PASSWORD_HASH_MAX_PENDING)
+        
+        with pytest.raises(ServiceUnavailableError) as exc_info:
+            await get_password_hash_async("TestPassword123!")
+        
+        assert exc_info.value.status_code == 503
+        assert "Retry-After" in exc_info.value.headers
 
 
 class TestJWT:
@@ -87,6 +111,75 @@ class TestJWT:
         assert decoded is None
 
 
+class TestTokenCodec:
+    """Tests for the verified-token cache and pluggable codec."""
+    
+    def test_cached_payload_is_copied(self):
+        """Test cached payloads cannot be mutated by callers."""
+        token = create_access_token({"sub": "user123"})
+        
+        first = decode_token(token)
+        first["sub"] = "tampered"
+        
+        assert decode_token(token)["sub"] == "user123"
+    
+    def test_custom_codec(self):
+        """Test a plugged-in codec is used for encode and decode."""
+        default = security.get_token_codec()
+        
+        class CountingCodec(security.TokenCodec):
+            decodes = 0
+            
+            def encode(self, claims):
+                return default.encode(claims)
+            
+            def decode(self, token):
+                CountingCodec.decodes += 1
+                return default.decode(token)
+        
+        security.set_token_codec(CountingCodec())
+        try:
+            token = create_access_token({"sub": "user123"})
+            assert decode_token(token)["sub"] == "user123"
+            assert decode_token(token)["sub"] == "user123"
+            assert decode_token("garbage") is None
+            assert decode_token("garbage") is None
+            
+            # Second decode of each token is served from the cache
+            assert CountingCodec.decodes == 2
+        finally:
+            security.set_token_codec(default)
+
+
+def _rsa_pem() -> str:
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    return key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    ).decode()
+
+
+class TestKeySetTokenCodec:
+    """Tests for asymmetric signing with key rotation."""
+    
+    def test_rotation_and_jwks(self):
+        """Test tokens signed with a retired key verify after rotation."""
+        old_pem, new_pem = _rsa_pem(), _rsa_pem()
+        old = security.KeySetTokenCodec("RS256", "k1", old_pem)
+        token = old.encode({"sub": "user123"})
+        
+        rotated = security.KeySetTokenCodec("RS256", "k2", new_pem, {"k1": old_pem})
+        
+        assert rotated.decode(token)["sub"] == "user123"
+        assert rotated.decode(rotated.encode({"sub": "user123"}))["sub"] == "user123"
+        assert security.KeySetTokenCodec("RS256", "k2", new_pem).decode(token) is None
+        
+        keys = rotated.jwks()["keys"]
+        assert {key["kid"] for key in keys} == {"k1", "k2"}
+        assert all("d" not in key for key in keys)
+
+
 class TestTokenHashing:
     """Tests for token hashing."""
     
@@ -0,0 +1,72 @@
+"""Tests for single-pass JSON response serialization."""
+
+from fastapi import APIRouter, FastAPI, Response
+from fastapi.responses import PlainTextResponse
+from httpx import ASGITransport, AsyncClient
+from pydantic import BaseModel
+
+from app.core.serialization import FastJSONRoute
+
+
+class Item(BaseModel):
+    name: str
+    tags: list[str] = []
+
+
+class Row:
+    name = "from attributes"
+
+
+router = APIRouter(route_class=FastJSONRoute)
+
+
+@router.post("/items", response_model=Item, status_code=201)
+async def create_item(response: Response):
+    response.headers["X-Item"] = "1"
+    return {"name": "created"}
+
+
+@router.get("/items/row", response_model=Item, response_model_exclude_unset=True)
+async def item_from_row():
+    return Row()
+
+
+@router.get("/text", response_model=Item)
+async def text():
+    return PlainTextResponse("as is")
+
+
+app = FastAPI()
+app.include_router(router)
+
+
+class TestFastJSONRoute:
+    """Tests for FastJSONRoute."""
+    
+    async def test_status_and_headers(self):
+        """Test route status codes and headers set on an injected Response are kept."""
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.post("/items")
+        
+        assert response.status_code == 201
+        assert response.headers["x-item"] == "1"
+        assert response.headers["content-type"] == "application/json"
+        assert response.json() == {"name": "created", "tags": []}
+    
+    async def test_validates_from_attributes(self):
+        """Test objects are validated by attribute and response options applied."""
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/items/row")
+        
+        assert response.json() == {"name": "from attributes"}
+    
+    async def test_response_passthrough(self):
+        """Test returned Response objects are sent unchanged."""
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            response = await client.get("/text")
+        
+        assert response.text == "as is"
+    
+    def test_openapi_hides_injected_parameter(self):
+        """Test the parameter added for the Response does not leak into OpenAPI."""
+        assert "_fast_json_response" not in str(app.openapi())
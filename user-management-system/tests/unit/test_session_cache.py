@@ -0,0 +1,83 @@
+"""Tests for the session validity cache."""
+
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+import pytest_asyncio
+
+from app.core import dependencies
+from app.core.config import settings
+from app.core.exceptions import SessionRevokedError
+from app.core.redis import redis_client
+from app.core.session_cache import session_cache
+from app.models.enums import UserStatus
+from app.models.session import Session
+from app.models.user import User
+
+
+@pytest_asyncio.fixture
+async def fake_redis(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    monkeypatch.setattr(redis_client, "_client", client)
+    monkeypatch.setattr(settings, "SESSION_CACHE_ENABLED", True)
+    yield client
+    await client.aclose()
+
+
+def make_session(user_id: uuid.UUID) -> Session:
+    return Session(
+        id=uuid.uuid4(),
+        user_id=user_id,
+        token_hash=uuid.uuid4().hex,
+        refresh_token_hash=uuid.uuid4().hex,
+        revoked=False,
+        expires_at=datetime.now(timezone.utc) + timedelta(days=1),
+    )
+
+
+class TestSessionCache:
+    """Tests for SessionCache."""
+    
+    async def test_store_and_revoke(self, fake_redis):
+        """Test a stored session is active until marked revoked."""
+        session = make_session(uuid.uuid4())
+        
+        await session_cache.store(session)
+        assert (await session_cache.get(session.id)).is_active
+        
+        await session_cache.mark_revoked(session.id, session.user_id, session.expires_at.timestamp())
+        assert not (await session_cache.get(session.id)).is_active
+    
+    async def test_fill_does_not_clobber_revoke(self, fake_redis):
+        """Test an active fill read before a revoke cannot replace the revoked entry."""
+        session = make_session(uuid.uuid4())
+        
+        await session_cache.mark_revoked(session.id, session.user_id, session.expires_at.timestamp())
+        await session_cache.store(session)
+        
+        assert not (await session_cache.get(session.id)).is_active
+    
+    async def test_revoke_during_miss_fill(self, fake_redis, test_session, monkeypatch):
+        """Test a logout committed between the row read and the cache fill wins."""
+        user = User(email="alice@example.com", password_hash="x", status=UserStatus.ACTIVE)
+        test_session.add(user)
+        await test_session.flush()
+        session = make_session(user.id)
+        test_session.add(session)
+        await test_session.commit()
+        
+        store = session_cache.store
+        
+        async def revoke_then_store(row: Session) -> None:
+            await session_cache.mark_revoked(row.id, row.user_id, row.expires_at.timestamp())
+            await store(row)
+        
+        monkeypatch.setattr(session_cache, "store", revoke_then_store)
+        
+        # This request read the row while it was still active
+        await dependencies.verify_session_active(test_session, session.id, user.id)
+        
+        with pytest.raises(SessionRevokedError):
+            await dependencies.verify_session_active(test_session, session.id, user.id)
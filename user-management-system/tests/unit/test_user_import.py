@@ -0,0 +1,91 @@
+"""Tests for bulk user import."""
+
+import io
+import threading
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.jobs import job_store
+from app.models.user import User
+from app.services.import_service import UserImportService
+
+
+async def run_import(engine, import_format: str, body: bytes) -> dict:
+    job = await job_store.create(
+        "user_import",
+        "00000000-0000-0000-0000-000000000000",
+        format=import_format,
+        processed=0,
+        created=0,
+        failed=0,
+        errors=[],
+        errors_truncated=False,
+    )
+    await UserImportService(engine).run(job, io.BytesIO(body))
+    return await job_store.get(job["id"])
+
+
+class TestUserImport:
+    """Tests for UserImportService."""
+    
+    async def test_csv_import_reports_row_errors(self, test_engine, test_session):
+        """Test valid rows are created and invalid or conflicting rows reported."""
+        test_session.add(User(email="taken@example.com", username="taken", password_hash="x"))
+        await test_session.commit()
+        
+        job = await run_import(test_engine, "csv", (
+            b"email,password,username\n"
+            b"new@example.com,TestPassword123!,newbie\n"
+            b"taken@example.com,TestPassword123!,\n"
+            b"other@example.com,TestPassword123!,TAKEN\n"
+            b"NEW@example.com,TestPassword123!,\n"
+            b"weak@example.com,weak,\n"
+        ))
+        
+        assert job["status"] == "completed"
+        assert (job["processed"], job["created"], job["failed"]) == (5, 1, 4)
+        assert [(error["row"], error["field"]) for error in job["errors"]] == [
+            (2, "email"),
+            (3, "username"),
+            (4, "email"),
+            (5, "password"),
+        ]
+        
+        result = await test_session.execute(select(User).where(User.email == "new@example.com"))
+        user = result.scalar_one()
+        assert user.username == "newbie"
+        assert user.password_hash.startswith("$2")
+    
+    async def test_ndjson_import_reports_malformed_lines(self, test_engine):
+        """Test malformed NDJSON lines are reported by line number."""
+        job = await run_import(test_engine, "ndjson", (
+            b'{"email": "a@example.com", "password": "TestPassword123!"}\n'
+            b"\n"
+            b"not json\n"
+            b"[1, 2]\n"
+        ))
+        
+        assert (job["processed"], job["created"], job["failed"]) == (3, 1, 2)
+        assert [error["row"] for error in job["errors"]] == [3, 4]
+    
+    async def test_batches_validated_off_event_loop(self, test_engine, monkeypatch):
+        """Test rows are read and validated in a worker thread, batch by batch."""
+        monkeypatch.setattr(settings, "IMPORT_BATCH_SIZE", 2)
+        threads = set()
+        read_batch = UserImportService._read_batch
+        
+        def tracking_read_batch(self, rows):
+            threads.add(threading.get_ident())
+            return read_batch(self, rows)
+        
+        monkeypatch.setattr(UserImportService, "_read_batch", tracking_read_batch)
+        
+        job = await run_import(test_engine, "ndjson", b"".join(
+            b'{"email": "user%d@example.com", "password": "TestPassword123!"}\n' % i
+            for i in (1, 2, 3, 1, 4)
+        ))
+        
+        assert (job["processed"], job["created"], job["failed"]) == (5, 4, 1)
+        assert [(error["row"], error["field"]) for error in job["errors"]] == [(4, "email")]
+        assert threads and threading.get_ident() not in threads